@@ -2,36 +2,173 @@
 Chat API endpoints for Neuro Tutor.
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends
-from sqlalchemy.orm import Session
+import asyncio
+import json
+from datetime import datetime
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+import anyio
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status, Depends
+from fastapi.responses import Response, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.chat import (
     ChatRequest, 
     ChatResponse, 
+    ClientTurn,
     SessionListResponse, 
     SessionMessagesResponse,
     SessionSummary,
-    Message
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    SearchResponse,
+    SearchResult,
+    ImportResponse,
+    Message,
+    ChatSession
 )
-from app.services.llm_client import generate_response
+from app.core.config import settings
+from app.services.llm_client import generate_response, stream_response
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.search import search_messages
+from app.services.transfer import export_sessions, import_sessions
+from app.services.versions import etag_matches, etags, list_version, session_version
+from app.services.summaries import apply_summary, update_conversation_summary
 from app.services.sessions import (
     create_session, 
     get_session, 
     list_sessions, 
     save_message,
+    save_turn,
+    make_message,
+    make_session,
+    to_message,
     get_session_messages,
-    get_session_message_count,
-    get_last_message_preview,
-    delete_session
+    get_session_history,
+    delete_session,
+    delete_sessions
 )
-from app.core.db import get_db
+from app.core.db import get_db, session_for, tenant_of
 
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+# Session id in the WebSocket path that starts a new session on the first message
+NEW_SESSION = "new"
+
+
+def _title_for(content: str) -> str:
+    """Session title from the first user message."""
+    # Use first 50 characters of user message as title
+    return content[:50] + ("..." if len(content) > 50 else "")
+
+
+def _to_summary(session: ChatSession) -> SessionSummary:
+    """Session row as a session list entry."""
+    return SessionSummary(
+        id=session.id,
+        title=session.title,
+        created_at=session.created_at,
+        last_updated_at=session.updated_at,
+        message_count=session.message_count,
+        last_message_preview=session.last_message_preview,
+        last_message_at=session.last_message_at
+    )
+
+
+async def _resolve_session(db: AsyncSession, request: ChatRequest, persist: bool = True) -> ChatSession:
+    """
+    Get the session named in the request, or create one titled after the first message.
+    
+    With ``persist=False`` a new session is only built, for the caller to save
+    together with the turn.
+    
+    Raises:
+        HTTPException: 404 if a session_id was given but does not exist
+    """
+    if request.session_id:
+        session = await get_session(db, request.session_id)
+        if not session:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Session {request.session_id} not found"
+            )
+        return session
+    
+    # Create new session with title based on first message
+    title = "New Chat"
+    if request.messages:
+        user_msg = request.messages[-1]
+        if user_msg.role == "user":
+            title = _title_for(user_msg.content)
+    
+    if not persist:
+        return make_session(title, tenant_of(db))
+    return await create_session(db, title)
+
+
+def _parse_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+    """
+    Decode a pagination cursor from a query parameter.
+    
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+async def _not_modified(
+    request: Request,
+    response: Response,
+    read_version: Callable[[], Awaitable[object]],
+    *parts: object
+) -> Optional[Response]:
+    """
+    Answer a conditional GET from the resource version alone.
+    
+    Sets the ETag on ``response``; must run before the data is read, so a
+    write racing the read can only make the ETag older than the data.
+    
+    Args:
+        read_version: Reads the stored version (None if the resource does not exist)
+    
+    Returns:
+        Optional[Response]: 304 response if the client's copy is current
+    """
+    if not etags.enabled:
+        return None
+    version = await read_version()
+    if version is None:
+        return None
+    etag = etags.etag(version, *parts)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        etags.not_modified += 1
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    # Cacheable, but revalidated on every use
+    response.headers["Cache-Control"] = "no-cache"
+    return None
+
+
+def _format_sse(event: str, data: Dict) -> str:
+    """Format a single Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 
 @router.post("/", response_model=ChatResponse, status_code=status.HTTP_200_OK)
-async def chat_endpoint(request: ChatRequest, db: Session = Depends(get_db)) -> ChatResponse:
+async def chat_endpoint(
+    request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+) -> ChatResponse:
     """
     Main chat endpoint for Neuro Tutor.
     
@@ -39,56 +176,46 @@ async def chat_endpoint(request: ChatRequest, db: Session = Depends(get_db)) ->
     
     Args:
         request: Chat request with messages, preferences, and optional session_id
+        background_tasks: Runs the rolling summary update after the response
         db: Database session
         
     Returns:
         Chat response with session_id and assistant's reply
     """
     try:
-        # Get or create session
-        if request.session_id:
-            session = get_session(db, request.session_id)
-            if not session:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Session {request.session_id} not found"
-                )
-        else:
-            # Create new session with title based on first message
-            title = "New Chat"
-            if request.messages:
-                user_msg = request.messages[-1]
-                if user_msg.role == "user":
-                    # Use first 50 characters of user message as title
-                    title = user_msg.content[:50] + ("..." if len(user_msg.content) > 50 else "")
-            
-            session = create_session(db, title)
+        # Get or create session; a new session is inserted together with the turn
+        session = await _resolve_session(db, request, persist=False)
+        is_new_session = not request.session_id
+        
+        # Get existing messages for context (served from the history cache in active sessions)
+        existing_messages = [] if is_new_session else await get_session_history(db, session.id, session.message_count)
         
-        # Save user message to database
+        # User message is saved with the reply in one transaction
+        turn = []
         if request.messages:
             user_message = request.messages[-1]  # Last message should be user message
             if user_message.role == "user":
-                save_message(db, session.id, "user", user_message.content)
+                turn.append(make_message(session.id, "user", user_message.content))
         
-        # Get existing messages for context
-        existing_messages = get_session_messages(db, session.id)
+        message_history = existing_messages + [to_message(msg) for msg in turn]
         
-        # Convert to Message format for LLM client
-        message_history = []
-        for msg in existing_messages:
-            message_history.append(Message(
-                id=msg.id,
-                role=msg.role,
-                content=msg.content,
-                timestamp=msg.timestamp
-            ))
+        # Older turns are replaced by the session's rolling summary
+        message_history, summary = await apply_summary(db, session.id, message_history)
         
         # Generate AI response
-        response = await generate_response(message_history, request.preferences, session.id)
+        response = await generate_response(
+            message_history,
+            request.preferences,
+            session.id,
+            use_cache=not request.bypass_cache,
+            summary=summary
+        )
         reply_message = response["reply_message"]
         
-        # Save AI reply to database
-        saved_reply = save_message(db, session.id, "assistant", reply_message.content)
+        # Save the whole turn to database
+        saved_reply = make_message(session.id, "assistant", reply_message.content)
+        turn.append(saved_reply)
+        await save_turn(db, session.id, turn, new_session=session if is_new_session else None)
         
         # Convert to Message response format
         response_message = Message(
@@ -98,6 +225,8 @@ async def chat_endpoint(request: ChatRequest, db: Session = Depends(get_db)) ->
             timestamp=saved_reply.timestamp
         )
         
+        background_tasks.add_task(update_conversation_summary, db.bind, session.id)
+        
         return ChatResponse(
             session_id=session.id,
             reply_message=response_message
@@ -112,33 +241,309 @@ async def chat_endpoint(request: ChatRequest, db: Session = Depends(get_db)) ->
         )
 
 
-@router.get("/sessions", response_model=SessionListResponse, status_code=status.HTTP_200_OK)
-async def get_sessions(db: Session = Depends(get_db)) -> SessionListResponse:
+@router.post("/stream", status_code=status.HTTP_200_OK)
+async def chat_stream_endpoint(
+    request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+) -> StreamingResponse:
     """
-    Get list of all chat sessions.
+    Streaming chat endpoint for Neuro Tutor.
+    
+    Streams the assistant's reply as Server-Sent Events: a ``session`` event,
+    one ``token`` event per content chunk, then a ``done`` event carrying the
+    saved reply message.
     
+    Args:
+        request: Chat request with messages, preferences, and optional session_id
+        background_tasks: Runs the rolling summary update after the stream ends
+        db: Database session
+        
     Returns:
-        List of session summaries with metadata
+        Event stream of the assistant's reply
     """
     try:
-        db_sessions = list_sessions(db)
+        session = await _resolve_session(db, request)
+        message_count = session.message_count
         
-        # Convert to SessionSummary models
-        session_summaries = []
-        for session in db_sessions:
-            message_count = get_session_message_count(db, session.id)
-            last_preview = get_last_message_preview(db, session.id)
+        # Save user message before streaming so it is never lost
+        if request.messages:
+            user_message = request.messages[-1]
+            if user_message.role == "user":
+                await save_message(db, session.id, "user", user_message.content)
+                message_count += 1
+        
+        message_history = await get_session_history(db, session.id, message_count)
+        message_history, summary = await apply_summary(db, session.id, message_history)
+        
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing chat request: {str(e)}"
+        )
+    
+    session_id = session.id
+    
+    async def event_stream() -> AsyncIterator[str]:
+        reply_parts = []
+        saved = False
+        try:
+            yield _format_sse("session", {"session_id": session_id})
+            
+            async for token in stream_response(
+                message_history,
+                request.preferences,
+                use_cache=not request.bypass_cache,
+                summary=summary
+            ):
+                reply_parts.append(token)
+                yield _format_sse("token", {"content": token})
+            
+            # Save full assistant message once the stream ends
+            saved_reply = await save_message(db, session_id, "assistant", "".join(reply_parts))
+            saved = True
             
-            summary = SessionSummary(
-                id=session.id,
-                title=session.title,
-                created_at=session.created_at,
-                last_updated_at=session.updated_at,
-                message_count=message_count
+            reply_message = Message(
+                id=saved_reply.id,
+                role="assistant",
+                content=saved_reply.content,
+                timestamp=saved_reply.timestamp
             )
-            session_summaries.append(summary)
+            yield _format_sse("done", {
+                "session_id": session_id,
+                "reply_message": reply_message.model_dump(mode="json")
+            })
+        finally:
+            # Client disconnected mid-stream: keep the part the student already saw.
+            # Starlette cancels the response's task group on disconnect, so the save is shielded
+            if not saved and reply_parts:
+                with anyio.CancelScope(shield=True):
+                    await save_message(db, session_id, "assistant", "".join(reply_parts))
+    
+    background_tasks.add_task(update_conversation_summary, db.bind, session_id)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background_tasks
+    )
+
+
+async def _send_session(websocket: WebSocket, bind, tenant_id: str, session_id: str, event: Dict) -> ChatSession:
+    """Send an event carrying the session's current metadata, and return the session."""
+    async with session_for(bind) as db:
+        db.info["tenant_id"] = tenant_id
+        session = await get_session(db, session_id)
+    await websocket.send_json({**event, "session": _to_summary(session).model_dump(mode="json")})
+    return session
+
+
+async def _websocket_save_turn(
+    websocket: WebSocket,
+    bind,
+    tenant_id: str,
+    session: Optional[ChatSession],
+    turn: ClientTurn
+) -> ChatSession:
+    """
+    Save the client's message, creating the session on the first turn, and acknowledge it.
+    
+    Returns:
+        ChatSession: The session, created by this turn if there was none
+    """
+    async with session_for(bind) as db:
+        db.info["tenant_id"] = tenant_id
+        is_new_session = session is None
+        if is_new_session:
+            session = make_session(_title_for(turn.content), tenant_id)
+        
+        user_message = make_message(session.id, "user", turn.content)
+        await save_turn(db, session.id, [user_message], new_session=session if is_new_session else None)
+    if not is_new_session:
+        # The stats UPDATE ran in the database; keep this copy's count in step
+        session.message_count += 1
+    
+    await websocket.send_json({
+        "type": "ack",
+        "client_id": turn.client_id,
+        "session_id": session.id,
+        "message": to_message(user_message).model_dump(mode="json")
+    })
+    return session
+
+
+async def _websocket_reply(
+    websocket: WebSocket,
+    bind,
+    tenant_id: str,
+    session: ChatSession,
+    turn: ClientTurn,
+    preferences
+) -> ChatSession:
+    """
+    Stream the reply to a saved turn, save it and send the updated session metadata.
+    
+    Returns:
+        ChatSession: The session as re-read after the reply was saved
+    """
+    async with session_for(bind) as db:
+        db.info["tenant_id"] = tenant_id
+        message_history = await get_session_history(db, session.id, session.message_count)
+        message_history, summary = await apply_summary(db, session.id, message_history)
+        # End the read transaction so no connection is held while the reply streams
+        await db.commit()
+        
+        reply_parts = []
+        saved_reply = None
+        try:
+            async for token in stream_response(
+                message_history,
+                preferences,
+                use_cache=not turn.bypass_cache,
+                summary=summary
+            ):
+                reply_parts.append(token)
+                await websocket.send_json({"type": "token", "content": token})
+            
+            saved_reply = make_message(session.id, "assistant", "".join(reply_parts))
+            await save_turn(db, session.id, [saved_reply])
+        finally:
+            # Client disconnected mid-stream: keep the part the student already saw
+            if saved_reply is None and reply_parts:
+                await save_message(db, session.id, "assistant", "".join(reply_parts))
+    
+    return await _send_session(websocket, bind, tenant_id, session.id, {
+        "type": "done",
+        "reply_message": to_message(saved_reply).model_dump(mode="json")
+    })
+
+
+@router.websocket("/ws/{session_id}")
+async def chat_websocket(
+    websocket: WebSocket,
+    session_id: str,
+    db: AsyncSession = Depends(get_db)
+) -> None:
+    """
+    Persistent chat channel for one session.
+    
+    The client sends only each new message (``ClientTurn`` frames, or
+    ``{"type": "ping"}``); the history stays on the server. For every turn the
+    server sends an ``ack`` with the saved user message, one ``token`` frame
+    per reply chunk, then ``done`` with the saved reply and updated session
+    metadata. Connect to ``/ws/new`` to start a session with the first message.
+    
+    Args:
+        websocket: Client connection
+        session_id: Session identifier, or ``new``
+        db: Database session (selects the tenant's shard)
+    """
+    bind, tenant_id = db.bind, tenant_of(db)
+    session = None
+    if session_id != NEW_SESSION:
+        session = await get_session(db, session_id)
+    # Turns open their own short sessions; don't hold this one for the connection's lifetime
+    await db.close()
+    
+    await websocket.accept()
+    if session_id != NEW_SESSION and session is None:
+        await websocket.send_json({"type": "error", "detail": f"Session {session_id} not found"})
+        await websocket.close(code=4404)
+        return
+    if session is not None:
+        await _send_session(websocket, bind, tenant_id, session.id, {"type": "session"})
+    
+    preferences = None
+    # Summary updates run beside the receive loop; kept referenced until done
+    summary_tasks = set()
+    try:
+        while True:
+            try:
+                frame = json.loads(await websocket.receive_text())
+            except ValueError:
+                frame = None
+            if isinstance(frame, dict) and frame.get("type") == "ping":
+                await websocket.send_json({"type": "pong"})
+                continue
+            try:
+                turn = ClientTurn.model_validate(frame)
+            except ValidationError:
+                await websocket.send_json({"type": "error", "detail": "Invalid message frame"})
+                continue
+            
+            if turn.preferences is not None:
+                preferences = turn.preferences
+            try:
+                # Assigned before the reply, so a failed first turn still keeps its new session
+                session = await _websocket_save_turn(websocket, bind, tenant_id, session, turn)
+                session = await _websocket_reply(websocket, bind, tenant_id, session, turn, preferences)
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                await websocket.send_json({"type": "error", "detail": f"Error processing chat message: {str(e)}"})
+                continue
+            
+            task = asyncio.create_task(update_conversation_summary(bind, session.id))
+            summary_tasks.add(task)
+            task.add_done_callback(summary_tasks.discard)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in summary_tasks:
+            task.cancel()
+        # Let cancelled updates close their database sessions before the handler returns
+        await asyncio.gather(*summary_tasks, return_exceptions=True)
+
+
+@router.get("/sessions", response_model=SessionListResponse, status_code=status.HTTP_200_OK)
+async def get_sessions(
+    request: Request,
+    response: Response,
+    limit: int = Query(default=settings.page_size_default, ge=1, le=settings.page_size_max),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_db)
+) -> SessionListResponse:
+    """
+    Get a page of the tenant's chat sessions, most recently updated first.
+    
+    Stats are denormalized on the session rows, so this is a single query.
+    Answers ``If-None-Match`` with 304 while the session list is unchanged.
+    
+    Args:
+        request: Request, for ``If-None-Match``
+        response: Response, for the ETag
+        limit: Page size
+        cursor: Opaque keyset cursor over (updated_at, id)
+        db: Database session
+    
+    Returns:
+        List of session summaries with metadata and the next page cursor
+    """
+    not_modified = await _not_modified(
+        request, response, partial(list_version, db, tenant_of(db)), "sessions", tenant_of(db), limit, cursor
+    )
+    if not_modified is not None:
+        return not_modified
+    
+    after = _parse_cursor(cursor)
+    try:
+        # Fetch one extra row to learn whether another page exists
+        db_sessions = await list_sessions(db, limit=limit + 1, after=after, tenant_id=tenant_of(db))
+        has_more = len(db_sessions) > limit
+        db_sessions = db_sessions[:limit]
         
-        return SessionListResponse(sessions=session_summaries)
+        # Convert to SessionSummary models
+        session_summaries = [_to_summary(session) for session in db_sessions]
+        
+        next_cursor = None
+        if has_more:
+            last = db_sessions[-1]
+            next_cursor = encode_cursor(last.updated_at, last.id)
+        
+        return SessionListResponse(sessions=session_summaries, next_cursor=next_cursor)
         
     except Exception as e:
         raise HTTPException(
@@ -147,29 +552,90 @@ async def get_sessions(db: Session = Depends(get_db)) -> SessionListResponse:
         )
 
 
+@router.get("/search", response_model=SearchResponse, status_code=status.HTTP_200_OK)
+async def search_endpoint(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to search for"),
+    limit: int = Query(default=20, ge=1, le=settings.page_size_max),
+    offset: int = Query(default=0, ge=0, le=settings.search_max_offset),
+    session_id: Optional[str] = Query(default=None, description="Only search this session"),
+    db: AsyncSession = Depends(get_db)
+) -> SearchResponse:
+    """
+    Full-text search over all messages, best matches first.
+    
+    Args:
+        q: Search text; every word must match, the last one as a prefix
+        limit: Page size
+        offset: Results to skip (``next_offset`` from the previous page)
+        session_id: Restrict the search to one session
+        db: Database session
+        
+    Returns:
+        Ranked matches with highlighted snippets and the next page offset
+    """
+    try:
+        # Fetch one extra row to learn whether another page exists
+        rows = await search_messages(db, q, limit=limit + 1, offset=offset, session_id=session_id)
+        has_more = len(rows) > limit
+        
+        return SearchResponse(
+            query=q,
+            results=[SearchResult(**row) for row in rows[:limit]],
+            next_offset=offset + limit if has_more else None
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error searching messages: {str(e)}"
+        )
+
+
 @router.get("/sessions/{session_id}/messages", response_model=SessionMessagesResponse, status_code=status.HTTP_200_OK)
-async def get_session_messages_endpoint(session_id: str, db: Session = Depends(get_db)) -> SessionMessagesResponse:
+async def get_session_messages_endpoint(
+    session_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(default=settings.page_size_max, ge=1, le=settings.page_size_max),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_db)
+) -> SessionMessagesResponse:
     """
-    Get all messages for a specific session.
+    Get a page of messages for a specific session, oldest first.
+    
+    Answers ``If-None-Match`` with 304 while the session is unchanged.
     
     Args:
         session_id: Unique session identifier
+        request: Request, for ``If-None-Match``
+        response: Response, for the ETag
+        limit: Page size
+        cursor: Opaque keyset cursor over (timestamp, id)
         db: Database session
         
     Returns:
-        Session messages
+        Session messages and the next page cursor
     """
+    not_modified = await _not_modified(
+        request, response, partial(session_version, db, session_id), "messages", tenant_of(db), session_id, limit, cursor
+    )
+    if not_modified is not None:
+        return not_modified
+    
+    after = _parse_cursor(cursor)
     try:
         # Check if session exists
-        session = get_session(db, session_id)
+        session = await get_session(db, session_id)
         if not session:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Session {session_id} not found"
             )
         
-        # Get messages from database
-        db_messages = get_session_messages(db, session_id)
+        # Get messages from database, one extra to detect a further page
+        db_messages = await get_session_messages(db, session_id, limit=limit + 1, after=after)
+        has_more = len(db_messages) > limit
+        db_messages = db_messages[:limit]
         
         # Convert to Message response format
         messages = []
@@ -182,9 +648,15 @@ async def get_session_messages_endpoint(session_id: str, db: Session = Depends(g
             )
             messages.append(message)
         
+        next_cursor = None
+        if has_more:
+            last = db_messages[-1]
+            next_cursor = encode_cursor(last.timestamp, last.id)
+        
         return SessionMessagesResponse(
             session_id=session_id,
-            messages=messages
+            messages=messages,
+            next_cursor=next_cursor
         )
         
     except HTTPException:
@@ -197,7 +669,7 @@ async def get_session_messages_endpoint(session_id: str, db: Session = Depends(g
 
 
 @router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_session_endpoint(session_id: str, db: Session = Depends(get_db)) -> None:
+async def delete_session_endpoint(session_id: str, db: AsyncSession = Depends(get_db)) -> None:
     """
     Delete a specific session.
     
@@ -212,7 +684,7 @@ async def delete_session_endpoint(session_id: str, db: Session = Depends(get_db)
                 detail="Cannot delete welcome session"
             )
         
-        success = delete_session(db, session_id)
+        success = await delete_session(db, session_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -228,3 +700,87 @@ async def delete_session_endpoint(session_id: str, db: Session = Depends(get_db)
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting session: {str(e)}"
         )
+
+
+@router.post("/sessions/delete", response_model=BulkDeleteResponse, status_code=status.HTTP_200_OK)
+async def bulk_delete_sessions_endpoint(
+    request: BulkDeleteRequest,
+    db: AsyncSession = Depends(get_db)
+) -> BulkDeleteResponse:
+    """
+    Delete many sessions in one statement.
+    
+    Unknown ids are ignored and the welcome session is never deleted.
+    
+    Args:
+        request: Session ids to delete
+        db: Database session
+        
+    Returns:
+        Number of sessions deleted
+    """
+    try:
+        session_ids = [session_id for session_id in set(request.session_ids) if session_id != "welcome"]
+        deleted = await delete_sessions(db, session_ids)
+        return BulkDeleteResponse(deleted=deleted)
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error deleting sessions: {str(e)}"
+        )
+
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_endpoint(db: AsyncSession = Depends(get_db)) -> StreamingResponse:
+    """
+    Stream all of the tenant's sessions and messages as NDJSON.
+    
+    Each session line is followed by its messages, oldest first; archived
+    sessions are included. Rows are read through a server-side cursor, so
+    memory use does not grow with the export.
+    
+    Args:
+        db: Database session (selects the tenant's shard)
+        
+    Returns:
+        NDJSON stream in the format accepted by ``POST /import``
+    """
+    return StreamingResponse(
+        export_sessions(db.bind, tenant_of(db)),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="neuro-tutor-export.ndjson"'}
+    )
+
+
+@router.post("/import", response_model=ImportResponse, status_code=status.HTTP_200_OK)
+async def import_endpoint(request: Request, db: AsyncSession = Depends(get_db)) -> ImportResponse:
+    """
+    Import sessions and messages from an NDJSON export.
+    
+    The body is read as a stream and inserted in batches. Sessions whose id
+    already exists are skipped, so an interrupted import can be rerun.
+    
+    Args:
+        request: Request with an NDJSON body
+        db: Database session
+        
+    Returns:
+        Counts of imported and skipped rows
+    """
+    try:
+        counts = await import_sessions(db, request.stream(), tenant_of(db))
+        return ImportResponse(**counts)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Import contains a repeated session or message id"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error importing sessions: {str(e)}"
+        )
@@ -2,7 +2,7 @@
 Core configuration settings for Neuro Tutor backend.
 """
 
-from typing import List
+from typing import Dict, List
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
 
@@ -35,6 +35,7 @@ class Settings(BaseSettings):
     # LLM Provider settings
     llm_provider: str = "openrouter"  # openrouter is the primary provider
     openrouter_api_key: str = "YOUR_OPENROUTER_API_KEY_HERE"  # OpenRouter API key
+    openrouter_base_url: str = "https://openrouter.ai/api/v1"  # point at app.tools.mock_openrouter for offline load tests
     
     @property
     def openrouter_api_key_from_env(self) -> str:
@@ -48,8 +49,128 @@ class Settings(BaseSettings):
     default_temperature: float = 0.7
     default_max_tokens: int = 1000
     
+    # Context window: total prompt + completion token budget per turn
+    context_window_tokens: int = 8000
+    context_window_model_tokens: str = ""  # e.g. "openai/gpt-3.5-turbo=16000,openai/gpt-4o=32000"
+    
+    @property
+    def context_window_model_budgets(self) -> Dict[str, int]:
+        """Convert comma-separated model=tokens pairs to a dict."""
+        budgets = {}
+        for item in self.context_window_model_tokens.split(","):
+            if "=" in item:
+                model, tokens = item.rsplit("=", 1)
+                budgets[model.strip()] = int(tokens)
+        return budgets
+    
+    # Rolling conversation summary
+    summary_enabled: bool = True
+    summary_keep_recent_messages: int = 10  # newest messages always sent verbatim
+    summary_trigger_messages: int = 20  # un-summarized older messages before a summary update runs
+    summary_max_tokens: int = 400
+    
+    # Hedged requests: ask a secondary model when the primary is slower than usual
+    hedge_enabled: bool = False
+    hedge_secondary_model: str = ""  # e.g. "anthropic/claude-3-haiku"
+    hedge_percentile: float = 0.95  # primary latency percentile used as the hedge threshold
+    hedge_initial_delay_seconds: float = 8.0  # threshold until enough latency samples exist
+    hedge_min_delay_seconds: float = 1.0
+    hedge_max_delay_seconds: float = 20.0
+    latency_window_size: int = 200
+    latency_min_samples: int = 20
+    
+    # Adaptive (AIMD) limit on concurrent OpenRouter calls
+    llm_concurrency_initial: int = 16
+    llm_concurrency_min: int = 1
+    llm_concurrency_max: int = 64
+    llm_queue_max: int = 200  # callers allowed to wait for a slot
+    llm_queue_timeout_seconds: float = 10.0
+    llm_max_retry_after_seconds: float = 60.0
+    
+    # Retries and circuit breaker for the LLM provider
+    llm_retry_max_attempts: int = 3
+    llm_retry_base_delay_seconds: float = 0.25
+    llm_retry_max_delay_seconds: float = 4.0
+    circuit_breaker_failure_threshold: int = 5
+    circuit_breaker_reset_seconds: float = 30.0
+    
+    # Pagination for session and message lists
+    page_size_default: int = 50
+    page_size_max: int = 200
+    search_max_offset: int = 1000  # deep ranked pages get slower; refine the query instead
+    
+    # NDJSON bulk export and import
+    export_batch_size: int = 500  # rows fetched per server-side cursor round trip
+    import_batch_size: int = 1000  # rows inserted per executemany and commit
+    import_max_line_bytes: int = 1024 * 1024
+    
+    # Group commit: chat-turn writes from concurrent requests share one transaction
+    group_commit_enabled: bool = False
+    group_commit_max_batch: int = 64
+    group_commit_max_delay_ms: float = 2.0  # how long the first write waits for company
+    
+    # Database (sqlite:///... or postgresql://...; mapped to the aiosqlite / asyncpg drivers)
+    database_url: str = "sqlite:///./neuro_tutor.db"
+    db_pool_size: int = 10
+    db_max_overflow: int = 20  # connections allowed beyond pool_size under bursts
+    db_pool_timeout_seconds: float = 30.0  # wait for a free connection before failing
+    db_pool_pre_ping: bool = True  # check connections on checkout (server databases)
+    db_pool_recycle_seconds: int = 1800  # replace server connections older than this
+    db_statement_timeout_ms: int = 15000  # PostgreSQL statement_timeout; 0 disables
+    # Sharding: "name=url,..." spreads tenants over several databases; empty uses DATABASE_URL only
+    shard_urls: str = ""
+    tenant_header: str = "X-Tenant-ID"
+    default_tenant: str = "default"
+    run_migrations_on_startup: bool = True  # disable on replicas when python -m app.tools.migrate runs per deploy
+    
+    # Retention: delete sessions idle longer than retention_days (0 keeps everything)
+    retention_days: float = 0
+    retention_batch_size: int = 100  # sessions per delete transaction
+    retention_interval_seconds: float = 3600
+    retention_batch_pause_seconds: float = 0.05
+    bulk_delete_max_sessions: int = 500
+    
+    # Cold storage: sessions idle longer than archive_after_days are packed into one compressed blob (0 disables)
+    archive_after_days: float = 0
+    archive_batch_size: int = 50
+    archive_interval_seconds: float = 3600
+    archive_batch_pause_seconds: float = 0.05
+    archive_compression_level: int = 9  # zlib level; archives are written once and read rarely
+    
+    # SQLite profile applied to every connection
+    sqlite_journal_mode: str = "wal"  # readers and the writer no longer block each other
+    sqlite_synchronous: str = "normal"  # safe with WAL; "full" fsyncs every commit
+    sqlite_busy_timeout_ms: int = 5000  # wait for the write lock instead of "database is locked"
+    sqlite_cache_size: int = -65536  # negative = KiB, i.e. 64 MiB page cache per connection
+    sqlite_mmap_size: int = 268435456  # bytes of the database file memory-mapped (256 MiB)
+    sqlite_temp_store: str = "memory"
+    sqlite_checkpoint_interval_seconds: float = 60.0  # passive WAL checkpoints; 0 disables
+    
+    # In-process LRU of recent session histories (per worker; checked against the stored message count)
+    history_cache_enabled: bool = True
+    history_cache_max_bytes: int = 32 * 1024 * 1024
+    
+    # ETags for session lists and histories from versions stored with the sessions
+    etag_enabled: bool = True
+    
     # Request settings
     request_timeout: int = 30  # seconds
+    
+    # Outbound HTTP connection pool (shared by all OpenRouter calls)
+    http_timeout: float = 60.0  # seconds
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0  # seconds an idle connection is kept open
+    http2_enabled: bool = True
+    
+    # LLM response cache
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 1000
+    response_cache_ttl_seconds: int = 3600
+    response_cache_sqlite_path: str = ""  # e.g. ./llm_cache.db; empty keeps the cache in memory only
+    
+    # Share one upstream call among identical concurrent requests
+    llm_coalesce_requests: bool = True
 
 
 # Global settings instance
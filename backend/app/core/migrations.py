@@ -0,0 +1,295 @@
+"""
+Versioned schema migrations for existing Neuro Tutor databases.
+
+``create_tables()`` only creates missing tables; columns and indexes added to
+existing tables are brought in here. Each migration runs once, in order, and
+is recorded in the ``schema_migrations`` table. Migrations must also be safe
+on a fresh database where ``create_tables()`` already built the current schema.
+
+Run at startup (``RUN_MIGRATIONS_ON_STARTUP``) or with
+``python -m app.tools.migrate``.
+"""
+
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.db import engine as default_engine
+
+# Kept out of Base.metadata so create_tables() never implies a schema version
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def upgrade_session_stats(conn: Connection) -> bool:
+    """
+    Add denormalized stats columns to chat_sessions and backfill them.
+
+    Args:
+        conn: Database connection inside a transaction
+
+    Returns:
+        bool: True if the columns were added
+    """
+    columns = {column["name"] for column in inspect(conn).get_columns("chat_sessions")}
+    if "message_count" in columns:
+        return False
+
+    conn.execute(text("ALTER TABLE chat_sessions ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0"))
+    conn.execute(text("ALTER TABLE chat_sessions ADD COLUMN last_message_preview VARCHAR"))
+    conn.execute(text("ALTER TABLE chat_sessions ADD COLUMN last_message_at TIMESTAMP"))
+    conn.execute(text("""
+        UPDATE chat_sessions SET
+            message_count = (
+                SELECT COUNT(*) FROM messages WHERE messages.session_id = chat_sessions.id
+            ),
+            last_message_at = (
+                SELECT MAX(messages.timestamp) FROM messages WHERE messages.session_id = chat_sessions.id
+            ),
+            last_message_preview = (
+                SELECT CASE WHEN LENGTH(m.content) > 50 THEN SUBSTR(m.content, 1, 50) || '...' ELSE m.content END
+                FROM messages m
+                WHERE m.session_id = chat_sessions.id
+                ORDER BY m.timestamp DESC
+                LIMIT 1
+            )
+    """))
+    return True
+
+
+def add_lookup_indexes(conn: Connection) -> None:
+    """
+    Index per-session message reads and the session list ordering.
+
+    Args:
+        conn: Database connection inside a transaction
+    """
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_messages_session_id_timestamp ON messages (session_id, timestamp)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_chat_sessions_updated_at ON chat_sessions (updated_at)"
+    ))
+
+
+# Child tables of chat_sessions as of migration 3, rebuilt on SQLite to add ON DELETE CASCADE
+_CASCADE_TABLES = {
+    "messages": (
+        "id VARCHAR NOT NULL PRIMARY KEY, session_id VARCHAR NOT NULL, "
+        "role VARCHAR NOT NULL, content TEXT NOT NULL, timestamp DATETIME NOT NULL, "
+        "FOREIGN KEY (session_id) REFERENCES chat_sessions (id) ON DELETE CASCADE",
+        "id, session_id, role, content, timestamp",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_messages_id ON messages (id)",
+            "CREATE INDEX IF NOT EXISTS ix_messages_session_id_timestamp ON messages (session_id, timestamp)",
+        ],
+    ),
+    "conversation_summaries": (
+        "session_id VARCHAR NOT NULL PRIMARY KEY, summary TEXT NOT NULL, "
+        "summarized_message_count INTEGER NOT NULL, updated_at DATETIME NOT NULL, "
+        "FOREIGN KEY (session_id) REFERENCES chat_sessions (id) ON DELETE CASCADE",
+        "session_id, summary, summarized_message_count, updated_at",
+        [],
+    ),
+}
+
+
+def cascade_session_deletes(conn: Connection) -> None:
+    """
+    Make foreign keys to chat_sessions delete their rows with the session.
+
+    SQLite cannot alter a constraint, so the child tables are rebuilt; rows
+    whose session no longer exists are dropped on the way. PostgreSQL swaps
+    the constraint in place.
+
+    Args:
+        conn: Database connection inside a transaction
+    """
+    inspector = inspect(conn)
+    for table, (columns, column_names, indexes) in _CASCADE_TABLES.items():
+        if not inspector.has_table(table):
+            continue
+        foreign_keys = [fk for fk in inspector.get_foreign_keys(table) if fk["referred_table"] == "chat_sessions"]
+        if foreign_keys and all((fk.get("options") or {}).get("ondelete", "").upper() == "CASCADE" for fk in foreign_keys):
+            continue
+
+        if conn.dialect.name == "sqlite":
+            conn.execute(text(f"CREATE TABLE {table}_cascade ({columns})"))
+            conn.execute(text(
+                f"INSERT INTO {table}_cascade ({column_names}) SELECT {column_names} FROM {table} "
+                f"WHERE session_id IN (SELECT id FROM chat_sessions)"
+            ))
+            conn.execute(text(f"DROP TABLE {table}"))
+            conn.execute(text(f"ALTER TABLE {table}_cascade RENAME TO {table}"))
+            for statement in indexes:
+                conn.execute(text(statement))
+        else:
+            for fk in foreign_keys:
+                conn.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{fk["name"]}"'))
+            conn.execute(text(
+                f"ALTER TABLE {table} ADD CONSTRAINT {table}_session_id_fkey "
+                f"FOREIGN KEY (session_id) REFERENCES chat_sessions (id) ON DELETE CASCADE"
+            ))
+
+
+def add_message_search(conn: Connection) -> None:
+    """
+    Add a full-text index over message content.
+
+    SQLite: an external-content FTS5 table keyed by the messages rowid, kept
+    in sync by triggers (cascaded deletes fire them too). PostgreSQL: a GIN
+    index on the content's tsvector.
+
+    Args:
+        conn: Database connection inside a transaction
+    """
+    if conn.dialect.name != "sqlite":
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_messages_content_fts "
+            "ON messages USING GIN (to_tsvector('simple', content))"
+        ))
+        return
+
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+        "content, content='messages', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')"
+    ))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts (rowid, content) VALUES (new.rowid, new.content);
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+            INSERT INTO messages_fts (rowid, content) VALUES (new.rowid, new.content);
+        END
+    """))
+    # Index messages written before the table existed
+    conn.execute(text("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')"))
+
+
+def add_session_tenants(conn: Connection) -> None:
+    """
+    Record the owning tenant of each session, for sharding.
+
+    Existing sessions are assigned to the default tenant.
+
+    Args:
+        conn: Database connection inside a transaction
+    """
+    columns = {column["name"] for column in inspect(conn).get_columns("chat_sessions")}
+    if "tenant_id" not in columns:
+        default_tenant = settings.default_tenant.replace("'", "''")
+        conn.execute(text(
+            f"ALTER TABLE chat_sessions ADD COLUMN tenant_id VARCHAR NOT NULL DEFAULT '{default_tenant}'"
+        ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_chat_sessions_tenant_id_updated_at ON chat_sessions (tenant_id, updated_at)"
+    ))
+
+
+def add_session_versions(conn: Connection) -> None:
+    """
+    Add the per-session version behind ETags, and cover it in the tenant index.
+
+    The wider index replaces ``ix_chat_sessions_tenant_id_updated_at``, so the
+    session-list ETag aggregate reads no table rows.
+
+    Args:
+        conn: Database connection inside a transaction
+    """
+    columns = {column["name"] for column in inspect(conn).get_columns("chat_sessions")}
+    if "version" not in columns:
+        conn.execute(text("ALTER TABLE chat_sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_chat_sessions_tenant_id_updated_at"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_chat_sessions_tenant_id_updated_at_version "
+        "ON chat_sessions (tenant_id, updated_at, version)"
+    ))
+
+
+# (version, name, upgrade) in application order; never renumber or remove entries
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], object]]] = [
+    (1, "session_stats", upgrade_session_stats),
+    (2, "lookup_indexes", add_lookup_indexes),
+    (3, "cascade_session_deletes", cascade_session_deletes),
+    (4, "message_search", add_message_search),
+    (5, "session_tenants", add_session_tenants),
+    (6, "session_versions", add_session_versions),
+]
+
+
+def applied_versions(conn: Connection) -> List[int]:
+    """
+    Get the migration versions already applied to a database.
+
+    Args:
+        conn: Database connection
+
+    Returns:
+        List[int]: Applied versions, ascending
+    """
+    if not inspect(conn).has_table("schema_migrations"):
+        return []
+    query = select(schema_migrations.c.version).order_by(schema_migrations.c.version)
+    return list(conn.execute(query).scalars())
+
+
+def apply_migrations(conn: Connection, target: Optional[int] = None) -> List[int]:
+    """
+    Apply pending migrations up to a target version.
+
+    Args:
+        conn: Database connection inside a transaction
+        target: Highest version to apply (all if None)
+
+    Returns:
+        List[int]: Versions applied by this call
+    """
+    done = set(applied_versions(conn))
+    migration_metadata.create_all(conn)
+
+    applied = []
+    for version, name, upgrade in MIGRATIONS:
+        if version in done or (target is not None and version > target):
+            continue
+        upgrade(conn)
+        conn.execute(schema_migrations.insert().values(version=version, name=name, applied_at=datetime.utcnow()))
+        applied.append(version)
+    return applied
+
+
+async def run_migrations(engine: AsyncEngine = default_engine, target: Optional[int] = None) -> List[int]:
+    """
+    Apply all pending schema migrations in one transaction.
+
+    Args:
+        engine: Database engine
+        target: Highest version to apply (all if None)
+
+    Returns:
+        List[int]: Versions applied
+    """
+    async with engine.begin() as conn:
+        applied = await conn.run_sync(apply_migrations, target)
+
+    names = {version: name for version, name, upgrade in MIGRATIONS}
+    for version in applied:
+        print(f"🛠️ Applied migration {version}: {names[version]}")
+    return applied
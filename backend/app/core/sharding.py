@@ -0,0 +1,95 @@
+"""
+Per-tenant database sharding.
+
+Each tenant (school) is mapped to one of N databases by rendezvous (highest
+random weight) hashing on the tenant id, so all of a tenant's sessions live
+on one shard and its writes only contend with other tenants on that shard.
+Adding or removing a shard moves only the tenants whose winning shard
+changed; ``python -m app.tools.rebalance_shards`` moves their data.
+
+Session ids are UUID4s, unique across shards, so sessions can move between
+shards without renaming.
+"""
+
+import hashlib
+from typing import Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+def parse_shard_urls(spec: str) -> Dict[str, str]:
+    """
+    Parse a shard list like ``"s0=sqlite:///./data/s0.db,s1=postgresql://..."``.
+
+    Shard names are the hashing identity: keep them stable when URLs change.
+    Unnamed entries are named ``shard<index>``.
+
+    Args:
+        spec: Comma-separated ``name=url`` (or bare ``url``) entries
+
+    Returns:
+        Dict: Shard name -> database URL, in configuration order
+
+    Raises:
+        ValueError: If a shard name is repeated
+    """
+    shards: Dict[str, str] = {}
+    for index, item in enumerate(part.strip() for part in spec.split(",")):
+        if not item:
+            continue
+        name, separator, url = item.partition("=")
+        if not separator or "://" in name:
+            name, url = f"shard{index}", item
+        name = name.strip()
+        if name in shards:
+            raise ValueError(f"Duplicate shard name: {name}")
+        shards[name] = url.strip()
+    return shards
+
+
+def rendezvous_weight(shard: str, key: str) -> int:
+    """Stable pseudo-random weight of a key on a shard."""
+    digest = hashlib.blake2b(f"{shard}\x00{key}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class ShardRouter:
+    """Routes tenants to shard engines by rendezvous hashing."""
+
+    def __init__(self, shards: Dict[str, AsyncEngine]):
+        if not shards:
+            raise ValueError("At least one shard is required")
+        self.shards = dict(shards)
+
+    @property
+    def names(self) -> List[str]:
+        """Shard names in configuration order."""
+        return list(self.shards)
+
+    @property
+    def engines(self) -> List[AsyncEngine]:
+        """Shard engines in configuration order."""
+        return list(self.shards.values())
+
+    def shard_for(self, tenant_id: str) -> str:
+        """
+        Pick the shard owning a tenant.
+
+        Args:
+            tenant_id: Tenant identifier
+
+        Returns:
+            str: Shard name
+        """
+        if len(self.shards) == 1:
+            return next(iter(self.shards))
+        return max(self.shards, key=lambda name: rendezvous_weight(name, tenant_id))
+
+    def engine_for(self, tenant_id: str) -> AsyncEngine:
+        """Engine of the shard owning a tenant."""
+        return self.shards[self.shard_for(tenant_id)]
+
+    async def dispose(self) -> None:
+        """Close every shard's connection pool."""
+        for engine in self.engines:
+            await engine.dispose()
@@ -0,0 +1,141 @@
+"""
+SQLite performance profile and WAL checkpointing.
+
+In WAL mode readers never block the writer and the writer never blocks
+readers; a busy timeout makes competing writers wait instead of failing with
+``database is locked``. The WAL is folded back into the database by periodic
+passive checkpoints, which never wait on active readers or writers.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def sqlite_pragmas() -> Dict[str, str]:
+    """PRAGMA settings applied to every new SQLite connection, from Settings."""
+    return {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "busy_timeout": str(settings.sqlite_busy_timeout_ms),
+        "cache_size": str(settings.sqlite_cache_size),
+        "mmap_size": str(settings.sqlite_mmap_size),
+        "temp_store": settings.sqlite_temp_store,
+        # Off by default in SQLite; required for ON DELETE CASCADE from sessions to messages
+        "foreign_keys": "on",
+    }
+
+
+def apply_sqlite_profile(engine: AsyncEngine, pragmas: Optional[Dict[str, str]] = None) -> None:
+    """
+    Apply PRAGMA settings on connect for a SQLite engine; other databases are left alone.
+
+    Args:
+        engine: Async engine to configure
+        pragmas: PRAGMA name -> value (defaults to ``sqlite_pragmas()``)
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = pragmas if pragmas is not None else sqlite_pragmas()
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # busy_timeout first, so switching journal mode waits for other connections
+        for name in sorted(pragmas, key=lambda name: name != "busy_timeout"):
+            cursor.execute(f"PRAGMA {name}={pragmas[name]}")
+        cursor.close()
+
+
+def wal_path(engine: AsyncEngine) -> Optional[str]:
+    """Path of the engine's WAL file, or None for non-file databases."""
+    database = engine.url.database
+    if engine.dialect.name != "sqlite" or not database or database == ":memory:":
+        return None
+    return f"{database}-wal"
+
+
+class WalCheckpointer:
+    """Background task running periodic passive WAL checkpoints."""
+
+    def __init__(self, engine: AsyncEngine, interval_seconds: float = 60.0):
+        self.engine = engine
+        self.interval_seconds = interval_seconds
+
+        self.checkpoints = 0
+        self.failures = 0
+        self.last_result: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def checkpoint(self) -> Dict[str, int]:
+        """
+        Run one passive checkpoint.
+
+        Returns:
+            Dict with ``busy`` (1 if it could not finish), ``log_frames``,
+            ``checkpointed_frames`` and ``wal_bytes`` (WAL file size afterwards)
+        """
+        async with self.engine.connect() as conn:
+            busy, log_frames, checkpointed = (
+                await conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)")
+            ).one()
+
+        path = wal_path(self.engine)
+        wal_bytes = os.path.getsize(path) if path and os.path.exists(path) else 0
+        self.checkpoints += 1
+        self.last_result = {
+            "busy": busy,
+            "log_frames": log_frames,
+            "checkpointed_frames": checkpointed,
+            "wal_bytes": wal_bytes,
+        }
+        return self.last_result
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                result = await self.checkpoint()
+                logger.info(
+                    f"🗄️ WAL checkpoint: {result['checkpointed_frames']}/{result['log_frames']} frames, "
+                    f"WAL size {result['wal_bytes'] / 1024:.0f} KiB"
+                )
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"⚠️ WAL checkpoint failed: {str(e)}")
+
+    def start(self) -> None:
+        """Start checkpointing if the engine is a WAL-mode SQLite file database."""
+        if self._task is not None or self.interval_seconds <= 0 or wal_path(self.engine) is None:
+            return
+        if settings.sqlite_journal_mode.lower() != "wal":
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, int]:
+        """Checkpoint counters and the most recent result."""
+        return {"checkpoints": self.checkpoints, "failures": self.failures, **self.last_result}
+
+
+def checkpointer_for(engine: AsyncEngine) -> WalCheckpointer:
+    """Create a WAL checkpointer for an engine from Settings."""
+    return WalCheckpointer(engine, settings.sqlite_checkpoint_interval_seconds)
@@ -8,13 +8,29 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings, get_cors_config
 from app.api import chat
+from app.services.history_cache import history_cache
+from app.services.llm_client import llm_client
+from app.services.versions import etags
+from app.services.archive import archiver_for
+from app.services.retention import sweeper_for
 
 # Import models to ensure they're registered with SQLAlchemy
 from app.models import chat as chat_models
 
-# Import database and create tables after models are loaded
-from app.core.db import create_tables
-create_tables()
+# Database tables are created and migrated in the lifespan, after models are loaded
+from app.core.db import create_tables, shard_router
+from app.core.migrations import run_migrations
+from app.core.sqlite import checkpointer_for
+
+# Background maintenance for each shard: WAL checkpoints, retention and archiving
+maintenance = {
+    name: {
+        "wal": checkpointer_for(shard_engine),
+        "retention": sweeper_for(shard_engine),
+        "archive": archiver_for(shard_engine),
+    }
+    for name, shard_engine in shard_router.shards.items()
+}
 
 
 @asynccontextmanager
@@ -23,9 +39,23 @@ async def lifespan(app: FastAPI):
     # Startup
     print(f"🧠 {settings.app_name} v{settings.app_version} starting up...")
     print(f"🔧 Debug mode: {settings.debug}")
+    for name, shard_engine in shard_router.shards.items():
+        await create_tables(shard_engine)
+        if settings.run_migrations_on_startup:
+            await run_migrations(shard_engine)
+        for task in maintenance[name].values():
+            task.start()
+    if len(shard_router.names) > 1:
+        print(f"🗂️ Sharding tenants over {len(shard_router.names)} databases: {', '.join(shard_router.names)}")
+    await llm_client.startup()
     yield
     # Shutdown
     print("🧠 Neuro Tutor API shutting down...")
+    for tasks in maintenance.values():
+        for task in reversed(list(tasks.values())):
+            await task.stop()
+    await llm_client.aclose()
+    await shard_router.dispose()
 
 
 # Create FastAPI app
@@ -72,6 +102,21 @@ async def health_check():
     }
 
 
+# Runtime stats endpoint
+@app.get("/stats", tags=["health"])
+async def runtime_stats():
+    """Runtime counters for the LLM client (cache, concurrency, provider health), history cache, ETags, and per-shard WAL, retention and archiving."""
+    return {
+        "llm": llm_client.stats(),
+        "history_cache": history_cache.stats(),
+        "etags": etags.stats(),
+        "shards": {
+            name: {label: task.stats() for label, task in tasks.items()}
+            for name, tasks in maintenance.items()
+        }
+    }
+
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -1,5 +1,5 @@
 """SQLAlchemy models for Neuro Tutor database."""
 
-from app.models.chat import ChatSession, MessageModel
+from app.models.chat import ChatSession, ConversationSummary, MessageModel, SessionArchive
 
-__all__ = ["ChatSession", "MessageModel"]
+__all__ = ["ChatSession", "ConversationSummary", "MessageModel", "SessionArchive"]
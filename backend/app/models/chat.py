@@ -5,8 +5,9 @@ Pydantic and SQLAlchemy models for chat functionality.
 from datetime import datetime
 from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
-from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import relationship
+from app.core.config import settings
 from app.core.db import Base
 
 
@@ -37,6 +38,16 @@ class ChatRequest(BaseModel):
     messages: List[Message] = Field(..., description="List of chat messages")
     preferences: Optional[Preferences] = Field(default=None, description="User preferences")
     session_id: Optional[str] = Field(default=None, description="Session identifier")
+    bypass_cache: bool = Field(default=False, description="Skip the LLM response cache for this request")
+
+
+class ClientTurn(BaseModel):
+    """A new user message sent over the chat WebSocket; history stays on the server."""
+    type: Literal["message"] = Field(..., description="Frame type")
+    content: str = Field(..., min_length=1, description="User message content")
+    client_id: Optional[str] = Field(default=None, description="Client-side message id, echoed in the ack")
+    preferences: Optional[Preferences] = Field(default=None, description="Preferences for this and later turns")
+    bypass_cache: bool = Field(default=False, description="Skip the LLM response cache for this turn")
 
 
 class ChatResponse(BaseModel):
@@ -52,31 +63,119 @@ class SessionSummary(BaseModel):
     created_at: datetime = Field(..., description="Session creation time")
     last_updated_at: datetime = Field(..., description="Last message time")
     message_count: int = Field(..., description="Number of messages in session")
+    last_message_preview: Optional[str] = Field(default=None, description="Preview of the last message")
+    last_message_at: Optional[datetime] = Field(default=None, description="Timestamp of the last message")
 
 
 class SessionListResponse(BaseModel):
     """Response model for sessions list endpoint."""
     sessions: List[SessionSummary] = Field(..., description="List of session summaries")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor for the next page, if any")
+
+
+class BulkDeleteRequest(BaseModel):
+    """Request model for deleting many sessions at once."""
+    session_ids: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.bulk_delete_max_sessions,
+        description="Sessions to delete"
+    )
+
+
+class BulkDeleteResponse(BaseModel):
+    """Response model for bulk session deletion."""
+    deleted: int = Field(..., description="Number of sessions deleted")
+
+
+class SearchResult(BaseModel):
+    """A message matching a search, with a highlighted snippet."""
+    message_id: str = Field(..., description="Message identifier")
+    session_id: str = Field(..., description="Session containing the message")
+    session_title: str = Field(..., description="Title of that session")
+    role: Literal["user", "assistant"] = Field(..., description="Message role")
+    timestamp: datetime = Field(..., description="Message timestamp")
+    snippet: str = Field(..., description="Matching excerpt with terms highlighted as **term**")
+    score: float = Field(..., description="Relevance score, higher is better")
+
+
+class SearchResponse(BaseModel):
+    """Response model for message search."""
+    query: str = Field(..., description="Search text")
+    results: List[SearchResult] = Field(..., description="Matches, best first")
+    next_offset: Optional[int] = Field(default=None, description="Offset of the next page, if any")
+
+
+class ExportedSession(BaseModel):
+    """A session line of an NDJSON export; its messages follow it."""
+    type: Literal["session"] = Field(..., description="Line type")
+    id: str = Field(..., description="Session identifier")
+    title: str = Field(..., description="Session title")
+    created_at: datetime = Field(..., description="Creation timestamp")
+    updated_at: datetime = Field(..., description="Last update timestamp")
+    message_count: int = Field(default=0, description="Number of messages")
+    last_message_preview: Optional[str] = Field(default=None, description="Preview of the last message")
+    last_message_at: Optional[datetime] = Field(default=None, description="Timestamp of the last message")
+
+
+class ExportedMessage(BaseModel):
+    """A message line of an NDJSON export."""
+    type: Literal["message"] = Field(..., description="Line type")
+    session_id: str = Field(..., description="Session the message belongs to")
+    id: str = Field(..., description="Message identifier")
+    role: Literal["user", "assistant"] = Field(..., description="Message role")
+    content: str = Field(..., description="Message content")
+    timestamp: datetime = Field(..., description="Message timestamp")
+
+
+class ImportResponse(BaseModel):
+    """Response model for NDJSON bulk import."""
+    sessions: int = Field(..., description="Sessions imported")
+    messages: int = Field(..., description="Messages imported")
+    skipped_sessions: int = Field(..., description="Sessions skipped because their id already exists")
 
 
 class SessionMessagesResponse(BaseModel):
     """Response model for session messages endpoint."""
     session_id: str = Field(..., description="Session identifier")
     messages: List[Message] = Field(..., description="Messages in this session")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor for the next page, if any")
 
 
 # SQLAlchemy Models for Database
 class ChatSession(Base):
     """SQLAlchemy model for chat sessions."""
     __tablename__ = "chat_sessions"
+    __table_args__ = (
+        # Session list is ordered by updated_at (added to existing databases by migration 2)
+        Index("ix_chat_sessions_updated_at", "updated_at"),
+        # Per-tenant session list, its ETag aggregate and rebalancing (migrations 5 and 6)
+        Index("ix_chat_sessions_tenant_id_updated_at_version", "tenant_id", "updated_at", "version"),
+    )
     
     id = Column(String, primary_key=True, index=True)
     title = Column(String, nullable=False)
+    # Owning tenant; decides the shard the session lives on
+    tenant_id = Column(String, default=lambda: settings.default_tenant, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
+    # Denormalized stats, maintained by save_message so listing needs no per-session queries
+    message_count = Column(Integer, default=0, nullable=False)
+    last_message_preview = Column(String, nullable=True)
+    last_message_at = Column(DateTime, nullable=True)
+    # Incremented by every saved turn; the messages ETag is built from it
+    version = Column(Integer, default=0, nullable=False)
+    
     # Relationship with messages
-    messages = relationship("MessageModel", back_populates="session", cascade="all, delete-orphan")
+    # passive_deletes: the database cascades deletes, so the ORM never loads children to delete them
+    messages = relationship("MessageModel", back_populates="session", cascade="all, delete-orphan", passive_deletes=True)
+    
+    # Rolling summary of turns that no longer fit the context window
+    summary = relationship(
+        "ConversationSummary", back_populates="session", uselist=False,
+        cascade="all, delete-orphan", passive_deletes=True
+    )
     
     def __repr__(self):
         return f"<ChatSession(id='{self.id}', title='{self.title}')>"
@@ -85,9 +184,13 @@ class ChatSession(Base):
 class MessageModel(Base):
     """SQLAlchemy model for messages."""
     __tablename__ = "messages"
+    __table_args__ = (
+        # Per-session reads are range scans in timestamp order (added to existing databases by migration 2)
+        Index("ix_messages_session_id_timestamp", "session_id", "timestamp"),
+    )
     
     id = Column(String, primary_key=True, index=True)
-    session_id = Column(String, ForeignKey("chat_sessions.id"), nullable=False)
+    session_id = Column(String, ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False)
     role = Column(String, nullable=False)  # "user" or "assistant"
     content = Column(Text, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -97,3 +200,36 @@ class MessageModel(Base):
     
     def __repr__(self):
         return f"<MessageModel(id='{self.id}', role='{self.role}', session_id='{self.session_id}')>"
+
+
+
+class ConversationSummary(Base):
+    """SQLAlchemy model for a session's rolling conversation summary."""
+    __tablename__ = "conversation_summaries"
+    
+    session_id = Column(String, ForeignKey("chat_sessions.id", ondelete="CASCADE"), primary_key=True)
+    summary = Column(Text, nullable=False)
+    # Number of oldest messages (by timestamp) folded into the summary
+    summarized_message_count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    # Relationship with session
+    session = relationship("ChatSession", back_populates="summary")
+    
+    def __repr__(self):
+        return f"<ConversationSummary(session_id='{self.session_id}', summarized_message_count={self.summarized_message_count})>"
+
+
+class SessionArchive(Base):
+    """SQLAlchemy model for the compressed messages of an inactive session (cold storage)."""
+    __tablename__ = "session_archives"
+    
+    session_id = Column(String, ForeignKey("chat_sessions.id", ondelete="CASCADE"), primary_key=True)
+    # zlib-compressed JSON list of [id, role, content, timestamp]
+    data = Column(LargeBinary, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    raw_bytes = Column(Integer, nullable=False)  # serialized size before compression
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<SessionArchive(session_id='{self.session_id}', message_count={self.message_count})>"
@@ -0,0 +1,276 @@
+"""
+Compressed cold storage for inactive sessions.
+
+Sessions idle longer than ``archive_after_days`` have their messages packed
+into one zlib-compressed blob per session and removed from the hot
+``messages`` table, keeping its indexes and working set small. Session rows
+(titles, stats, previews) stay as they are, so listings are unaffected.
+Reading an archived session rehydrates it back into ``messages``.
+
+Archived messages are not in the search index until rehydrated.
+"""
+
+import asyncio
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, exists, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.core.db import session_for
+from app.models.chat import ChatSession, MessageModel, SessionArchive
+
+logger = logging.getLogger(__name__)
+
+# Message ids per DELETE, well under SQLite's bound-parameter limit
+DELETE_BATCH_SIZE = 500
+
+
+def serialize_messages(messages: List[MessageModel]) -> bytes:
+    """Compact JSON encoding of messages as [id, role, content, timestamp] rows."""
+    rows = [[m.id, m.role, m.content, m.timestamp.isoformat()] for m in messages]
+    return json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def pack_messages(messages: List[MessageModel], level: int = 9) -> bytes:
+    """
+    Serialize and compress a session's messages.
+
+    Args:
+        messages: Messages, oldest first
+        level: zlib compression level
+
+    Returns:
+        bytes: Compressed blob
+    """
+    return zlib.compress(serialize_messages(messages), level)
+
+
+def unpack_messages(session_id: str, data: bytes) -> List[MessageModel]:
+    """
+    Decompress an archive blob into message rows.
+
+    Args:
+        session_id: Session the archive belongs to
+        data: Blob from ``pack_messages``
+
+    Returns:
+        List[MessageModel]: Unsaved messages, oldest first
+    """
+    rows = json.loads(zlib.decompress(data).decode("utf-8"))
+    return [
+        MessageModel(
+            id=message_id,
+            session_id=session_id,
+            role=role,
+            content=content,
+            timestamp=datetime.fromisoformat(timestamp)
+        )
+        for message_id, role, content, timestamp in rows
+    ]
+
+
+async def archive_session(db: AsyncSession, session_id: str) -> Optional[SessionArchive]:
+    """
+    Move a session's messages into a compressed archive, in one transaction.
+
+    Args:
+        db: Database session
+        session_id: Session identifier
+
+    Returns:
+        Optional[SessionArchive]: The archive, or None if there was nothing to archive
+    """
+    if await db.get(SessionArchive, session_id) is not None:
+        return None
+
+    result = await db.execute(
+        select(MessageModel)
+        .where(MessageModel.session_id == session_id)
+        .order_by(MessageModel.timestamp, MessageModel.id)
+    )
+    messages = list(result.scalars())
+    if not messages:
+        return None
+
+    raw = serialize_messages(messages)
+    archive = SessionArchive(
+        session_id=session_id,
+        data=zlib.compress(raw, settings.archive_compression_level),
+        message_count=len(messages),
+        raw_bytes=len(raw),
+        archived_at=datetime.utcnow()
+    )
+    db.add(archive)
+    # Only the packed messages: one saved since they were read stays live
+    message_ids = [message.id for message in messages]
+    for start in range(0, len(message_ids), DELETE_BATCH_SIZE):
+        await db.execute(
+            delete(MessageModel)
+            .where(MessageModel.id.in_(message_ids[start:start + DELETE_BATCH_SIZE]))
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+    for message in messages:
+        db.expunge(message)
+    return archive
+
+
+async def rehydrate_session(db: AsyncSession, session_id: str) -> bool:
+    """
+    Restore an archived session's messages into the messages table.
+
+    Args:
+        db: Database session
+        session_id: Session identifier
+
+    Returns:
+        bool: True if an archive was restored by this call
+    """
+    archive = await db.get(SessionArchive, session_id)
+    if archive is None:
+        return False
+
+    db.add_all(unpack_messages(session_id, archive.data))
+    await db.delete(archive)
+    try:
+        await db.commit()
+    except (IntegrityError, StaleDataError):
+        # A concurrent request rehydrated the same session first
+        await db.rollback()
+        return False
+
+    logger.info(f"📦 Rehydrated {archive.message_count} archived messages for session {session_id}")
+    return True
+
+
+class SessionArchiver:
+    """Archives idle sessions periodically in small batches."""
+
+    def __init__(
+        self,
+        bind: AsyncEngine,
+        archive_after_days: float = 0,
+        batch_size: int = 50,
+        interval_seconds: float = 3600,
+        batch_pause_seconds: float = 0.05
+    ):
+        self.bind = bind
+        self.archive_after_days = archive_after_days
+        self.batch_size = max(1, batch_size)
+        self.interval_seconds = interval_seconds
+        self.batch_pause_seconds = batch_pause_seconds
+
+        self.runs = 0
+        self.archived_sessions = 0
+        self.archived_bytes = 0
+        self.compressed_bytes = 0
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def archive_idle(self, now: Optional[datetime] = None) -> int:
+        """
+        Archive every idle session that still has messages in the hot table.
+
+        Each session is archived in its own short transaction.
+
+        Args:
+            now: Reference time (defaults to the current UTC time)
+
+        Returns:
+            int: Number of sessions archived
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.archive_after_days)
+        total = 0
+        while True:
+            async with session_for(self.bind) as db:
+                result = await db.execute(
+                    select(ChatSession.id)
+                    .where(
+                        ChatSession.updated_at < cutoff,
+                        exists().where(MessageModel.session_id == ChatSession.id),
+                        ~exists().where(SessionArchive.session_id == ChatSession.id)
+                    )
+                    .order_by(ChatSession.updated_at)
+                    .limit(self.batch_size)
+                )
+                session_ids = list(result.scalars())
+                for session_id in session_ids:
+                    archive = await archive_session(db, session_id)
+                    if archive is not None:
+                        total += 1
+                        self.archived_bytes += archive.raw_bytes
+                        self.compressed_bytes += len(archive.data)
+
+            if len(session_ids) < self.batch_size:
+                break
+            # Let queued chat writes take the lock between batches
+            await asyncio.sleep(self.batch_pause_seconds)
+
+        self.runs += 1
+        self.archived_sessions += total
+        return total
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                archived = await self.archive_idle()
+                if archived:
+                    logger.info(f"📦 Archived {archived} sessions idle for {self.archive_after_days} days")
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"⚠️ Session archiving failed: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        """Start archiving if an idle threshold is configured."""
+        if self._task is not None or self.archive_after_days <= 0 or self.interval_seconds <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, int]:
+        """Archiving counters and the achieved compression."""
+        return {
+            "runs": self.runs,
+            "archived_sessions": self.archived_sessions,
+            "archived_bytes": self.archived_bytes,
+            "compressed_bytes": self.compressed_bytes,
+            "failures": self.failures,
+        }
+
+
+# One archiver per shard, started in the app lifespan
+def archiver_for(bind: AsyncEngine) -> SessionArchiver:
+    """
+    Create a session archiver for one database from Settings.
+
+    Args:
+        bind: Engine of the database (one per shard)
+
+    Returns:
+        SessionArchiver: Archiver, not yet started
+    """
+    return SessionArchiver(
+        bind,
+        archive_after_days=settings.archive_after_days,
+        batch_size=settings.archive_batch_size,
+        interval_seconds=settings.archive_interval_seconds,
+        batch_pause_seconds=settings.archive_batch_pause_seconds
+    )
@@ -0,0 +1,175 @@
+"""
+Adaptive outbound concurrency limiting for LLM provider calls.
+
+AIMD: the concurrency limit grows additively while calls succeed and is cut
+multiplicatively when the provider signals overload (429). Excess callers
+queue with a bounded wait, and ``Retry-After`` pauses new calls entirely.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Deque, Dict, Optional
+
+
+class LimiterRejected(Exception):
+    """Raised when a call cannot get a concurrency slot in time."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a ``Retry-After`` header value.
+
+    Args:
+        value: Delay in seconds or an HTTP date
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if absent or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limiter with a bounded wait queue."""
+
+    def __init__(
+        self,
+        initial_limit: int = 16,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        max_queue: int = 200,
+        max_wait_seconds: float = 10.0,
+        decrease_factor: float = 0.5,
+        max_retry_after_seconds: float = 60.0
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.decrease_factor = decrease_factor
+        self.max_retry_after_seconds = max_retry_after_seconds
+
+        self.in_flight = 0
+        self.rejected = 0
+        self.overloads = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+
+    def _can_start(self) -> bool:
+        return self.in_flight < max(1, int(self.limit)) and time.monotonic() >= self._blocked_until
+
+    async def acquire(self) -> None:
+        """
+        Wait for a concurrency slot.
+
+        Raises:
+            LimiterRejected: If the queue is full or no slot frees up in time
+        """
+        if not self._waiters and self._can_start():
+            self.in_flight += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise LimiterRejected("LLM request queue is full")
+
+        deadline = time.monotonic() + self.max_wait_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.rejected += 1
+                raise LimiterRejected("Timed out waiting for an LLM request slot")
+
+            # Sleep until a slot is released or a Retry-After pause ends
+            pause = self._blocked_until - time.monotonic()
+            timeout = min(remaining, pause) if pause > 0 else remaining
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, timeout)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                # Pass on a wake-up this caller may have consumed
+                self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+            if self._can_start():
+                self.in_flight += 1
+                return
+
+    def release(self) -> None:
+        """Return a slot and wake queued callers that can now start."""
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        available = max(1, int(self.limit)) - self.in_flight
+        for waiter in list(self._waiters):
+            if available <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                available -= 1
+
+    def on_success(self) -> None:
+        """Additive increase: roughly +1 to the limit per full window of successes."""
+        self.limit = min(float(self.max_limit), self.limit + 1.0 / max(1.0, self.limit))
+        self._wake()
+
+    def on_overload(self, retry_after: Optional[float] = None) -> None:
+        """
+        Multiplicative decrease after the provider signalled overload.
+
+        Args:
+            retry_after: Seconds the provider asked us to wait, if given
+        """
+        now = time.monotonic()
+        self.overloads += 1
+        # One decrease per burst of 429s from calls that were already in flight
+        if now - self._last_decrease >= 1.0:
+            self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+            self._last_decrease = now
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + min(retry_after, self.max_retry_after_seconds))
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a concurrency slot for the duration of the block."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, float]:
+        """Current limit, usage and queue depth."""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "rejected": self.rejected,
+            "overloads": self.overloads,
+            "paused_for_seconds": round(max(0.0, self._blocked_until - time.monotonic()), 3),
+        }
@@ -0,0 +1,107 @@
+"""
+Token-budget-aware context windowing for long tutoring sessions.
+
+Keeps the system prompt plus the newest turns that fit the model's budget,
+always leaving room for the completion (``default_max_tokens``).
+"""
+
+import math
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.models.chat import Message
+
+# Rough average for English prose with BPE tokenizers
+CHARS_PER_TOKEN = 4
+# Per-message framing overhead in the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a piece of text without a tokenizer.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        int: Estimated number of tokens, including per-message overhead
+    """
+    return MESSAGE_OVERHEAD_TOKENS + math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class ContextWindowBuilder:
+    """Selects the newest messages that fit a per-model token budget."""
+
+    def __init__(
+        self,
+        default_budget: int,
+        model_budgets: Optional[Dict[str, int]] = None,
+        cache_size: int = 10000
+    ):
+        self.default_budget = default_budget
+        self.model_budgets = model_budgets or {}
+        self.cache_size = cache_size
+        self._token_cache: "OrderedDict[str, int]" = OrderedDict()
+
+    def budget_for(self, model: str) -> int:
+        """Total prompt + completion token budget for a model."""
+        return self.model_budgets.get(model, self.default_budget)
+
+    def message_tokens(self, message: Message) -> int:
+        """Estimated tokens for a message, cached by message id."""
+        tokens = self._token_cache.get(message.id)
+        if tokens is not None:
+            self._token_cache.move_to_end(message.id)
+            return tokens
+
+        tokens = estimate_tokens(message.content)
+        self._token_cache[message.id] = tokens
+        if len(self._token_cache) > self.cache_size:
+            self._token_cache.popitem(last=False)
+        return tokens
+
+    def select(
+        self,
+        messages: List[Message],
+        system_prompt: str,
+        model: str,
+        max_tokens: int,
+        summary: Optional[str] = None
+    ) -> List[Message]:
+        """
+        Pick the newest messages that fit alongside the system prompt.
+
+        The latest message is always kept, even if it alone exceeds the budget.
+
+        Args:
+            messages: Conversation history, oldest first
+            system_prompt: System prompt sent ahead of the history
+            model: Model the request is for
+            max_tokens: Tokens reserved for the completion
+            summary: Optional rolling summary sent after the system prompt
+
+        Returns:
+            List[Message]: Suffix of ``messages`` that fits the budget
+        """
+        remaining = self.budget_for(model) - max_tokens - estimate_tokens(system_prompt)
+        if summary:
+            remaining -= estimate_tokens(summary)
+
+        start = len(messages)
+        for index in range(len(messages) - 1, -1, -1):
+            cost = self.message_tokens(messages[index])
+            if cost > remaining and start < len(messages):
+                break
+            remaining -= cost
+            start = index
+
+        return messages[start:]
+
+
+# Global context window builder
+context_window = ContextWindowBuilder(
+    default_budget=settings.context_window_tokens,
+    model_budgets=settings.context_window_model_budgets
+)
@@ -0,0 +1,134 @@
+"""
+Group commit for database writes from concurrent requests.
+
+SQLite allows one writer at a time and each commit pays for an fsync, so
+turn throughput is capped by commits per second. Writes submitted while a
+commit is in flight (or within a short delay) are applied in one session and
+committed together, turning many fsyncs into one.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.core.db import session_for
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+Work = Callable[[AsyncSession], Awaitable[T]]
+
+
+class GroupCommitWriter:
+    """Batches write callbacks from concurrent callers into shared transactions."""
+
+    def __init__(self, bind: AsyncEngine, max_batch: int = 64, max_delay_seconds: float = 0.002):
+        self.bind = bind
+        self.max_batch = max(1, max_batch)
+        self.max_delay_seconds = max_delay_seconds
+
+        self.batches = 0
+        self.writes = 0
+        self.fallbacks = 0
+        self._pending: List[Tuple[Work, asyncio.Future]] = []
+        self._flushing = False
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, work: Work) -> T:
+        """
+        Apply a write in the next group commit.
+
+        Args:
+            work: Coroutine function that stages changes on the given session
+                without committing; its return value is passed back
+
+        Returns:
+            The value returned by ``work`` once its batch has committed
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((work, future))
+        if self._flushing:
+            return await future  # picked up as soon as the running commit finishes
+
+        if len(self._pending) >= self.max_batch or self.max_delay_seconds <= 0:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay_seconds, self._start_flush)
+        return await future
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flushing or not self._pending:
+            return
+
+        batch = self._pending[:self.max_batch]
+        self._pending = self._pending[self.max_batch:]
+        self._flushing = True
+        self._task = asyncio.get_running_loop().create_task(self._flush(batch))
+
+    async def _flush(self, batch: List[Tuple[Work, asyncio.Future]]) -> None:
+        try:
+            try:
+                results = await self._commit(batch)
+            except Exception as e:
+                # One bad write must not fail the rest of the batch: retry each alone
+                self.fallbacks += 1
+                logger.warning(f"⚠️ Group commit of {len(batch)} writes failed, retrying individually: {str(e)}")
+                for item in batch:
+                    work, future = item
+                    try:
+                        result = (await self._commit([item]))[0]
+                    except Exception as item_error:
+                        if not future.done():
+                            future.set_exception(item_error)
+                    else:
+                        if not future.done():
+                            future.set_result(result)
+            else:
+                for (work, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            self._flushing = False
+            # Writes that arrived during this commit go out immediately
+            if self._pending:
+                self._start_flush()
+
+    async def _commit(self, batch: List[Tuple[Work, asyncio.Future]]) -> list:
+        async with session_for(self.bind) as db:
+            results = [await work(db) for work, future in batch]
+            await db.commit()
+        self.batches += 1
+        self.writes += len(batch)
+        return results
+
+
+# One writer per engine, so test overrides and separate databases never share a batch
+_writers: Dict[AsyncEngine, GroupCommitWriter] = {}
+
+
+def writer_for(bind: AsyncEngine) -> GroupCommitWriter:
+    """
+    Get the group-commit writer for an engine.
+
+    Args:
+        bind: Engine of the request's database session (``db.bind``)
+
+    Returns:
+        GroupCommitWriter: Shared writer for that engine
+    """
+    writer = _writers.get(bind)
+    if writer is None:
+        writer = GroupCommitWriter(
+            bind,
+            max_batch=settings.group_commit_max_batch,
+            max_delay_seconds=settings.group_commit_max_delay_ms / 1000
+        )
+        _writers[bind] = writer
+    return writer
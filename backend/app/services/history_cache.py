@@ -0,0 +1,160 @@
+"""
+In-process LRU cache of recent session histories.
+
+Each chat turn needs the whole conversation so far; for an active session the
+previous turn already had it. Histories are kept as ready-to-use ``Message``
+lists, evicted least-recently-used by approximate memory size, and kept
+current by appending each saved turn.
+
+The cache is per process. Callers pass the session's stored message count,
+loaded with the session row anyway, and a history whose length differs (the
+session was written by another worker) is dropped and read again.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.chat import Message
+
+# Rough per-message cost of the Message object, its fields and list slot
+MESSAGE_OVERHEAD_BYTES = 400
+
+
+def estimate_size(messages: List[Message]) -> int:
+    """Approximate memory used by a cached history, in bytes."""
+    return sum(len(message.content.encode("utf-8")) + MESSAGE_OVERHEAD_BYTES for message in messages)
+
+
+class HistoryCache:
+    """Size-bounded LRU of session id -> message history, oldest first."""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+        self._entries: "OrderedDict[str, Tuple[List[Message], int]]" = OrderedDict()
+        self._loading: Dict[str, bool] = {}  # session id -> load still valid
+        self.size_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, session_id: str, message_count: Optional[int] = None) -> Optional[List[Message]]:
+        """
+        Get a cached history.
+
+        Args:
+            session_id: Session identifier
+            message_count: The session's stored message count; a cached
+                history of another length is stale and dropped
+
+        Returns:
+            Optional[List[Message]]: Copy of the history, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        entry = self._entries.get(session_id)
+        if entry is not None and message_count is not None and len(entry[0]) != message_count:
+            self.invalidate(session_id)
+            self.stale += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(session_id)
+        self.hits += 1
+        return list(entry[0])
+
+    def begin_load(self, session_id: str) -> None:
+        """
+        Mark a history as being read from the database.
+
+        Writes for the session until the matching ``put`` make that load stale,
+        so a history read before a concurrent append is never cached.
+        """
+        if self.enabled:
+            self._loading[session_id] = True
+
+    def put(self, session_id: str, messages: List[Message]) -> None:
+        """
+        Cache a full history read from the database.
+
+        Args:
+            session_id: Session identifier
+            messages: Complete history, oldest first
+        """
+        if not self.enabled or not self._loading.pop(session_id, True):
+            return
+        self._store(session_id, list(messages))
+
+    def append(self, session_id: str, messages: List[Message], new_session: bool = False) -> None:
+        """
+        Add newly saved messages to a cached history.
+
+        Args:
+            session_id: Session identifier
+            messages: Saved messages, oldest first
+            new_session: The session was created with these messages, so they
+                are its complete history even if nothing was cached yet
+        """
+        if not self.enabled:
+            return
+        if session_id in self._loading:
+            self._loading[session_id] = False
+
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            self._store(session_id, entry[0] + list(messages))
+        elif new_session:
+            self._store(session_id, list(messages))
+
+    def invalidate(self, session_id: str) -> None:
+        """Drop a session's cached history."""
+        if session_id in self._loading:
+            self._loading[session_id] = False
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self.size_bytes -= entry[1]
+
+    def clear(self) -> None:
+        """Drop every cached history."""
+        for session_id in self._loading:
+            self._loading[session_id] = False
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def _store(self, session_id: str, messages: List[Message]) -> None:
+        size = estimate_size(messages)
+        previous = self._entries.pop(session_id, None)
+        if previous is not None:
+            self.size_bytes -= previous[1]
+        if size > self.max_bytes:
+            return  # too large to cache at all
+
+        self._entries[session_id] = (messages, size)
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size_bytes -= evicted_size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+        }
+
+
+# Global history cache instance
+history_cache = HistoryCache(
+    max_bytes=settings.history_cache_max_bytes,
+    enabled=settings.history_cache_enabled
+)
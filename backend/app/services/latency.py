@@ -0,0 +1,53 @@
+"""
+In-memory per-model latency tracking for OpenRouter calls.
+"""
+
+import math
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class LatencyTracker:
+    """Rolling window of call latencies per model."""
+
+    def __init__(self, window_size: int = 200, min_samples: int = 20):
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, model: str, seconds: float) -> None:
+        """Record the latency of a completed call (or the time a cancelled one had run)."""
+        samples = self._samples.get(model)
+        if samples is None:
+            samples = self._samples[model] = deque(maxlen=self.window_size)
+        samples.append(seconds)
+
+    def percentile(self, model: str, quantile: float) -> Optional[float]:
+        """
+        Latency percentile for a model over the rolling window.
+
+        Args:
+            model: Model name
+            quantile: Quantile between 0 and 1 (e.g. 0.95)
+
+        Returns:
+            Optional[float]: Latency in seconds, or None until ``min_samples`` calls were seen
+        """
+        samples = self._samples.get(model)
+        if not samples or len(samples) < self.min_samples:
+            return None
+
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(quantile * len(ordered)) - 1))
+        return ordered[index]
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Sample count and p50/p95 per model."""
+        return {
+            model: {
+                "samples": len(samples),
+                "p50": self.percentile(model, 0.5),
+                "p95": self.percentile(model, 0.95),
+            }
+            for model, samples in self._samples.items()
+        }
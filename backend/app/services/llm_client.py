@@ -5,16 +5,29 @@ Implements OpenRouter integration for real AI responses.
 Uses Socratic methodology to guide student learning.
 """
 
+import json
 import logging
 import asyncio
+import time
 from datetime import datetime
-from typing import List, Dict
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Optional, Tuple
 import uuid
 import httpx
 
 from app.models.chat import Message, Preferences
 from app.core.config import settings
 from app.core.openrouter_secrets import get_openrouter_api_key, get_default_model
+from app.services.concurrency import AdaptiveConcurrencyLimiter, LimiterRejected, parse_retry_after
+from app.services.context_window import context_window
+from app.services.latency import LatencyTracker
+from app.services.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, counts_as_provider_failure
+from app.services.response_cache import ResponseCache
+
+SUMMARY_PREFIX = "Summary of the earlier part of this tutoring session:"
+
+SUMMARIZER_PROMPT = """You maintain a running summary of a Socratic tutoring session for the tutor's own reference.
+Update the existing summary with the new messages. Record the topic, what the student has already worked out,
+misconceptions that came up, and open questions. Be concise and factual; use at most 200 words."""
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -83,15 +96,152 @@ Style Guidelines:"""
         return "- Focus on verbal explanations unless visual aids are requested"
 
 
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight task."""
+    
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+    
+    async def do(self, key: str, factory: Callable[[], Awaitable[str]]) -> str:
+        """
+        Run ``factory`` once per key among concurrent callers.
+        
+        Callers arriving while a call for the same key is in flight await that
+        call's result instead of starting their own. The shared task is
+        shielded so one caller being cancelled does not cancel the others.
+        
+        Args:
+            key: Identity of the effective request
+            factory: Coroutine function performing the call
+            
+        Returns:
+            str: Result of the shared call
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+    
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+    
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+
 class OpenRouterClient:
     """Client for interacting with OpenRouter API."""
     
     def __init__(self):
         self.api_key = get_openrouter_api_key()
-        self.base_url = "https://openrouter.ai/api/v1"
+        self.base_url = settings.openrouter_base_url.rstrip("/")
         self.default_model = get_default_model()
         self.default_temperature = settings.default_temperature
         self.default_max_tokens = settings.default_max_tokens
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self.response_cache: Optional[ResponseCache] = None
+        if settings.response_cache_enabled:
+            self.response_cache = ResponseCache(
+                max_entries=settings.response_cache_max_entries,
+                ttl_seconds=settings.response_cache_ttl_seconds,
+                sqlite_path=settings.response_cache_sqlite_path
+            )
+        self.single_flight: Optional[SingleFlight] = SingleFlight() if settings.llm_coalesce_requests else None
+        self.latency = LatencyTracker(
+            window_size=settings.latency_window_size,
+            min_samples=settings.latency_min_samples
+        )
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+        self.limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=settings.llm_concurrency_initial,
+            min_limit=settings.llm_concurrency_min,
+            max_limit=settings.llm_concurrency_max,
+            max_queue=settings.llm_queue_max,
+            max_wait_seconds=settings.llm_queue_timeout_seconds,
+            max_retry_after_seconds=settings.llm_max_retry_after_seconds
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.circuit_breaker_failure_threshold,
+            reset_timeout_seconds=settings.circuit_breaker_reset_seconds
+        )
+        self.retry_policy = RetryPolicy(
+            self.breaker,
+            max_attempts=settings.llm_retry_max_attempts,
+            base_delay_seconds=settings.llm_retry_base_delay_seconds,
+            max_delay_seconds=settings.llm_retry_max_delay_seconds
+        )
+    
+    def _build_http_client(self) -> httpx.AsyncClient:
+        """Create the pooled, keep-alive HTTP client used for all OpenRouter calls."""
+        limits = httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry
+        )
+        return httpx.AsyncClient(
+            timeout=settings.http_timeout,
+            limits=limits,
+            http2=settings.http2_enabled
+        )
+    
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """
+        Shared HTTP client.
+        
+        Normally opened by the application lifespan; created lazily when the
+        client is used outside of it (scripts, tests).
+        """
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = self._build_http_client()
+        return self._http_client
+    
+    async def startup(self) -> None:
+        """Open the shared HTTP connection pool."""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = self._build_http_client()
+        logger.info(
+            f"🔌 OpenRouter connection pool ready (max={settings.http_max_connections}, "
+            f"keepalive={settings.http_max_keepalive_connections}, http2={settings.http2_enabled})"
+        )
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP connection pool."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        if self.response_cache is not None:
+            self.response_cache.close()
+    
+    def stats(self) -> Dict:
+        """Runtime counters for monitoring."""
+        return {
+            "response_cache": self.response_cache.stats() if self.response_cache else None,
+            "coalescing": {
+                "coalesced": self.single_flight.coalesced,
+                "in_flight": self.single_flight.in_flight
+            } if self.single_flight else None,
+            "latency": self.latency.stats(),
+            "concurrency": self.limiter.stats(),
+            "circuit_breaker": self.breaker.stats(),
+            "retries": self.retry_policy.retries,
+            "hedging": {
+                "enabled": settings.hedge_enabled,
+                "hedges_sent": self.hedges_sent,
+                "hedge_wins": self.hedge_wins
+            }
+        }
     
     def _validate_api_key(self) -> bool:
         """Validate that API key is properly configured."""
@@ -103,10 +253,17 @@ class OpenRouterClient:
             self.api_key != "your-openrouter-api-key-here"
         )
     
-    def _format_messages_for_api(self, messages: List[Message], system_prompt: str) -> List[Dict[str, str]]:
+    def _format_messages_for_api(self, messages: List[Message], system_prompt: str, summary: Optional[str] = None) -> List[Dict[str, str]]:
         """Format messages for OpenRouter API consumption."""
         formatted_messages = [{"role": "system", "content": system_prompt}]
         
+        # Rolling summary stands in for the turns it replaced
+        if summary:
+            formatted_messages.append({
+                "role": "system",
+                "content": f"{SUMMARY_PREFIX}\n{summary}"
+            })
+        
         for msg in messages:
             formatted_messages.append({
                 "role": msg.role,
@@ -115,14 +272,18 @@ class OpenRouterClient:
         
         return formatted_messages
     
-    async def _call_openrouter_api(self, messages: List[Dict], model: str, temperature: float, max_tokens: int) -> str:
-        """Call OpenRouter API and return response content."""
-        headers = {
+    def _build_headers(self) -> Dict[str, str]:
+        """Build request headers for OpenRouter."""
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "HTTP-Referer": "https://neurotutor.local",
             "X-Title": "NeuroTutor-Dev"
         }
+    
+    async def _call_openrouter_api(self, messages: List[Dict], model: str, temperature: float, max_tokens: int) -> str:
+        """Call OpenRouter API and return response content."""
+        headers = self._build_headers()
         
         payload = {
             "model": model,
@@ -131,23 +292,192 @@ class OpenRouterClient:
             "max_tokens": max_tokens
         }
         
-        async with httpx.AsyncClient(timeout=60) as client:  # Increased timeout
-            response = await client.post(
+        async with self.limiter.slot():
+            # Reuse pooled keep-alive connections instead of a new client per turn
+            started = time.perf_counter()
+            try:
+                response = await self.http_client.post(
+                    f"{self.base_url}/chat/completions",
+                    headers=headers,
+                    json=payload
+                )
+            except asyncio.CancelledError:
+                # A slow call that lost to a hedge still counts, as a lower bound:
+                # a window of only the winners would pull the hedge threshold down
+                self.latency.record(model, time.perf_counter() - started)
+                raise
+            self._observe_status(response)
+            response.raise_for_status()
+            data = response.json()
+            self.latency.record(model, time.perf_counter() - started)
+        
+        # CONSOLE LOG: Log OpenRouter response for debugging
+        response_content = data["choices"][0]["message"]["content"]
+        logger.info(f"🎯 OPENROUTER RESPONSE: {response_content[:100]}...")
+        print(f"🎯 OPENROUTER API RESPONSE: {response_content}")
+        
+        return response_content
+    
+    def _observe_status(self, response: httpx.Response) -> None:
+        """Feed the provider's response status into the adaptive limiter."""
+        if response.status_code == 429:
+            self.limiter.on_overload(parse_retry_after(response.headers.get("Retry-After")))
+        elif response.is_success:
+            self.limiter.on_success()
+    
+    async def _stream_openrouter_api(self, messages: List[Dict], model: str, temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        """Call OpenRouter API with streaming enabled and yield content tokens as they arrive."""
+        headers = self._build_headers()
+        
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+        
+        async with self.limiter.slot():
+            async with self.http_client.stream(
+                "POST",
                 f"{self.base_url}/chat/completions",
                 headers=headers,
                 json=payload
-            )
-            response.raise_for_status()
-            data = response.json()
+            ) as response:
+                self._observe_status(response)
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    # SSE comments (": OPENROUTER PROCESSING") and blank keep-alives carry no data
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    choices = chunk.get("choices") or []
+                    if not choices:
+                        continue
+                    token = (choices[0].get("delta") or {}).get("content")
+                    if token:
+                        yield token
+    
+    async def _complete(self, messages: List[Dict], model: str, temperature: float, max_tokens: int, use_cache: bool = True) -> str:
+        """
+        Return completion content for a formatted request.
+        
+        Repeated requests are served from the response cache, and identical
+        concurrent requests share a single upstream call.
+        """
+        request_key = ResponseCache.make_key(messages, model, temperature, max_tokens)
+        caching = use_cache and self.response_cache is not None
+        
+        if caching:
+            cached = await self.response_cache.get(request_key)
+            if cached is not None:
+                logger.info("⚡ Serving response from cache")
+                return cached
+        
+        async def fetch() -> str:
+            return await self._call_with_hedging(messages, model, temperature, max_tokens)
+        
+        if self.single_flight is not None:
+            response_content = await self.single_flight.do(request_key, fetch)
+        else:
+            response_content = await fetch()
+        
+        if caching:
+            await self.response_cache.set(request_key, response_content)
+        return response_content
+    
+    async def _call_with_retries(self, messages: List[Dict], model: str, temperature: float, max_tokens: int) -> str:
+        """Call one model, retrying transient failures unless the circuit breaker is open."""
+        return await self.retry_policy.call(
+            lambda: self._call_openrouter_api(messages, model, temperature, max_tokens)
+        )
+    
+    def _hedge_delay(self, model: str) -> float:
+        """Seconds to wait on the primary model before hedging, from its rolling latency."""
+        observed = self.latency.percentile(model, settings.hedge_percentile)
+        if observed is None:
+            return settings.hedge_initial_delay_seconds
+        return min(settings.hedge_max_delay_seconds, max(settings.hedge_min_delay_seconds, observed))
+    
+    async def _call_with_hedging(self, messages: List[Dict], model: str, temperature: float, max_tokens: int) -> str:
+        """
+        Call the primary model, hedging to the secondary model when it is slow.
+        
+        If the primary has not answered within its dynamic threshold (or fails
+        outright), the same request goes to ``hedge_secondary_model``. The first
+        successful answer wins and the other call is cancelled.
+        """
+        secondary = settings.hedge_secondary_model
+        if not settings.hedge_enabled or not secondary or secondary == model:
+            return await self._call_with_retries(messages, model, temperature, max_tokens)
+        
+        primary = asyncio.ensure_future(self._call_with_retries(messages, model, temperature, max_tokens))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_delay(model))
+            if primary in done and primary.exception() is None:
+                return primary.result()
             
-            # CONSOLE LOG: Log OpenRouter response for debugging
-            response_content = data["choices"][0]["message"]["content"]
-            logger.info(f"🎯 OPENROUTER RESPONSE: {response_content[:100]}...")
-            print(f"🎯 OPENROUTER API RESPONSE: {response_content}")
+            logger.info(f"🏁 Hedging request from {model} to {secondary}")
+            self.hedges_sent += 1
+            backup = asyncio.ensure_future(self._call_with_retries(messages, secondary, temperature, max_tokens))
+            tasks.append(backup)
             
-            return response_content
+            pending = {task for task in tasks if not task.done()}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedge_wins += 1
+                        return task.result()
+            
+            # Both calls failed: surface the primary's error
+            raise primary.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
     
-    async def generate_response(self, messages: List[Message], preferences: Preferences, session_id: str = None):
+    def _prepare_request(
+        self,
+        messages: List[Message],
+        preferences: Optional[Preferences],
+        summary: Optional[str] = None
+    ) -> Tuple[List[Dict[str, str]], str, float]:
+        """Build formatted API messages, model and temperature for a conversation."""
+        # Use default preferences if not provided
+        if not preferences:
+            preferences = Preferences()
+        
+        # Build Socratic system prompt
+        system_prompt = SocraticPromptBuilder.build_system_prompt(preferences)
+        
+        # Determine model and parameters
+        model = getattr(preferences, 'model', self.default_model) or self.default_model
+        temperature = getattr(preferences, 'temperature', self.default_temperature) or self.default_temperature
+        
+        # Keep only the newest turns that fit the model's token budget
+        window = context_window.select(messages, system_prompt, model, self.default_max_tokens, summary=summary)
+        if len(window) < len(messages):
+            logger.info(f"✂️ Context window kept {len(window)} of {len(messages)} messages")
+        
+        # Format messages for API
+        formatted_messages = self._format_messages_for_api(window, system_prompt, summary)
+        
+        return formatted_messages, model, temperature
+    
+    async def generate_response(
+        self,
+        messages: List[Message],
+        preferences: Preferences,
+        session_id: str = None,
+        use_cache: bool = True,
+        summary: Optional[str] = None
+    ):
         """
         Generate a Socratic response using OpenRouter API.
         
@@ -155,6 +485,8 @@ class OpenRouterClient:
             messages: List of previous messages in the conversation
             preferences: User preferences for response style
             session_id: Optional session identifier
+            use_cache: Whether the response cache may serve or store this request
+            summary: Rolling summary of turns older than ``messages``
             
         Returns:
             Dict containing reply_message and session_id
@@ -165,29 +497,18 @@ class OpenRouterClient:
                 logger.warning("OpenRouter API key not properly configured, using fallback")
                 return self._create_fallback_response("Please configure your OpenRouter API key to use AI tutoring.", session_id)
             
-            # Use default preferences if not provided
-            if not preferences:
-                preferences = Preferences()
-            
-            # Build Socratic system prompt
-            system_prompt = SocraticPromptBuilder.build_system_prompt(preferences)
-            
-            # Format messages for API
-            formatted_messages = self._format_messages_for_api(messages, system_prompt)
-            
-            # Determine model and parameters
-            model = getattr(preferences, 'model', self.default_model) or self.default_model
-            temperature = getattr(preferences, 'temperature', self.default_temperature) or self.default_temperature
+            formatted_messages, model, temperature = self._prepare_request(messages, preferences, summary)
             
             logger.info(f"🚀 Generating response using OpenRouter with model {model}")
             print(f"🚀 CALLING OPENROUTER API WITH MODEL: {model}")
             
-            # Call OpenRouter API
-            response_content = await self._call_openrouter_api(
+            # Call OpenRouter API (or the response cache)
+            response_content = await self._complete(
                 formatted_messages, 
                 model, 
                 temperature, 
-                self.default_max_tokens
+                self.default_max_tokens,
+                use_cache=use_cache
             )
             
             # Create response message
@@ -206,6 +527,12 @@ class OpenRouterClient:
                 "session_id": session_id or str(uuid.uuid4())
             }
             
+        except CircuitOpenError:
+            logger.warning("OpenRouter circuit open, failing fast with fallback")
+            return self._create_fallback_response("The AI service is having a hiccup right now. Let's pause for a moment and try again shortly.", session_id)
+        except LimiterRejected as e:
+            logger.warning(f"OpenRouter request shed by concurrency limiter: {str(e)}")
+            return self._create_fallback_response("Lots of students are asking questions right now. Give me a moment and ask again?", session_id)
         except httpx.HTTPStatusError as e:
             logger.error(f"OpenRouter HTTP error: {e.response.status_code} - {e.response.text}")
             return self._create_fallback_response("I'm having trouble connecting to the AI service. Let me help you with a different approach.", session_id)
@@ -216,6 +543,123 @@ class OpenRouterClient:
             logger.error(f"Error generating response: {str(e)}")
             return self._create_fallback_response("I'm experiencing technical difficulties. How can I help you with a simpler question?", session_id)
     
+    async def stream_response(
+        self,
+        messages: List[Message],
+        preferences: Preferences,
+        use_cache: bool = True,
+        summary: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a Socratic response from OpenRouter token by token.
+        
+        Falls back to a single canned chunk when the API is unavailable
+        before any token was produced. A cached response is sent as one chunk.
+        
+        Args:
+            messages: List of previous messages in the conversation
+            preferences: User preferences for response style
+            use_cache: Whether the response cache may serve or store this request
+            summary: Rolling summary of turns older than ``messages``
+            
+        Yields:
+            str: Response content chunks in arrival order
+        """
+        if not self._validate_api_key():
+            logger.warning("OpenRouter API key not properly configured, using fallback")
+            yield "Please configure your OpenRouter API key to use AI tutoring."
+            return
+        
+        formatted_messages, model, temperature = self._prepare_request(messages, preferences, summary)
+        logger.info(f"🚀 Streaming response using OpenRouter with model {model}")
+        
+        cache_key = None
+        if use_cache and self.response_cache is not None:
+            cache_key = ResponseCache.make_key(formatted_messages, model, temperature, self.default_max_tokens)
+            cached = await self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("⚡ Serving streamed response from cache")
+                yield cached
+                return
+        
+        produced = False
+        tokens = []
+        try:
+            self.breaker.before_call()
+            outcome_recorded = False
+            try:
+                async for token in self._stream_openrouter_api(formatted_messages, model, temperature, self.default_max_tokens):
+                    produced = True
+                    tokens.append(token)
+                    yield token
+                self.breaker.record_success()
+                outcome_recorded = True
+            except Exception as e:
+                self.breaker.record_failure(counts_as_provider_failure(e))
+                outcome_recorded = True
+                raise
+            finally:
+                if not outcome_recorded:
+                    # Client disconnected (GeneratorExit) or task cancelled: not a provider
+                    # failure, but a half-open probe must still release its slot
+                    self.breaker.record_failure(provider_failure=False)
+            if cache_key is not None and tokens:
+                await self.response_cache.set(cache_key, "".join(tokens))
+        except CircuitOpenError:
+            logger.warning("OpenRouter circuit open, failing fast with fallback")
+            if not produced:
+                yield "The AI service is having a hiccup right now. Let's pause for a moment and try again shortly."
+        except LimiterRejected as e:
+            logger.warning(f"OpenRouter stream shed by concurrency limiter: {str(e)}")
+            if not produced:
+                yield "Lots of students are asking questions right now. Give me a moment and ask again?"
+        except httpx.HTTPStatusError as e:
+            logger.error(f"OpenRouter HTTP error while streaming: {e.response.status_code}")
+            if not produced:
+                yield "I'm having trouble connecting to the AI service. Let me help you with a different approach."
+        except httpx.TimeoutException:
+            logger.error("OpenRouter API timeout while streaming")
+            if not produced:
+                yield "The connection timed out. Let's try a more focused question."
+        except Exception as e:
+            logger.error(f"Error streaming response: {str(e)}")
+            if not produced:
+                yield "I'm experiencing technical difficulties. How can I help you with a simpler question?"
+    
+    async def summarize_conversation(self, previous_summary: Optional[str], messages: List[Message]) -> Optional[str]:
+        """
+        Fold new messages into a session's rolling summary.
+        
+        Args:
+            previous_summary: Current summary, if any
+            messages: Messages not yet covered by the summary, oldest first
+            
+        Returns:
+            Optional[str]: Updated summary, or None if the API is unavailable
+        """
+        if not self._validate_api_key():
+            return None
+        
+        transcript = "\n".join(f"{msg.role.upper()}: {msg.content}" for msg in messages)
+        formatted_messages = [
+            {"role": "system", "content": SUMMARIZER_PROMPT},
+            {
+                "role": "user",
+                "content": f"Existing summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}"
+            }
+        ]
+        
+        try:
+            return await self._complete(
+                formatted_messages,
+                self.default_model,
+                0.2,
+                settings.summary_max_tokens
+            )
+        except Exception as e:
+            logger.error(f"Error summarizing conversation: {str(e)}")
+            return None
+    
     def _create_fallback_response(self, message: str, session_id: str) -> Dict:
         """Create a fallback response when API calls fail."""
         fallback_message = Message(
@@ -235,7 +679,13 @@ class OpenRouterClient:
 llm_client = OpenRouterClient()
 
 
-async def generate_response(messages: List[Message], preferences: Preferences = None, session_id: str = None):
+async def generate_response(
+    messages: List[Message],
+    preferences: Preferences = None,
+    session_id: str = None,
+    use_cache: bool = True,
+    summary: Optional[str] = None
+):
     """
     Generate a reply to user's message using Socratic methodology with OpenRouter.
     
@@ -243,11 +693,35 @@ async def generate_response(messages: List[Message], preferences: Preferences =
         messages: List of previous messages in the conversation
         preferences: User preferences for response style
         session_id: Optional session identifier
+        use_cache: Whether the response cache may serve or store this request
+        summary: Rolling summary of turns older than ``messages``
         
     Returns:
         Dict containing reply_message and session_id
     """
-    return await llm_client.generate_response(messages, preferences, session_id)
+    return await llm_client.generate_response(messages, preferences, session_id, use_cache=use_cache, summary=summary)
+
+
+async def stream_response(
+    messages: List[Message],
+    preferences: Preferences = None,
+    use_cache: bool = True,
+    summary: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Stream a reply to user's message token by token.
+    
+    Args:
+        messages: List of previous messages in the conversation
+        preferences: User preferences for response style
+        use_cache: Whether the response cache may serve or store this request
+        summary: Rolling summary of turns older than ``messages``
+        
+    Yields:
+        str: Response content chunks
+    """
+    async for token in llm_client.stream_response(messages, preferences, use_cache=use_cache, summary=summary):
+        yield token
 
 
 def create_message(role: str, content: str) -> Message:
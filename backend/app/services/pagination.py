@@ -0,0 +1,47 @@
+"""
+Opaque keyset-pagination cursors.
+
+A cursor encodes the sort key of the last row on a page, e.g.
+(updated_at, id) for sessions or (timestamp, id) for messages.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(position: datetime, row_id: str) -> str:
+    """
+    Encode a keyset position as an opaque URL-safe cursor.
+
+    Args:
+        position: Timestamp sort key of the last row returned
+        row_id: Identifier of the last row returned (tie-breaker)
+
+    Returns:
+        str: Opaque cursor
+    """
+    raw = json.dumps([position.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Args:
+        cursor: Opaque cursor
+
+    Returns:
+        Tuple of the timestamp sort key and row id
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(position), str(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,183 @@
+"""
+Retry and circuit-breaker policies for LLM provider calls.
+
+Transient failures are retried a bounded number of times with
+decorrelated-jitter backoff. Repeated failures open a circuit breaker so
+requests fail fast while the provider is down instead of each waiting out
+the full timeout.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, TypeVar
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Upstream statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the circuit breaker is open."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Whether a failed call is safe and worthwhile to retry.
+
+    Read timeouts are not retried: the request already waited the full
+    timeout, and retrying would multiply the worst case.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError))
+
+
+def counts_as_provider_failure(exc: BaseException) -> bool:
+    """Whether a failed call indicates the provider itself is unhealthy."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, (httpx.TimeoutException, httpx.TransportError))
+
+
+def decorrelated_jitter(previous: float, base: float, cap: float) -> float:
+    """Next backoff delay using the decorrelated-jitter scheme."""
+    return min(cap, random.uniform(base, max(base, previous * 3)))
+
+
+class CircuitBreaker:
+    """Closed / open / half-open circuit breaker for one provider."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self) -> None:
+        """
+        Admit or refuse a call.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with a probe running
+        """
+        if self.state == self.CLOSED:
+            return
+
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout_seconds:
+                self.rejected += 1
+                raise CircuitOpenError("LLM provider circuit is open")
+            self.state = self.HALF_OPEN
+
+        # Half-open: let exactly one probe through
+        if self._probe_in_flight:
+            self.rejected += 1
+            raise CircuitOpenError("LLM provider circuit is half-open")
+        self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful call."""
+        if self.state != self.CLOSED:
+            logger.info("🟢 LLM provider circuit closed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, provider_failure: bool = True) -> None:
+        """
+        Count a failed call, opening the breaker past the threshold.
+
+        Args:
+            provider_failure: False for failures that say nothing about provider health
+        """
+        self._probe_in_flight = False
+        if not provider_failure:
+            # A half-open breaker stays half-open and probes again on the next call
+            return
+
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(f"🔴 LLM provider circuit opened after {self.consecutive_failures} failures")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, object]:
+        """Breaker state and counters."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class RetryPolicy:
+    """Bounded retries with decorrelated-jitter backoff, guarded by a circuit breaker."""
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        max_attempts: int = 3,
+        base_delay_seconds: float = 0.25,
+        max_delay_seconds: float = 4.0
+    ):
+        self.breaker = breaker
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.retries = 0
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``func`` with retries for transient failures.
+
+        Args:
+            func: Coroutine function performing one attempt
+
+        Returns:
+            Result of the first successful attempt
+
+        Raises:
+            CircuitOpenError: If the breaker refuses the call
+            Exception: The last attempt's error once retries are exhausted
+        """
+        delay = self.base_delay_seconds
+        attempt = 1
+        while True:
+            self.breaker.before_call()
+            try:
+                result = await func()
+            except asyncio.CancelledError:
+                # Losing a hedge race is not a provider failure
+                self.breaker.record_failure(provider_failure=False)
+                raise
+            except Exception as exc:
+                self.breaker.record_failure(counts_as_provider_failure(exc))
+                if attempt >= self.max_attempts or not is_retryable(exc):
+                    raise
+                delay = decorrelated_jitter(delay, self.base_delay_seconds, self.max_delay_seconds)
+                logger.info(f"🔁 Retrying LLM call in {delay:.2f}s after {type(exc).__name__} (attempt {attempt})")
+                self.retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
@@ -0,0 +1,148 @@
+"""
+Exact-match response cache for LLM completions.
+
+Two tiers: an in-memory LRU with TTL, and an optional SQLite-backed tier
+that survives restarts. Keys are hashes of the full effective request
+(system prompt, formatted history, model, temperature, max_tokens).
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Two-tier LRU/TTL cache of completion content keyed by request hash."""
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600, sqlite_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_path = sqlite_path or None
+
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(messages: List[Dict[str, str]], model: str, temperature: float, max_tokens: int) -> str:
+        """
+        Build a cache key for a completion request.
+
+        Args:
+            messages: Formatted API messages, system prompt first
+            model: Model name
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+
+        Returns:
+            str: SHA-256 hex digest of the request
+        """
+        raw = json.dumps(
+            {"messages": messages, "model": model, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return cached content for a key, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        if self.sqlite_path:
+            value = await asyncio.to_thread(self._persistent_get, key)
+            if value is not None:
+                self._remember(key, value)
+                self.persistent_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        """Store content for a key in every enabled tier."""
+        self._remember(key, value)
+        if self.sqlite_path:
+            await asyncio.to_thread(self._persistent_set, key, value)
+
+    def _remember(self, key: str, value: str) -> None:
+        """Insert into the in-memory LRU, evicting the least recently used entries."""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the persistent tier on first use."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.sqlite_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM llm_response_cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+        return self._conn
+
+    def _persistent_get(self, key: str) -> Optional[str]:
+        with self._conn_lock:
+            row = self._connection().execute(
+                "SELECT value FROM llm_response_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def _persistent_set(self, key: str, value: str) -> None:
+        with self._conn_lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl_seconds)
+            )
+            conn.commit()
+
+    def clear(self) -> None:
+        """Drop every cached entry from both tiers."""
+        self._entries.clear()
+        if self.sqlite_path:
+            with self._conn_lock:
+                conn = self._connection()
+                conn.execute("DELETE FROM llm_response_cache")
+                conn.commit()
+
+    def close(self) -> None:
+        """Close the persistent tier connection."""
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size."""
+        return {
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,132 @@
+"""
+Background retention sweeper for old chat sessions.
+
+Sessions not updated for ``retention_days`` are deleted in small batches,
+one short transaction each, with a pause between batches so chat writes
+never wait long for the write lock. Messages and summaries go with their
+session via ``ON DELETE CASCADE``.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.db import session_for
+from app.models.chat import ChatSession
+from app.services.sessions import delete_sessions
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionSweeper:
+    """Deletes expired sessions periodically in small batches."""
+
+    def __init__(
+        self,
+        bind: AsyncEngine,
+        max_age_days: float = 0,
+        batch_size: int = 100,
+        interval_seconds: float = 3600,
+        batch_pause_seconds: float = 0.05
+    ):
+        self.bind = bind
+        self.max_age_days = max_age_days
+        self.batch_size = max(1, batch_size)
+        self.interval_seconds = interval_seconds
+        self.batch_pause_seconds = batch_pause_seconds
+
+        self.sweeps = 0
+        self.deleted = 0
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep(self, now: Optional[datetime] = None) -> int:
+        """
+        Delete every session older than the retention age, one batch per transaction.
+
+        Args:
+            now: Reference time (defaults to the current UTC time)
+
+        Returns:
+            int: Number of sessions deleted
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.max_age_days)
+        total = 0
+        while True:
+            async with session_for(self.bind) as db:
+                result = await db.execute(
+                    select(ChatSession.id)
+                    .where(ChatSession.updated_at < cutoff)
+                    .order_by(ChatSession.updated_at)
+                    .limit(self.batch_size)
+                )
+                session_ids = list(result.scalars())
+                if not session_ids:
+                    break
+                total += await delete_sessions(db, session_ids, all_tenants=True)
+
+            if len(session_ids) < self.batch_size:
+                break
+            # Let queued chat writes take the lock between batches
+            await asyncio.sleep(self.batch_pause_seconds)
+
+        self.sweeps += 1
+        self.deleted += total
+        return total
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                deleted = await self.sweep()
+                if deleted:
+                    logger.info(f"🧹 Retention sweep deleted {deleted} sessions older than {self.max_age_days} days")
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"⚠️ Retention sweep failed: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        """Start sweeping if a retention age is configured."""
+        if self._task is not None or self.max_age_days <= 0 or self.interval_seconds <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, int]:
+        """Sweep counters."""
+        return {"sweeps": self.sweeps, "deleted": self.deleted, "failures": self.failures}
+
+
+# One sweeper per shard, started in the app lifespan
+def sweeper_for(bind: AsyncEngine) -> RetentionSweeper:
+    """
+    Create a retention sweeper for one database from Settings.
+
+    Args:
+        bind: Engine of the database (one per shard)
+
+    Returns:
+        RetentionSweeper: Sweeper, not yet started
+    """
+    return RetentionSweeper(
+        bind,
+        max_age_days=settings.retention_days,
+        batch_size=settings.retention_batch_size,
+        interval_seconds=settings.retention_interval_seconds,
+        batch_pause_seconds=settings.retention_batch_pause_seconds
+    )
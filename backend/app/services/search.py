@@ -0,0 +1,125 @@
+"""
+Full-text search over tutoring history.
+
+SQLite uses the ``messages_fts`` FTS5 index (BM25 ranking, highlighted
+snippets); PostgreSQL uses ``to_tsvector`` with ``ts_rank``. Both indexes are
+created by migration 4 and kept in sync by the database.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import DateTime, Float, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.db import tenant_of
+
+# Snippet highlight markers (Markdown bold, rendered by the chat UI)
+HIGHLIGHT_START = "**"
+HIGHLIGHT_END = "**"
+SNIPPET_TOKENS = 16
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+_SQLITE_SEARCH = f"""
+    SELECT m.id AS message_id, m.session_id, s.title AS session_title, m.role, m.timestamp,
+           snippet(messages_fts, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', {SNIPPET_TOKENS}) AS snippet,
+           -bm25(messages_fts) AS score
+    FROM messages_fts
+    JOIN messages m ON m.rowid = messages_fts.rowid
+    JOIN chat_sessions s ON s.id = m.session_id
+    WHERE messages_fts MATCH :query AND s.tenant_id = :tenant_id {{session_filter}}
+    ORDER BY bm25(messages_fts), m.timestamp DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+_POSTGRES_SEARCH = f"""
+    SELECT m.id AS message_id, m.session_id, s.title AS session_title, m.role, m.timestamp,
+           ts_headline('simple', m.content, q.query,
+                       'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords={SNIPPET_TOKENS}, MinWords=5') AS snippet,
+           ts_rank(to_tsvector('simple', m.content), q.query) AS score
+    FROM messages m
+    JOIN chat_sessions s ON s.id = m.session_id,
+         plainto_tsquery('simple', :query) AS q(query)
+    WHERE to_tsvector('simple', m.content) @@ q.query AND s.tenant_id = :tenant_id {{session_filter}}
+    ORDER BY score DESC, m.timestamp DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 query matching all of its words.
+
+    Each word is quoted so FTS5 operators and punctuation in the input are
+    taken literally; the last word also matches as a prefix, for search-as-you-type.
+
+    Args:
+        query: User search text
+
+    Returns:
+        str: FTS5 MATCH expression, empty if the text has no words
+    """
+    words = _TOKEN.findall(query)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+async def search_messages(
+    db: AsyncSession,
+    query: str,
+    limit: int,
+    offset: int = 0,
+    session_id: Optional[str] = None
+) -> List[Dict]:
+    """
+    Search the tenant's message content, best matches first.
+
+    Args:
+        db: Database session
+        query: User search text
+        limit: Maximum number of results
+        offset: Number of results to skip (pagination)
+        session_id: Restrict the search to one session
+
+    Returns:
+        List of dicts with message_id, session_id, session_title, role,
+        timestamp, snippet and score
+    """
+    params = {"limit": limit, "offset": offset, "tenant_id": tenant_of(db)}
+    session_filter = ""
+    if session_id is not None:
+        session_filter = "AND m.session_id = :session_id"
+        params["session_id"] = session_id
+
+    if db.bind.dialect.name == "sqlite":
+        params["query"] = build_match_query(query)
+        if not params["query"]:
+            return []
+        sql = _SQLITE_SEARCH.format(session_filter=session_filter)
+    else:
+        params["query"] = query
+        sql = _POSTGRES_SEARCH.format(session_filter=session_filter)
+
+    result = await db.execute(text(sql).columns(timestamp=DateTime, score=Float), params)
+    return [dict(row) for row in result.mappings()]
+
+
+async def rebuild_search_index(conn: AsyncConnection) -> None:
+    """
+    Rebuild the full-text index from the messages table.
+
+    Needed after bulk loads that bypassed the triggers, or after ``VACUUM``
+    (which may renumber the rowids the SQLite index is keyed by).
+
+    Args:
+        conn: Database connection inside a transaction
+    """
+    if conn.dialect.name == "sqlite":
+        await conn.execute(text("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')"))
+        await conn.execute(text("INSERT INTO messages_fts (messages_fts) VALUES ('optimize')"))
+    else:
+        await conn.execute(text("REINDEX INDEX ix_messages_content_fts"))
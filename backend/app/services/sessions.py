@@ -3,72 +3,150 @@ Database-backed session management for Neuro Tutor.
 """
 
 import uuid
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, delete, desc, or_, select, update
 
-from app.models.chat import ChatSession, MessageModel
-from app.core.db import get_db
+from app.models.chat import ChatSession, Message, MessageModel
+from app.core.config import settings
+from app.core.db import get_db, tenant_of
+from app.services.archive import rehydrate_session
+from app.services.group_commit import writer_for
+from app.services.history_cache import history_cache
 
+PREVIEW_LENGTH = 50
 
-def create_session(db: Session, title: Optional[str] = None) -> ChatSession:
+
+def make_preview(content: str, max_length: int = PREVIEW_LENGTH) -> str:
+    """Truncate message content for session list previews."""
+    if len(content) > max_length:
+        return content[:max_length] + "..."
+    return content
+
+
+def to_message(row: MessageModel) -> Message:
+    """Convert a message row to the API/LLM message format."""
+    return Message(id=row.id, role=row.role, content=row.content, timestamp=row.timestamp)
+
+
+def make_session(title: Optional[str] = None, tenant_id: Optional[str] = None) -> ChatSession:
     """
-    Create a new chat session.
+    Build a new, unsaved chat session.
     
     Args:
-        db: Database session
         title: Optional session title
+        tenant_id: Owning tenant (defaults to ``DEFAULT_TENANT``)
         
     Returns:
-        ChatSession: Created session
+        ChatSession: Session not yet added to any database session
     """
     session_id = str(uuid.uuid4())
     if not title:
         title = f"Chat {datetime.now().strftime('%Y-%m-%d %H:%M')}"
     
-    db_session = ChatSession(
+    return ChatSession(
         id=session_id,
         title=title,
+        tenant_id=tenant_id or settings.default_tenant,
         created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
+        updated_at=datetime.utcnow(),
+        message_count=0
     )
+
+
+def make_message(session_id: str, role: str, content: str) -> MessageModel:
+    """
+    Build a new, unsaved message timestamped now.
+    
+    Args:
+        session_id: Session identifier
+        role: Message role ("user" or "assistant")
+        content: Message content
+        
+    Returns:
+        MessageModel: Message not yet added to any database session
+    """
+    return MessageModel(
+        id=str(uuid.uuid4()),
+        session_id=session_id,
+        role=role,
+        content=content,
+        timestamp=datetime.utcnow()
+    )
+
+
+async def create_session(db: AsyncSession, title: Optional[str] = None) -> ChatSession:
+    """
+    Create a new chat session.
+    
+    Args:
+        db: Database session
+        title: Optional session title
+        
+    Returns:
+        ChatSession: Created session
+    """
+    db_session = make_session(title, tenant_of(db))
     
     db.add(db_session)
-    db.commit()
-    db.refresh(db_session)
+    await db.commit()
     
     return db_session
 
 
-def get_session(db: Session, session_id: str) -> Optional[ChatSession]:
+async def get_session(db: AsyncSession, session_id: str) -> Optional[ChatSession]:
     """
-    Get a session by ID.
+    Get one of the tenant's sessions by ID.
     
     Args:
         db: Database session
         session_id: Session identifier
         
     Returns:
-        Optional[ChatSession]: Session if found, None otherwise
+        Optional[ChatSession]: Session if found for ``tenant_of(db)``, None otherwise
     """
-    return db.query(ChatSession).filter(ChatSession.id == session_id).first()
+    result = await db.execute(
+        select(ChatSession).where(ChatSession.id == session_id, ChatSession.tenant_id == tenant_of(db))
+    )
+    return result.scalars().first()
 
 
-def list_sessions(db: Session) -> List[ChatSession]:
+async def list_sessions(
+    db: AsyncSession,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, str]] = None,
+    tenant_id: Optional[str] = None
+) -> List[ChatSession]:
     """
-    List all chat sessions.
+    List chat sessions, newest first.
     
     Args:
         db: Database session
+        limit: Maximum number of sessions to return (all if None)
+        after: Keyset position (updated_at, id) of the last session already seen
+        tenant_id: Only list this tenant's sessions (all tenants if None)
         
     Returns:
-        List[ChatSession]: All sessions ordered by last updated
+        List[ChatSession]: Sessions ordered by last updated, then id
     """
-    return db.query(ChatSession).order_by(desc(ChatSession.updated_at)).all()
+    query = select(ChatSession)
+    if tenant_id is not None:
+        query = query.where(ChatSession.tenant_id == tenant_id)
+    if after is not None:
+        updated_at, session_id = after
+        query = query.where(or_(
+            ChatSession.updated_at < updated_at,
+            and_(ChatSession.updated_at == updated_at, ChatSession.id < session_id)
+        ))
+    query = query.order_by(desc(ChatSession.updated_at), desc(ChatSession.id))
+    if limit is not None:
+        query = query.limit(limit)
+    result = await db.execute(query)
+    return list(result.scalars().all())
 
 
-def save_message(db: Session, session_id: str, role: str, content: str) -> MessageModel:
+async def save_message(db: AsyncSession, session_id: str, role: str, content: str) -> MessageModel:
     """
     Save a message to the database.
     
@@ -81,90 +159,149 @@ def save_message(db: Session, session_id: str, role: str, content: str) -> Messa
     Returns:
         MessageModel: Saved message
     """
-    message_id = str(uuid.uuid4())
-    
-    message = MessageModel(
-        id=message_id,
-        session_id=session_id,
-        role=role,
-        content=content,
-        timestamp=datetime.utcnow()
-    )
-    
-    # Update session timestamp
-    session = get_session(db, session_id)
-    if session:
-        session.updated_at = datetime.utcnow()
-    
-    db.add(message)
-    db.commit()
-    db.refresh(message)
-    
+    message = make_message(session_id, role, content)
+    await save_turn(db, session_id, [message])
     return message
 
 
-def get_session_messages(db: Session, session_id: str) -> List[MessageModel]:
+async def _stage_turn(
+    db: AsyncSession,
+    session_id: str,
+    messages: List[MessageModel],
+    new_session: Optional[ChatSession]
+) -> List[MessageModel]:
+    """Add a turn's messages and session stats to a database session without committing."""
+    last = messages[-1]
+    if new_session is not None:
+        new_session.updated_at = last.timestamp
+        new_session.message_count = len(messages)
+        new_session.last_message_preview = make_preview(last.content)
+        new_session.last_message_at = last.timestamp
+        new_session.version = 1
+        db.add(new_session)
+    else:
+        # Single UPDATE instead of loading the session row first
+        await db.execute(
+            update(ChatSession)
+            .where(ChatSession.id == session_id)
+            .values(
+                updated_at=last.timestamp,
+                message_count=ChatSession.message_count + len(messages),
+                last_message_preview=make_preview(last.content),
+                last_message_at=last.timestamp,
+                version=ChatSession.version + 1
+            )
+        )
+    db.add_all(messages)
+    return messages
+
+
+async def save_turn(
+    db: AsyncSession,
+    session_id: str,
+    messages: List[MessageModel],
+    new_session: Optional[ChatSession] = None
+) -> List[MessageModel]:
     """
-    Get all messages for a session.
+    Save the messages of one chat turn and update session stats in a single transaction.
+    
+    With group commit enabled the write joins the next shared commit on the
+    same engine instead of committing on ``db``.
     
     Args:
         db: Database session
         session_id: Session identifier
+        messages: Messages built with ``make_message``, oldest first
+        new_session: Session from ``make_session`` to insert along with the turn
         
     Returns:
-        List[MessageModel]: Messages ordered by timestamp
+        List[MessageModel]: Saved messages
     """
-    return db.query(MessageModel).filter(
-        MessageModel.session_id == session_id
-    ).order_by(MessageModel.timestamp).all()
+    if not messages:
+        return messages
+    
+    if settings.group_commit_enabled:
+        await writer_for(db.bind).submit(
+            lambda writer_db: _stage_turn(writer_db, session_id, messages, new_session)
+        )
+    else:
+        await _stage_turn(db, session_id, messages, new_session)
+        await db.commit()
+    
+    history_cache.append(session_id, [to_message(m) for m in messages], new_session=new_session is not None)
+    return messages
 
 
-def get_session_message_count(db: Session, session_id: str) -> int:
+async def get_session_messages(
+    db: AsyncSession,
+    session_id: str,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, str]] = None
+) -> List[MessageModel]:
     """
-    Get message count for a session.
+    Get messages for a session, oldest first.
+    
+    An archived session is rehydrated from cold storage on first access.
     
     Args:
         db: Database session
         session_id: Session identifier
+        limit: Maximum number of messages to return (all if None)
+        after: Keyset position (timestamp, id) of the last message already seen
         
     Returns:
-        int: Number of messages
+        List[MessageModel]: Messages ordered by timestamp, then id
     """
-    return db.query(MessageModel).filter(
-        MessageModel.session_id == session_id
-    ).count()
+    await rehydrate_session(db, session_id)
+    
+    query = select(MessageModel).where(MessageModel.session_id == session_id)
+    if after is not None:
+        timestamp, message_id = after
+        query = query.where(or_(
+            MessageModel.timestamp > timestamp,
+            and_(MessageModel.timestamp == timestamp, MessageModel.id > message_id)
+        ))
+    query = query.order_by(MessageModel.timestamp, MessageModel.id)
+    if limit is not None:
+        query = query.limit(limit)
+    result = await db.execute(query)
+    return list(result.scalars().all())
 
 
-def get_last_message_preview(db: Session, session_id: str, max_length: int = 50) -> str:
+async def get_session_history(
+    db: AsyncSession,
+    session_id: str,
+    message_count: Optional[int] = None
+) -> List[Message]:
     """
-    Get a preview of the last message in a session.
+    Get a session's full history for a chat turn, from the history cache when possible.
     
     Args:
         db: Database session
         session_id: Session identifier
-        max_length: Maximum preview length
+        message_count: The session's stored ``message_count``; a cached history
+            of another length (written by another worker) is read again
         
     Returns:
-        str: Preview of last message
+        List[Message]: Messages ordered oldest first
     """
-    last_message = db.query(MessageModel).filter(
-        MessageModel.session_id == session_id
-    ).order_by(desc(MessageModel.timestamp)).first()
+    cached = history_cache.get(session_id, message_count)
+    if cached is not None:
+        return cached
     
-    if not last_message:
-        return "No messages"
-    
-    content = last_message.content
-    if len(content) > max_length:
-        content = content[:max_length] + "..."
-    
-    return content
+    history_cache.begin_load(session_id)
+    history = [to_message(row) for row in await get_session_messages(db, session_id)]
+    history_cache.put(session_id, history)
+    return history
 
 
-def delete_session(db: Session, session_id: str) -> bool:
+async def delete_session(db: AsyncSession, session_id: str) -> bool:
     """
     Delete a session and all its messages.
     
+    Messages and the summary are removed by ``ON DELETE CASCADE`` in the
+    database, without loading them into memory.
+    
     Args:
         db: Database session
         session_id: Session identifier
@@ -172,10 +309,29 @@ def delete_session(db: Session, session_id: str) -> bool:
     Returns:
         bool: True if deleted, False if not found
     """
-    session = get_session(db, session_id)
-    if not session:
-        return False
+    return await delete_sessions(db, [session_id]) == 1
+
+
+async def delete_sessions(db: AsyncSession, session_ids: List[str], all_tenants: bool = False) -> int:
+    """
+    Delete many sessions, and their messages, in one statement.
+    
+    Args:
+        db: Database session
+        session_ids: Session identifiers; unknown ids and other tenants' sessions are ignored
+        all_tenants: Delete regardless of tenant (maintenance tasks only)
+        
+    Returns:
+        int: Number of sessions deleted
+    """
+    if not session_ids:
+        return 0
     
-    db.delete(session)
-    db.commit()
-    return True
+    query = delete(ChatSession).where(ChatSession.id.in_(session_ids))
+    if not all_tenants:
+        query = query.where(ChatSession.tenant_id == tenant_of(db))
+    result = await db.execute(query.execution_options(synchronize_session=False))
+    await db.commit()
+    for session_id in session_ids:
+        history_cache.invalidate(session_id)
+    return result.rowcount
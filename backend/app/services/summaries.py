@@ -0,0 +1,124 @@
+"""
+Rolling conversation summaries for long tutoring sessions.
+
+Older turns are folded incrementally into one summary per session, which is
+sent after the system prompt in place of the turns it covers.
+"""
+
+import logging
+from datetime import datetime
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.core.db import session_for
+from app.models.chat import ChatSession, ConversationSummary, Message
+from app.services.llm_client import llm_client
+from app.services.sessions import get_session_history
+
+logger = logging.getLogger(__name__)
+
+# Sessions with a summary update currently running in this process
+_in_progress: Set[str] = set()
+
+
+async def get_conversation_summary(db: AsyncSession, session_id: str) -> Optional[ConversationSummary]:
+    """
+    Get the rolling summary for a session.
+
+    Args:
+        db: Database session
+        session_id: Session identifier
+
+    Returns:
+        Optional[ConversationSummary]: Summary if one exists
+    """
+    result = await db.execute(select(ConversationSummary).where(ConversationSummary.session_id == session_id))
+    return result.scalars().first()
+
+
+async def apply_summary(db: AsyncSession, session_id: str, history: List[Message]) -> Tuple[List[Message], Optional[str]]:
+    """
+    Replace summarized turns in a history with the session's rolling summary.
+
+    Args:
+        db: Database session
+        session_id: Session identifier
+        history: Full session history, oldest first
+
+    Returns:
+        Tuple of the messages not covered by the summary and the summary text
+    """
+    if not settings.summary_enabled:
+        return history, None
+
+    summary = await get_conversation_summary(db, session_id)
+    if not summary:
+        return history, None
+
+    return history[summary.summarized_message_count:], summary.summary
+
+
+async def refresh_conversation_summary(db: AsyncSession, session_id: str) -> bool:
+    """
+    Fold the un-summarized tail of a session into its summary once it passes the threshold.
+
+    The newest ``summary_keep_recent_messages`` are always left out so recent
+    turns reach the model verbatim. The threshold is checked against the
+    session's stored message count, so turns below it read no messages.
+
+    Args:
+        db: Database session
+        session_id: Session identifier
+
+    Returns:
+        bool: True if the summary was updated
+    """
+    summary = await get_conversation_summary(db, session_id)
+    start = summary.summarized_message_count if summary else 0
+
+    message_count = await db.scalar(select(ChatSession.message_count).where(ChatSession.id == session_id))
+    cutoff = (message_count or 0) - settings.summary_keep_recent_messages
+    if cutoff - start < settings.summary_trigger_messages:
+        return False
+
+    messages = await get_session_history(db, session_id, message_count)
+    cutoff = len(messages) - settings.summary_keep_recent_messages
+    pending = messages[start:cutoff]
+    updated_text = await llm_client.summarize_conversation(summary.summary if summary else None, pending)
+    if not updated_text:
+        return False
+
+    if summary is None:
+        summary = ConversationSummary(session_id=session_id)
+        db.add(summary)
+    summary.summary = updated_text
+    summary.summarized_message_count = cutoff
+    summary.updated_at = datetime.utcnow()
+    await db.commit()
+
+    logger.info(f"📝 Summarized {cutoff} messages for session {session_id}")
+    return True
+
+
+async def update_conversation_summary(bind: AsyncEngine, session_id: str) -> None:
+    """
+    Background task: refresh a session's summary in its own database session.
+
+    Args:
+        bind: Engine of the request's database session
+        session_id: Session identifier
+    """
+    if not settings.summary_enabled or session_id in _in_progress:
+        return
+
+    _in_progress.add(session_id)
+    try:
+        async with session_for(bind) as db:
+            await refresh_conversation_summary(db, session_id)
+    except Exception as e:
+        logger.error(f"Error updating summary for session {session_id}: {str(e)}")
+    finally:
+        _in_progress.discard(session_id)
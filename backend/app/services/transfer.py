@@ -0,0 +1,302 @@
+"""
+Bulk export and import of sessions as NDJSON.
+
+An export is one line per session, least recently updated first, each
+followed by its messages, oldest first. It is read with a single joined query
+through a server-side cursor and written out one cursor batch at a time, so
+memory stays bounded however many sessions there are. Archived sessions are
+exported from their archives without being rehydrated; the archives of a
+batch's sessions are fetched with one lookup.
+
+Import reads the same format line by line and inserts sessions and messages
+with executemany in batches, committing at session boundaries.
+"""
+
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.core.db import session_for
+from app.models.chat import ChatSession, ExportedMessage, ExportedSession, MessageModel, SessionArchive
+from app.services.archive import unpack_messages
+
+# A session longer than this many batches is written in parts, committed with its last one
+MAX_BUFFERED_BATCHES = 4
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _line(record: Dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _message_line(session_id: str, message_id: str, role: str, content: str, timestamp: datetime) -> str:
+    return _line({
+        "type": "message",
+        "session_id": session_id,
+        "id": message_id,
+        "role": role,
+        "content": content,
+        "timestamp": _timestamp(timestamp),
+    })
+
+
+def _export_query(tenant_id: str):
+    """Select a tenant's sessions joined to their messages, and whether each is archived, in export order."""
+    return (
+        select(
+            ChatSession.id,
+            ChatSession.title,
+            ChatSession.created_at,
+            ChatSession.updated_at,
+            ChatSession.message_count,
+            ChatSession.last_message_preview,
+            ChatSession.last_message_at,
+            MessageModel.id.label("message_id"),
+            MessageModel.role,
+            MessageModel.content,
+            MessageModel.timestamp,
+            # Only the key: the blob is fetched once per session, not with every message row
+            SessionArchive.session_id.label("archived"),
+        )
+        .outerjoin(MessageModel, MessageModel.session_id == ChatSession.id)
+        .outerjoin(SessionArchive, SessionArchive.session_id == ChatSession.id)
+        .where(ChatSession.tenant_id == tenant_id)
+        # Sessions come in the tenant index's (updated_at) order, so only the
+        # rows of sessions sharing an updated_at are sorted, never the whole export
+        .order_by(ChatSession.updated_at, ChatSession.id, MessageModel.timestamp, MessageModel.id)
+    )
+
+
+async def export_sessions(
+    bind: AsyncEngine,
+    tenant_id: str,
+    batch_size: Optional[int] = None
+) -> AsyncIterator[str]:
+    """
+    Stream a tenant's sessions and messages as NDJSON.
+
+    Opens its own database session, so the export can outlive the request's.
+
+    Args:
+        bind: Engine of the tenant's shard
+        tenant_id: Tenant to export
+        batch_size: Rows per cursor fetch (defaults to ``EXPORT_BATCH_SIZE``)
+
+    Yields:
+        str: Chunks of complete NDJSON lines
+    """
+    batch_size = batch_size or settings.export_batch_size
+    query = _export_query(tenant_id).execution_options(yield_per=batch_size)
+
+    async with session_for(bind) as db:
+        result = await db.stream(query)
+        current_session_id = None
+        async for rows in result.partitions():
+            archived_ids = {row.id for row in rows if row.archived is not None} - {current_session_id}
+            archives = {}
+            if archived_ids:
+                archives = dict((await db.execute(
+                    select(SessionArchive.session_id, SessionArchive.data)
+                    .where(SessionArchive.session_id.in_(archived_ids))
+                )).all())
+
+            lines = []
+            for row in rows:
+                if row.id != current_session_id:
+                    current_session_id = row.id
+                    lines.append(_line({
+                        "type": "session",
+                        "id": row.id,
+                        "title": row.title,
+                        "created_at": _timestamp(row.created_at),
+                        "updated_at": _timestamp(row.updated_at),
+                        "message_count": row.message_count,
+                        "last_message_preview": row.last_message_preview,
+                        "last_message_at": _timestamp(row.last_message_at),
+                    }))
+                    if row.id in archives:
+                        for message in unpack_messages(row.id, archives[row.id]):
+                            lines.append(_message_line(
+                                row.id, message.id, message.role, message.content, message.timestamp
+                            ))
+                if row.message_id is not None:
+                    lines.append(_message_line(row.id, row.message_id, row.role, row.content, row.timestamp))
+            yield "".join(lines)
+
+
+async def read_ndjson(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: Optional[int] = None
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Split a byte stream into parsed NDJSON records.
+
+    Args:
+        chunks: Request body chunks
+        max_line_bytes: Longest accepted line (defaults to ``IMPORT_MAX_LINE_BYTES``)
+
+    Yields:
+        Tuple[int, Dict]: Line number and parsed object; blank lines are skipped
+
+    Raises:
+        ValueError: If a line is too long or not a JSON object
+    """
+    max_line_bytes = max_line_bytes or settings.import_max_line_bytes
+    buffer = b""
+    line_number = 0
+
+    def parse(raw: bytes) -> Optional[Dict[str, Any]]:
+        if not raw.strip():
+            return None
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            raise ValueError(f"Line {line_number}: invalid JSON")
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {line_number}: expected a JSON object")
+        return record
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            line_number += 1
+            if len(raw) > max_line_bytes:
+                raise ValueError(f"Line {line_number}: longer than {max_line_bytes} bytes")
+            record = parse(raw)
+            if record is not None:
+                yield line_number, record
+        if len(buffer) > max_line_bytes:
+            raise ValueError(f"Line {line_number + 1}: longer than {max_line_bytes} bytes")
+
+    line_number += 1
+    record = parse(buffer)
+    if record is not None:
+        yield line_number, record
+
+
+class SessionImporter:
+    """Buffers imported rows and writes them with executemany."""
+
+    def __init__(self, db: AsyncSession, tenant_id: str, batch_size: int):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.batch_size = max(1, batch_size)
+
+        self.sessions: List[Dict[str, Any]] = []
+        self.messages: List[Dict[str, Any]] = []
+        self.current_session_id: Optional[str] = None
+        self.current_skipped = False
+        self.counts = {"sessions": 0, "messages": 0, "skipped_sessions": 0}
+
+    @property
+    def buffered(self) -> int:
+        return len(self.sessions) + len(self.messages)
+
+    async def add(self, line_number: int, record: Dict[str, Any]) -> None:
+        """
+        Buffer one NDJSON record, flushing full batches.
+
+        Raises:
+            ValueError: If the record is invalid or a message does not follow its session
+        """
+        try:
+            if record.get("type") == "session":
+                session = ExportedSession.model_validate(record)
+            elif record.get("type") == "message":
+                message = ExportedMessage.model_validate(record)
+            else:
+                raise ValueError(f"Line {line_number}: unknown type {record.get('type')!r}")
+        except ValidationError as e:
+            raise ValueError(f"Line {line_number}: {e.errors()[0]['loc']} {e.errors()[0]['msg']}")
+
+        if record["type"] == "session":
+            # Batches end at session boundaries, so a failed import never leaves half a session
+            if self.buffered >= self.batch_size:
+                await self.flush()
+            self.current_session_id = session.id
+            self.current_skipped = False
+            self.sessions.append({
+                **session.model_dump(exclude={"type"}),
+                "tenant_id": self.tenant_id,
+            })
+            return
+
+        if message.session_id != self.current_session_id:
+            raise ValueError(f"Line {line_number}: message does not follow its session's line")
+        if self.current_skipped:
+            return
+        self.messages.append(message.model_dump(exclude={"type"}))
+        if self.buffered >= self.batch_size * MAX_BUFFERED_BATCHES:
+            # Mid-session: written but not committed, so the session still commits whole
+            await self.flush(commit=False)
+
+    async def flush(self, commit: bool = True) -> None:
+        """Insert buffered rows, skipping sessions whose id already exists, and commit unless told not to."""
+        if not self.buffered:
+            return
+        session_ids = [session["id"] for session in self.sessions]
+        existing = set()
+        if session_ids:
+            result = await self.db.execute(select(ChatSession.id).where(ChatSession.id.in_(session_ids)))
+            existing = set(result.scalars())
+        if self.current_session_id in existing:
+            self.current_skipped = True
+
+        sessions = [session for session in self.sessions if session["id"] not in existing]
+        messages = [message for message in self.messages if message["session_id"] not in existing]
+        if sessions:
+            await self.db.execute(insert(ChatSession.__table__), sessions)
+        if messages:
+            await self.db.execute(insert(MessageModel.__table__), messages)
+        if commit:
+            await self.db.commit()
+
+        self.counts["sessions"] += len(sessions)
+        self.counts["messages"] += len(messages)
+        self.counts["skipped_sessions"] += len(existing)
+        self.sessions = []
+        self.messages = []
+
+
+async def import_sessions(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    tenant_id: str,
+    batch_size: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    Import NDJSON sessions and messages for a tenant.
+
+    Sessions whose id already exists are skipped with their messages, so an
+    interrupted import can be rerun. Batches committed before an error stay.
+
+    Args:
+        db: Database session
+        chunks: NDJSON body chunks, in the ``export_sessions`` format
+        tenant_id: Tenant the sessions are imported for
+        batch_size: Rows per insert batch (defaults to ``IMPORT_BATCH_SIZE``)
+
+    Returns:
+        Dict: Counts of imported sessions and messages, and skipped sessions
+
+    Raises:
+        ValueError: If a line is malformed
+    """
+    importer = SessionImporter(db, tenant_id, batch_size or settings.import_batch_size)
+    try:
+        async for line_number, record in read_ndjson(chunks):
+            await importer.add(line_number, record)
+        await importer.flush()
+    except Exception:
+        await db.rollback()
+        raise
+    return importer.counts
@@ -0,0 +1,105 @@
+"""
+ETags for session lists and message histories, derived from stored versions.
+
+Every saved turn increments its session's ``version`` in the same UPDATE that
+maintains the session stats, so a history's ETag is one primary-key lookup.
+A tenant's session list is versioned by an aggregate over the covering
+``(tenant_id, updated_at, version)`` index: the session count, the newest
+``updated_at`` and the sum of versions, which change with every create,
+turn and delete. Both are read before the data, so an ``If-None-Match``
+revalidation is answered with 304 without reading any messages or sessions,
+and all workers derive the same ETags from the database.
+"""
+
+import hashlib
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import tenant_of
+from app.models.chat import ChatSession
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an ``If-None-Match`` header against an ETag (weak comparison).
+
+    Args:
+        if_none_match: Header value, possibly a comma-separated list or ``*``
+        etag: Current ETag
+
+    Returns:
+        bool: True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == current for tag in if_none_match.split(","))
+
+
+async def session_version(db: AsyncSession, session_id: str) -> Optional[int]:
+    """
+    Get the stored version of one of the tenant's sessions.
+
+    Args:
+        db: Database session
+        session_id: Session identifier
+
+    Returns:
+        Optional[int]: Version, or None if the session does not exist for ``tenant_of(db)``
+    """
+    return await db.scalar(
+        select(ChatSession.version).where(ChatSession.id == session_id, ChatSession.tenant_id == tenant_of(db))
+    )
+
+
+async def list_version(db: AsyncSession, tenant_id: str) -> Tuple[object, ...]:
+    """
+    Get the version of a tenant's session list.
+
+    Args:
+        db: Database session
+        tenant_id: Tenant whose sessions are listed
+
+    Returns:
+        Tuple: Session count, newest ``updated_at`` and sum of versions
+    """
+    result = await db.execute(
+        select(func.count(), func.max(ChatSession.updated_at), func.sum(ChatSession.version))
+        .where(ChatSession.tenant_id == tenant_id)
+    )
+    return tuple(result.one())
+
+
+class ETags:
+    """Builds ETags from versions and counts 304 responses."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.not_modified = 0
+
+    def etag(self, version: object, *parts: object) -> str:
+        """
+        Build a weak ETag for a version of a resource.
+
+        Args:
+            version: Version the response is built from
+            parts: Everything else the response depends on (tenant, page parameters)
+
+        Returns:
+            str: ETag header value
+        """
+        key = "\x00".join(str(part) for part in (version, *parts))
+        return f'W/"{hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()}"'
+
+    def stats(self) -> Dict[str, int]:
+        """Count of requests answered with 304."""
+        return {"not_modified": self.not_modified}
+
+
+# Global ETag builder instance
+etags = ETags(enabled=settings.etag_enabled)
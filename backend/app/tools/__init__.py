@@ -0,0 +1 @@
+"""Developer and operations tools for Neuro Tutor."""
@@ -0,0 +1,219 @@
+"""
+Local mock of the OpenRouter ``/chat/completions`` API for offline load testing.
+
+Serves deterministic canned Socratic replies, streaming or not, with
+scriptable latency, token rate and 429/5xx injection. Point the backend at
+it with ``OPENROUTER_BASE_URL=http://localhost:8001/api/v1`` and any
+non-placeholder ``OPENROUTER_API_KEY``.
+
+Run:
+    python -m app.tools.mock_openrouter --port 8001 --latency lognormal --latency-ms 800
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Literal, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ConfigDict
+from pydantic_settings import BaseSettings
+
+DEFAULT_REPLIES = [
+    "Good question! Before I explain, what do you already know about this topic?",
+    "Let's break this into smaller steps. What do you think the very first step might be?",
+    "Interesting idea. What makes you think that? Can you walk me through your reasoning?",
+    "Imagine this as a recipe: each ingredient matters. Which ingredient do you think is most important here, and why?",
+    "You're close! What would happen if we changed just one part of your answer?",
+]
+
+
+class MockProfile(BaseSettings):
+    """Latency and failure profile for the mock server (env prefix ``MOCK_OPENROUTER_``)."""
+
+    model_config = ConfigDict(env_prefix="MOCK_OPENROUTER_", extra="ignore")
+
+    # Time to first token
+    latency: Literal["fixed", "uniform", "lognormal"] = "lognormal"
+    latency_ms: float = 600.0  # fixed value, uniform midpoint, or lognormal median
+    latency_spread: float = 0.5  # uniform +/- fraction, or lognormal sigma
+
+    # Generation speed after the first token
+    tokens_per_second: float = 60.0
+
+    # Failure injection (probabilities per request)
+    error_rate_429: float = 0.0
+    retry_after_seconds: int = 2
+    error_rate_5xx: float = 0.0
+
+    # Seed for latency and failure sampling; replies are always deterministic
+    seed: Optional[int] = None
+
+
+class MockOpenRouter:
+    """Samples latencies and failures and builds replies for one profile."""
+
+    def __init__(self, profile: MockProfile, replies: Optional[List[str]] = None):
+        self.profile = profile
+        self.replies = replies or DEFAULT_REPLIES
+        self.rng = random.Random(profile.seed)
+        self.requests = 0
+
+    def first_token_delay(self) -> float:
+        """Sample time to first token in seconds."""
+        profile = self.profile
+        if profile.latency == "fixed":
+            millis = profile.latency_ms
+        elif profile.latency == "uniform":
+            spread = profile.latency_ms * profile.latency_spread
+            millis = self.rng.uniform(profile.latency_ms - spread, profile.latency_ms + spread)
+        else:
+            millis = profile.latency_ms * self.rng.lognormvariate(0.0, profile.latency_spread)
+        return max(0.0, millis) / 1000.0
+
+    def injected_error(self) -> Optional[JSONResponse]:
+        """Decide whether this request fails, and how."""
+        roll = self.rng.random()
+        if roll < self.profile.error_rate_429:
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit exceeded (mock)", "code": 429}},
+                headers={"Retry-After": str(self.profile.retry_after_seconds)}
+            )
+        if roll < self.profile.error_rate_429 + self.profile.error_rate_5xx:
+            status_code = self.rng.choice([500, 502, 503])
+            return JSONResponse(
+                status_code=status_code,
+                content={"error": {"message": "Upstream error (mock)", "code": status_code}}
+            )
+        return None
+
+    def reply_for(self, messages: List[Dict[str, str]]) -> str:
+        """Pick a canned reply deterministically from the last user message."""
+        last_user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        digest = hashlib.sha256(last_user.encode("utf-8")).digest()
+        return self.replies[digest[0] % len(self.replies)]
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Split a reply into word-sized stream chunks."""
+        words = text.split(" ")
+        return [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+
+
+def create_mock_app(profile: Optional[MockProfile] = None, replies: Optional[List[str]] = None) -> FastAPI:
+    """
+    Create the mock OpenRouter application.
+
+    Args:
+        profile: Latency and failure profile (defaults to environment settings)
+        replies: Canned replies to choose from
+
+    Returns:
+        FastAPI: App serving ``POST /api/v1/chat/completions``
+    """
+    mock = MockOpenRouter(profile or MockProfile(), replies)
+    app = FastAPI(title="Mock OpenRouter", docs_url=None, redoc_url=None)
+    app.state.mock = mock
+
+    @app.post("/api/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        mock.requests += 1
+
+        error = mock.injected_error()
+        if error is not None:
+            return error
+
+        model = payload.get("model", "mock/model")
+        completion_id = f"gen-mock-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        tokens = mock.tokenize(mock.reply_for(payload.get("messages", [])))
+        token_delay = 1.0 / mock.profile.tokens_per_second if mock.profile.tokens_per_second > 0 else 0.0
+        first_token_delay = mock.first_token_delay()
+
+        if payload.get("stream"):
+            async def event_stream() -> AsyncIterator[str]:
+                yield ": OPENROUTER PROCESSING\n\n"
+                await asyncio.sleep(first_token_delay)
+                for index, token in enumerate(tokens):
+                    if index:
+                        await asyncio.sleep(token_delay)
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"role": "assistant", "content": token}, "finish_reason": None}]
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                done = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+                }
+                yield f"data: {json.dumps(done)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+        await asyncio.sleep(first_token_delay + token_delay * max(0, len(tokens) - 1))
+        prompt_chars = sum(len(m.get("content", "")) for m in payload.get("messages", []))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt_chars // 4 + len(tokens)
+            }
+        }
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", "requests": mock.requests}
+
+    return app
+
+
+def main() -> None:
+    """Run the mock server from the command line."""
+    parser = argparse.ArgumentParser(description="Mock OpenRouter server for offline load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"])
+    parser.add_argument("--latency-ms", type=float)
+    parser.add_argument("--latency-spread", type=float)
+    parser.add_argument("--tokens-per-second", type=float)
+    parser.add_argument("--error-rate-429", type=float)
+    parser.add_argument("--retry-after-seconds", type=int)
+    parser.add_argument("--error-rate-5xx", type=float)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    overrides = {
+        key: value for key, value in vars(args).items()
+        if key not in ("host", "port") and value is not None
+    }
+    profile = MockProfile(**overrides)
+
+    import uvicorn
+    uvicorn.run(create_mock_app(profile), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Move tenants' sessions to the shard that owns them.
+
+Run after changing ``SHARD_URLS``: rendezvous hashing moves only the tenants
+whose winning shard changed, and this copies their sessions (with messages,
+summaries and archives) over in batches, deleting each batch from the old
+shard once the new one has committed it. A batch interrupted midway is
+copied again on the next run, so the tool can simply be rerun.
+
+Run:
+    python -m app.tools.rebalance_shards --dry-run      # report what would move
+    python -m app.tools.rebalance_shards
+    python -m app.tools.rebalance_shards --drain old=sqlite:///./neuro_tutor.db   # empty a retired database
+"""
+
+import argparse
+import asyncio
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Import models so their tables are registered with SQLAlchemy
+from app.models import chat as chat_models  # noqa: F401
+from app.core.db import build_engine, build_shard_router, create_tables
+from app.core.migrations import run_migrations
+from app.core.sharding import ShardRouter, parse_shard_urls
+from app.models.chat import ChatSession, ConversationSummary, MessageModel, SessionArchive
+
+# Child tables copied with each session, in insert order
+SESSION_TABLES = [MessageModel.__table__, ConversationSummary.__table__, SessionArchive.__table__]
+
+
+async def tenant_counts(bind: AsyncEngine) -> Dict[str, int]:
+    """
+    Count sessions per tenant on one database.
+
+    Args:
+        bind: Database engine
+
+    Returns:
+        Dict: Tenant id -> session count
+    """
+    query = select(ChatSession.tenant_id, func.count()).group_by(ChatSession.tenant_id)
+    async with bind.connect() as conn:
+        return {tenant_id: count for tenant_id, count in await conn.execute(query)}
+
+
+async def move_sessions(source: AsyncEngine, target: AsyncEngine, session_ids: List[str]) -> None:
+    """
+    Copy sessions and their rows to another database, then delete them from the source.
+
+    Args:
+        source: Database the sessions are on
+        target: Database to move them to
+        session_ids: Sessions to move
+    """
+    sessions = ChatSession.__table__
+    async with source.connect() as conn:
+        rows = {
+            sessions: [dict(row._mapping) for row in await conn.execute(
+                select(sessions).where(sessions.c.id.in_(session_ids))
+            )]
+        }
+        for table in SESSION_TABLES:
+            rows[table] = [dict(row._mapping) for row in await conn.execute(
+                select(table).where(table.c.session_id.in_(session_ids))
+            )]
+
+    async with target.begin() as conn:
+        # Copies left by an interrupted run are replaced (children cascade)
+        await conn.execute(delete(sessions).where(sessions.c.id.in_(session_ids)))
+        for table, table_rows in rows.items():
+            if table_rows:
+                await conn.execute(table.insert(), table_rows)
+
+    async with source.begin() as conn:
+        await conn.execute(delete(sessions).where(sessions.c.id.in_(session_ids)))
+
+
+async def move_tenant(source: AsyncEngine, target: AsyncEngine, tenant_id: str, batch_size: int = 100) -> int:
+    """
+    Move all of a tenant's sessions between databases in batches.
+
+    Args:
+        source: Database the tenant's sessions are on
+        target: Database that owns the tenant
+        tenant_id: Tenant to move
+        batch_size: Sessions per batch
+
+    Returns:
+        int: Number of sessions moved
+    """
+    moved = 0
+    while True:
+        query = (
+            select(ChatSession.id)
+            .where(ChatSession.tenant_id == tenant_id)
+            .order_by(ChatSession.id)
+            .limit(batch_size)
+        )
+        async with source.connect() as conn:
+            session_ids = list((await conn.execute(query)).scalars())
+        if not session_ids:
+            return moved
+        await move_sessions(source, target, session_ids)
+        moved += len(session_ids)
+
+
+async def rebalance(
+    router: ShardRouter,
+    drain: Optional[Dict[str, AsyncEngine]] = None,
+    batch_size: int = 100,
+    dry_run: bool = False
+) -> Dict[str, int]:
+    """
+    Move every tenant found on the wrong database to its owning shard.
+
+    Args:
+        router: Current shard layout
+        drain: Extra databases (name -> engine) to empty completely
+        batch_size: Sessions per batch
+        dry_run: Only report what would move
+
+    Returns:
+        Dict: ``"source->target"`` -> number of sessions (to be) moved
+    """
+    sources = {**router.shards, **(drain or {})}
+    for shard_engine in sources.values():
+        await create_tables(shard_engine)
+        await run_migrations(shard_engine)
+
+    moves: Dict[str, int] = {}
+    for source_name, source in sources.items():
+        for tenant_id, count in (await tenant_counts(source)).items():
+            target_name = router.shard_for(tenant_id)
+            if target_name == source_name and source_name in router.shards:
+                continue
+
+            print(f"{'🔍 Would move' if dry_run else '📦 Moving'} tenant {tenant_id}: "
+                  f"{count} sessions {source_name} -> {target_name}")
+            if not dry_run:
+                count = await move_tenant(source, router.shards[target_name], tenant_id, batch_size)
+            key = f"{source_name}->{target_name}"
+            moves[key] = moves.get(key, 0) + count
+    return moves
+
+
+async def run(drain_spec: str = "", batch_size: int = 100, dry_run: bool = False) -> None:
+    """
+    Rebalance the shards configured by ``SHARD_URLS``.
+
+    Args:
+        drain_spec: ``name=url`` list of retired databases to empty
+        batch_size: Sessions per batch
+        dry_run: Only report what would move
+    """
+    router = build_shard_router()
+    drain = {name: build_engine(url) for name, url in parse_shard_urls(drain_spec).items()}
+    try:
+        moves = await rebalance(router, drain, batch_size, dry_run)
+        if not moves:
+            print("✅ Every tenant is on its shard")
+    finally:
+        await router.dispose()
+        for drain_engine in drain.values():
+            await drain_engine.dispose()
+
+
+def main() -> None:
+    """Rebalance shards from the command line."""
+    parser = argparse.ArgumentParser(description="Move Neuro Tutor tenants to their owning shards")
+    parser.add_argument("--drain", default="", help="Comma-separated name=url databases to empty")
+    parser.add_argument("--batch-size", type=int, default=100, help="Sessions moved per batch")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would move")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.drain, args.batch_size, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
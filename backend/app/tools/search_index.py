@@ -0,0 +1,48 @@
+"""
+Rebuild the full-text message search index.
+
+Run after bulk imports that bypassed the sync triggers, or after ``VACUUM``
+on SQLite (which may renumber the rowids the index is keyed by).
+
+Run:
+    python -m app.tools.search_index
+    python -m app.tools.search_index --database-url sqlite:///./data/neuro_tutor.db
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Optional
+
+from app.core.db import build_engine
+from app.services.search import rebuild_search_index
+
+
+async def rebuild(database_url: Optional[str] = None) -> None:
+    """
+    Rebuild the search index of a database.
+
+    Args:
+        database_url: Database to reindex (defaults to ``DATABASE_URL``)
+    """
+    engine = build_engine(database_url)
+    try:
+        started = time.monotonic()
+        async with engine.begin() as conn:
+            await rebuild_search_index(conn)
+        print(f"🔎 Search index rebuilt in {time.monotonic() - started:.1f}s")
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    """Rebuild the search index from the command line."""
+    parser = argparse.ArgumentParser(description="Rebuild the Neuro Tutor message search index")
+    parser.add_argument("--database-url", help="Database URL (defaults to DATABASE_URL)")
+    args = parser.parse_args()
+
+    asyncio.run(rebuild(args.database_url))
+
+
+if __name__ == "__main__":
+    main()
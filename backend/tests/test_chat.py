@@ -4,35 +4,67 @@ Tests for chat API with database persistence.
 
 import pytest
 import asyncio
+import json
+from fastapi import WebSocketDisconnect
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from starlette.requests import HTTPConnection
+from sqlalchemy import create_engine, event, func, inspect, select, text, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 import tempfile
+from datetime import datetime
 import os
 
 from app.main import app
-from app.core.db import Base, get_db
-from app.models.chat import ChatSession, MessageModel
-from app.services.sessions import create_session, get_session, list_sessions, save_message, get_session_messages
+from app.api import chat as chat_api
+from app.core.config import settings
+from app.core.db import (
+    Base, async_database_url, build_engine, create_tables, engine_options, get_db, get_shard_router, session_for,
+    tenant_from_request
+)
+from app.core.sharding import ShardRouter, parse_shard_urls
+from app.core.migrations import MIGRATIONS, applied_versions, apply_migrations, run_migrations, upgrade_session_stats
+from app.core.sqlite import WalCheckpointer, apply_sqlite_profile
+from app.models.chat import ChatSession, ConversationSummary, Message, MessageModel, SessionArchive
+from app.services.llm_client import llm_client
+from app.services import sessions as sessions_service
+from app.services.group_commit import GroupCommitWriter
+from app.services.history_cache import HistoryCache, history_cache
+from app.services.archive import SessionArchiver, archive_session, pack_messages, unpack_messages
+from app.services.retention import RetentionSweeper
+from app.services.search import build_match_query, rebuild_search_index
+from app.services.sessions import (
+    create_session, get_session, list_sessions, save_message, get_session_messages,
+    make_message, make_session, save_turn
+)
+from app.services.transfer import _export_query, export_sessions, import_sessions
+from app.services.versions import etag_matches
+from app.tools.rebalance_shards import rebalance
+from app.services.summaries import apply_summary, refresh_conversation_summary
 
 
 # Create test database
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+# NullPool: tests and the TestClient run on different event loops, so connections are never shared
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+engine = create_async_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+apply_sqlite_profile(engine)  # same connection profile as the app, incl. foreign keys
 
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 
-def override_get_db():
-    """Override database dependency for testing."""
-    try:
-        db = TestingSessionLocal()
+async def override_get_db(request: HTTPConnection):
+    """Override database dependency for testing, keeping tenant scoping from the header."""
+    async with TestingSessionLocal() as db:
+        db.info["tenant_id"] = tenant_from_request(request)
         yield db
-    finally:
-        db.close()
+
+
+def db_call(func, *args, **kwargs):
+    """Run an async service function in its own test database session."""
+    async def run():
+        async with TestingSessionLocal() as db:
+            return await func(db, *args, **kwargs)
+    return asyncio.run(run())
 
 
 app.dependency_overrides[get_db] = override_get_db
@@ -40,10 +72,17 @@ app.dependency_overrides[get_db] = override_get_db
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_database():
-    """Create test database tables."""
-    Base.metadata.create_all(bind=engine)
+    """Create test database tables, migrated like the app's (search index, triggers)."""
+    def remove_database_files():
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(f"./test.db{suffix}"):
+                os.remove(f"./test.db{suffix}")
+    
+    remove_database_files()
+    asyncio.run(create_tables(engine))
+    asyncio.run(run_migrations(engine))
     yield
-    Base.metadata.drop_all(bind=engine)
+    remove_database_files()
 
 
 @pytest.fixture
@@ -82,19 +121,15 @@ class TestChatAPI:
         assert data["reply_message"]["role"] == "assistant"
         
         # Check session was created in database
-        db = TestingSessionLocal()
-        session = get_session(db, data["session_id"])
+        session = db_call(get_session, data["session_id"])
         assert session is not None
         assert session.title == "Hello, I need help with photosynthesis"
-        db.close()
     
     def test_chat_with_existing_session(self, client, setup_test_database):
         """Test sending message to existing session."""
         # First, create a session
-        db = TestingSessionLocal()
-        session = create_session(db, "Test Session")
+        session = db_call(create_session, "Test Session")
         session_id = session.id
-        db.close()
         
         # Now send a message to that session
         request_data = {
@@ -116,25 +151,99 @@ class TestChatAPI:
         assert "reply_message" in data
         
         # Check messages were saved
-        db = TestingSessionLocal()
-        messages = get_session_messages(db, session_id)
+        messages = db_call(get_session_messages, session_id)
         assert len(messages) >= 2  # User message + AI response
-        db.close()
+    
+    def test_stream_chat(self, client, setup_test_database):
+        """Test streaming a reply as Server-Sent Events."""
+        request_data = {
+            "messages": [
+                {
+                    "id": "msg-stream",
+                    "role": "user",
+                    "content": "Why is the sky blue?"
+                }
+            ]
+        }
+        
+        response = client.post("/api/chat/stream", json=request_data)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        
+        events = []
+        for frame in response.text.strip().split("\n\n"):
+            event_line, data_line = frame.split("\n")
+            events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+        
+        assert events[0][0] == "session"
+        assert events[-1][0] == "done"
+        assert any(name == "token" for name, _ in events)
+        
+        session_id = events[0][1]["session_id"]
+        streamed = "".join(data["content"] for name, data in events if name == "token")
+        assert events[-1][1]["reply_message"]["content"] == streamed
+        
+        # Both user message and full assistant reply are persisted
+        messages = db_call(get_session_messages, session_id)
+        assert [m.role for m in messages] == ["user", "assistant"]
+        assert messages[1].content == streamed
+    
+    def test_stream_disconnect_keeps_partial_reply(self, setup_test_database, monkeypatch):
+        """Test that the part of a reply streamed before the client left is saved."""
+        async def stalled_stream(*args, **kwargs):
+            yield "Light scatters"
+            await asyncio.sleep(3600)
+        
+        monkeypatch.setattr(chat_api, "stream_response", stalled_stream)
+        body = json.dumps({"messages": [{"id": "msg-gone", "role": "user", "content": "Why is the sky blue?"}]})
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": "/api/chat/stream", "raw_path": b"/api/chat/stream",
+            "root_path": "", "query_string": b"", "server": ("testserver", 80), "client": ("testclient", 50000),
+            "headers": [(b"host", b"testserver"), (b"content-type", b"application/json")],
+        }
+        
+        async def run():
+            sent = []
+            token_sent = asyncio.Event()
+            requested = False
+            
+            async def receive():
+                nonlocal requested
+                if not requested:
+                    requested = True
+                    return {"type": "http.request", "body": body.encode(), "more_body": False}
+                # The client goes away once it has seen a token
+                await token_sent.wait()
+                return {"type": "http.disconnect"}
+            
+            async def send(message):
+                sent.append(message)
+                if b"event: token" in message.get("body", b""):
+                    token_sent.set()
+            
+            await app(scope, receive, send)
+            return b"".join(message.get("body", b"") for message in sent)
+        
+        streamed = asyncio.run(run()).decode()
+        session_id = json.loads(streamed.split("\n")[1][len("data: "):])["session_id"]
+        
+        messages = db_call(get_session_messages, session_id)
+        assert [(m.role, m.content) for m in messages] == [
+            ("user", "Why is the sky blue?"), ("assistant", "Light scatters")
+        ]
     
     def test_get_sessions_list(self, client, setup_test_database):
         """Test listing all chat sessions."""
-        db = TestingSessionLocal()
-        
         # Create test sessions
-        session1 = create_session(db, "Session 1")
-        session2 = create_session(db, "Session 2")
+        session1 = db_call(create_session, "Session 1")
+        session2 = db_call(create_session, "Session 2")
         
         # Add messages to sessions
-        save_message(db, session1.id, "user", "Test message 1")
-        save_message(db, session1.id, "assistant", "Response 1")
-        save_message(db, session2.id, "user", "Test message 2")
-        
-        db.close()
+        db_call(save_message, session1.id, "user", "Test message 1")
+        db_call(save_message, session1.id, "assistant", "Response 1")
+        db_call(save_message, session2.id, "user", "Test message 2")
         
         response = client.get("/api/chat/sessions")
         
@@ -159,15 +268,12 @@ class TestChatAPI:
     
     def test_get_session_messages(self, client, setup_test_database):
         """Test getting messages for a specific session."""
-        db = TestingSessionLocal()
-        
         # Create test session with messages
-        session = create_session(db, "Test Messages")
-        save_message(db, session.id, "user", "First question")
-        save_message(db, session.id, "assistant", "First answer")
-        save_message(db, session.id, "user", "Follow-up question")
+        session = db_call(create_session, "Test Messages")
+        db_call(save_message, session.id, "user", "First question")
+        db_call(save_message, session.id, "assistant", "First answer")
+        db_call(save_message, session.id, "user", "Follow-up question")
         session_id = session.id
-        db.close()
         
         response = client.get(f"/api/chat/sessions/{session_id}/messages")
         
@@ -186,6 +292,59 @@ class TestChatAPI:
         assert messages[2]["role"] == "user"
         assert "Follow-up question" in messages[2]["content"]
     
+    def test_paginate_session_messages(self, client, setup_test_database):
+        """Test walking a session's messages with keyset cursors."""
+        session = db_call(create_session, "Paged Messages")
+        for i in range(5):
+            db_call(save_message, session.id, "user", f"Message {i}")
+        session_id = session.id
+        
+        contents = []
+        cursor = None
+        pages = 0
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get(f"/api/chat/sessions/{session_id}/messages", params=params)
+            assert response.status_code == 200
+            data = response.json()
+            contents.extend(m["content"] for m in data["messages"])
+            pages += 1
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        
+        assert pages == 3
+        assert contents == [f"Message {i}" for i in range(5)]
+    
+    def test_paginate_sessions(self, client, setup_test_database):
+        """Test that session pages cover every session exactly once."""
+        created = {db_call(create_session, f"Paged Session {i}").id for i in range(3)}
+        total = len(db_call(list_sessions))
+        
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            data = client.get("/api/chat/sessions", params=params).json()
+            assert len(data["sessions"]) <= 2
+            seen.extend(s["id"] for s in data["sessions"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        
+        assert len(seen) == len(set(seen)) == total
+        assert created <= set(seen)
+    
+    def test_invalid_cursor(self, client, setup_test_database):
+        """Test that a malformed cursor is rejected."""
+        response = client.get("/api/chat/sessions", params={"cursor": "not-a-cursor"})
+        
+        assert response.status_code == 400
+    
     def test_get_nonexistent_session_messages(self, client, setup_test_database):
         """Test getting messages for non-existent session."""
         fake_session_id = "nonexistent-session-id"
@@ -220,12 +379,9 @@ class TestChatAPI:
     
     def test_delete_session(self, client, setup_test_database):
         """Test deleting a session."""
-        db = TestingSessionLocal()
-        
         # Create test session
-        session = create_session(db, "Session to Delete")
+        session = db_call(create_session, "Session to Delete")
         session_id = session.id
-        db.close()
         
         # Delete the session
         response = client.delete(f"/api/chat/sessions/{session_id}")
@@ -233,10 +389,54 @@ class TestChatAPI:
         assert response.status_code == 204
         
         # Verify session is deleted
-        db = TestingSessionLocal()
-        deleted_session = get_session(db, session_id)
+        deleted_session = db_call(get_session, session_id)
         assert deleted_session is None
-        db.close()
+    
+    def test_delete_session_cascades_in_database(self, client, setup_test_database):
+        """Test that messages and the summary are removed by the database cascade."""
+        session = db_call(create_session, "Cascade")
+        db_call(save_message, session.id, "user", "Question")
+        db_call(save_message, session.id, "assistant", "Answer")
+        
+        async def add_summary(db):
+            db.add(ConversationSummary(session_id=session.id, summary="Earlier turns", summarized_message_count=1))
+            await db.commit()
+        
+        db_call(add_summary)
+        
+        assert client.delete(f"/api/chat/sessions/{session.id}").status_code == 204
+        
+        async def leftovers(db):
+            messages = await db.scalar(
+                select(func.count()).select_from(MessageModel).where(MessageModel.session_id == session.id)
+            )
+            summaries = await db.scalar(
+                select(func.count()).select_from(ConversationSummary).where(ConversationSummary.session_id == session.id)
+            )
+            return messages, summaries
+        
+        assert db_call(leftovers) == (0, 0)
+    
+    def test_bulk_delete_sessions(self, client, setup_test_database):
+        """Test deleting several sessions in one request."""
+        ids = [db_call(create_session, f"Bulk {i}").id for i in range(3)]
+        db_call(save_message, ids[0], "user", "Soon gone")
+        
+        response = client.post("/api/chat/sessions/delete", json={
+            "session_ids": ids[:2] + ["welcome", "nonexistent-session-id"]
+        })
+        
+        assert response.status_code == 200
+        assert response.json() == {"deleted": 2}
+        assert db_call(get_session, ids[0]) is None
+        assert db_call(get_session, ids[2]) is not None
+        assert db_call(get_session_messages, ids[0]) == []
+    
+    def test_bulk_delete_rejects_empty_list(self, client, setup_test_database):
+        """Test that a bulk delete needs at least one id."""
+        response = client.post("/api/chat/sessions/delete", json={"session_ids": []})
+        
+        assert response.status_code == 422
     
     def test_delete_welcome_session_fails(self, client, setup_test_database):
         """Test that welcome session cannot be deleted."""
@@ -253,33 +453,1034 @@ class TestSessionService:
     
     def test_create_session_without_title(self, setup_test_database):
         """Test creating session without title generates default."""
-        db = TestingSessionLocal()
-        
-        session = create_session(db)
+        session = db_call(create_session)
         
         assert session is not None
         assert session.id is not None
         assert "Chat" in session.title
-        db.close()
     
     def test_save_message_updates_timestamp(self, setup_test_database):
         """Test that saving message updates session timestamp."""
-        db = TestingSessionLocal()
-        
         # Create session
-        original_session = create_session(db, "Timestamp Test")
+        original_session = db_call(create_session, "Timestamp Test")
         original_time = original_session.updated_at
         
         # Save a message after a delay
         import time
         time.sleep(0.1)
         
-        save_message(db, original_session.id, "user", "Test message")
+        db_call(save_message, original_session.id, "user", "Test message")
         
         # Refresh session from database
-        updated_session = get_session(db, original_session.id)
+        updated_session = db_call(get_session, original_session.id)
         assert updated_session.updated_at > original_time
-        db.close()
+
+    
+    def test_save_message_maintains_session_stats(self, setup_test_database):
+        """Test that message count and last-message preview live on the session."""
+        session = db_call(create_session, "Stats Test")
+        db_call(save_message, session.id, "user", "Short question")
+        reply = db_call(save_message, session.id, "assistant", "A" * 80)
+        
+        updated_session = db_call(get_session, session.id)
+        assert updated_session.message_count == 2
+        assert updated_session.last_message_preview == "A" * 50 + "..."
+        assert updated_session.last_message_at == reply.timestamp
+    
+    def test_save_turn_inserts_new_session_with_messages(self, setup_test_database):
+        """Test that a new session and its first turn are written together."""
+        session = make_session("Turn Test")
+        turn = [
+            make_message(session.id, "user", "What is a prime number?"),
+            make_message(session.id, "assistant", "What do you notice about 7?")
+        ]
+        
+        db_call(save_turn, session.id, turn, new_session=session)
+        db_call(save_turn, session.id, [make_message(session.id, "user", "Only 1 and 7 divide it")])
+        
+        saved = db_call(get_session, session.id)
+        assert saved.message_count == 3
+        assert saved.last_message_preview == "Only 1 and 7 divide it"
+        assert [m.role for m in db_call(get_session_messages, session.id)] == ["user", "assistant", "user"]
+
+
+class TestHistoryCache:
+    """Test the in-process cache of session histories."""
+    
+    def test_evicts_least_recently_used_by_size(self):
+        """Test that the cache stays within its byte budget."""
+        cache = HistoryCache(max_bytes=2000)
+        history = [Message(id="m1", role="user", content="x" * 500)]
+        
+        cache.put("a", history)
+        cache.put("b", history)
+        assert cache.get("a") is not None  # "a" is now most recently used
+        cache.put("c", history)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.size_bytes <= 2000
+        assert cache.evictions == 1
+    
+    def test_load_raced_by_write_is_not_cached(self):
+        """Test that a history read before a concurrent append is discarded."""
+        cache = HistoryCache()
+        
+        cache.begin_load("s1")
+        cache.append("s1", [Message(id="m2", role="user", content="Newer")])
+        cache.put("s1", [Message(id="m1", role="user", content="Older")])
+        
+        assert cache.get("s1") is None
+    
+    def test_active_session_turn_reads_no_messages(self, client, setup_test_database, monkeypatch):
+        """Test that turns in an active session, summary check included, read no messages from the database."""
+        reads = []
+        
+        def count_message_reads(conn, cursor, statement, parameters, context, executemany):
+            if "FROM messages" in statement:
+                reads.append(statement)
+        
+        event.listen(engine.sync_engine, "before_cursor_execute", count_message_reads)
+        try:
+            first = client.post("/api/chat/", json={
+                "messages": [{"id": "msg-hc1", "role": "user", "content": "What is density?"}]
+            }).json()
+            second = client.post("/api/chat/", json={
+                "session_id": first["session_id"],
+                "messages": [{"id": "msg-hc2", "role": "user", "content": "Is it mass over volume?"}]
+            })
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", count_message_reads)
+        
+        assert second.status_code == 200
+        assert reads == []
+        assert [m.content for m in history_cache.get(first["session_id"])][::2] == [
+            "What is density?", "Is it mass over volume?"
+        ]
+        
+        client.delete(f"/api/chat/sessions/{first['session_id']}")
+        assert history_cache.get(first["session_id"]) is None
+    
+    def test_history_written_by_another_worker_is_reloaded(self, client, setup_test_database):
+        """Test that a cached history shorter than the stored message count is read again."""
+        first = client.post("/api/chat/", json={
+            "messages": [{"id": "msg-hc3", "role": "user", "content": "What is inertia?"}]
+        }).json()
+        session_id = first["session_id"]
+        
+        # Another worker saves a turn: the database changes, this process's cache does not
+        async def save_elsewhere(db):
+            message = make_message(session_id, "user", "Saved by another worker")
+            await sessions_service._stage_turn(db, session_id, [message], None)
+            await db.commit()
+        
+        db_call(save_elsewhere)
+        stale = history_cache.stale
+        second = client.post("/api/chat/", json={
+            "session_id": session_id,
+            "messages": [{"id": "msg-hc4", "role": "user", "content": "Does mass matter?"}]
+        })
+        
+        assert second.status_code == 200
+        assert "Saved by another worker" in [m.content for m in history_cache.get(session_id)]
+        assert history_cache.stale == stale + 1
+
+
+class TestETags:
+    """Test conditional GETs answered from stored versions."""
+    
+    def test_session_list_not_modified_until_a_write(self, client, setup_test_database, monkeypatch):
+        """Test that an unchanged session list is answered with 304 without querying."""
+        first = client.get("/api/chat/sessions")
+        etag = first.headers["etag"]
+        
+        def no_query(*args, **kwargs):
+            raise AssertionError("list_sessions should not run for a 304")
+        
+        with monkeypatch.context() as patched:
+            patched.setattr(chat_api, "list_sessions", no_query)
+            cached = client.get("/api/chat/sessions", headers={"If-None-Match": etag})
+        other_page = client.get("/api/chat/sessions", params={"limit": 1}, headers={"If-None-Match": etag})
+        db_call(create_session, "Invalidates List")
+        changed = client.get("/api/chat/sessions", headers={"If-None-Match": etag})
+        
+        assert first.headers["cache-control"] == "no-cache"
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+        assert cached.content == b""
+        assert other_page.status_code == 200
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+    
+    def test_message_history_versions(self, client, setup_test_database):
+        """Test that saving and deleting change a session's ETag."""
+        session = db_call(create_session, "ETag Session")
+        db_call(save_message, session.id, "user", "First")
+        url = f"/api/chat/sessions/{session.id}/messages"
+        
+        etag = client.get(url).headers["etag"]
+        cached = client.get(url, headers={"If-None-Match": etag})
+        db_call(save_message, session.id, "assistant", "Reply")
+        changed = client.get(url, headers={"If-None-Match": etag})
+        client.delete(f"/api/chat/sessions/{session.id}")
+        deleted = client.get(url, headers={"If-None-Match": changed.headers["etag"]})
+        
+        assert cached.status_code == 304
+        assert [m["content"] for m in changed.json()["messages"]] == ["First", "Reply"]
+        assert deleted.status_code == 404
+    
+    def test_writes_by_another_worker_change_etags(self, client, setup_test_database):
+        """Test that versions live in the database, so writes outside this process invalidate ETags."""
+        older = db_call(create_session, "Older")
+        session = db_call(create_session, "Written Elsewhere")
+        db_call(save_message, session.id, "user", "First")
+        url = f"/api/chat/sessions/{session.id}/messages"
+        message_etag = client.get(url).headers["etag"]
+        list_etag = client.get("/api/chat/sessions").headers["etag"]
+        
+        # Another worker saves a turn: only the database changes
+        async def save_elsewhere(db):
+            message = make_message(session.id, "assistant", "Reply")
+            await sessions_service._stage_turn(db, session.id, [message], None)
+            await db.commit()
+        
+        db_call(save_elsewhere)
+        changed = client.get(url, headers={"If-None-Match": message_etag})
+        listed = client.get("/api/chat/sessions", headers={"If-None-Match": list_etag})
+        
+        # Deleting a session that is not the newest still changes the list
+        async def delete_elsewhere(db):
+            await db.execute(text("DELETE FROM chat_sessions WHERE id = :id"), {"id": older.id})
+            await db.commit()
+        
+        db_call(delete_elsewhere)
+        after_delete = client.get("/api/chat/sessions", headers={"If-None-Match": listed.headers["etag"]})
+        
+        assert changed.status_code == 200
+        assert [m["content"] for m in changed.json()["messages"]] == ["First", "Reply"]
+        assert listed.status_code == 200
+        assert after_delete.status_code == 200
+        assert older.id not in [s["id"] for s in after_delete.json()["sessions"]]
+    
+    def test_etag_matching(self):
+        """Test weak If-None-Match comparison."""
+        assert etag_matches('"x", W/"y"', '"y"')
+        assert etag_matches("*", 'W/"y"')
+        assert not etag_matches(None, 'W/"y"')
+
+
+class TestSearch:
+    """Test full-text search over messages."""
+    
+    def test_search_returns_ranked_snippets(self, client, setup_test_database):
+        """Test that matches come back with highlighted snippets and their session."""
+        session = db_call(create_session, "Biology Review")
+        db_call(save_message, session.id, "user", "How does photosynthesis turn sunlight into sugar?")
+        db_call(save_message, session.id, "assistant", "What do plants need besides sunlight?")
+        
+        response = client.get("/api/chat/search", params={"q": "sugar photosynth"})
+        
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert len(results) == 1
+        assert results[0]["session_id"] == session.id
+        assert results[0]["session_title"] == "Biology Review"
+        assert "**photosynthesis**" in results[0]["snippet"]
+        
+        # Only the session filter's messages are searched
+        other = db_call(create_session, "Other")
+        data = client.get("/api/chat/search", params={"q": "sunlight", "session_id": other.id}).json()
+        assert data["results"] == []
+    
+    def test_search_pagination(self, client, setup_test_database):
+        """Test walking ranked results with next_offset."""
+        session = db_call(create_session, "Fractions")
+        for i in range(5):
+            db_call(save_message, session.id, "user", f"Quizfraction practice number {i}")
+        
+        seen = []
+        offset = 0
+        while offset is not None:
+            data = client.get("/api/chat/search", params={"q": "quizfraction", "limit": 2, "offset": offset}).json()
+            seen.extend(r["message_id"] for r in data["results"])
+            offset = data["next_offset"]
+        
+        assert len(seen) == len(set(seen)) == 5
+    
+    def test_index_follows_deletes_and_rebuilds(self, client, setup_test_database):
+        """Test that deleted sessions leave the index and a rebuild keeps results."""
+        kept = db_call(create_session, "Kept")
+        dropped = db_call(create_session, "Dropped")
+        db_call(save_message, kept.id, "user", "Volcanoesearch erupt")
+        db_call(save_message, dropped.id, "user", "Volcanoesearch sleep")
+        
+        client.delete(f"/api/chat/sessions/{dropped.id}")
+        
+        async def rebuild():
+            async with engine.begin() as conn:
+                await rebuild_search_index(conn)
+        
+        asyncio.run(rebuild())
+        results = client.get("/api/chat/search", params={"q": "volcanoesearch"}).json()["results"]
+        assert [r["session_id"] for r in results] == [kept.id]
+    
+    def test_query_syntax_is_literal(self, client, setup_test_database):
+        """Test that FTS5 operators in user input cannot break the query."""
+        assert build_match_query('photo* AND "light" (') == '"photo" "AND" "light"*'
+        assert build_match_query("?!") == ""
+        
+        response = client.get("/api/chat/search", params={"q": 'NEAR( "unbalanced'})
+        assert response.status_code == 200
+
+
+class TestRetentionSweeper:
+    """Test batched deletion of expired sessions."""
+    
+    def test_sweep_deletes_only_expired_sessions_in_batches(self, setup_test_database):
+        """Test that sessions past the retention age are deleted batch by batch."""
+        expired = [db_call(create_session, f"Expired {i}").id for i in range(5)]
+        fresh = db_call(create_session, "Fresh").id
+        db_call(save_message, expired[0], "user", "Old homework")
+        
+        async def age_sessions(db):
+            await db.execute(
+                update(ChatSession)
+                .where(ChatSession.id.in_(expired))
+                .values(updated_at=datetime(2000, 1, 1))
+            )
+            await db.commit()
+        
+        db_call(age_sessions)
+        sweeper = RetentionSweeper(engine, max_age_days=3650, batch_size=2, batch_pause_seconds=0)
+        
+        assert asyncio.run(sweeper.sweep()) == 5
+        assert all(db_call(get_session, session_id) is None for session_id in expired)
+        assert db_call(get_session, fresh) is not None
+        assert db_call(get_session_messages, expired[0]) == []
+        assert asyncio.run(sweeper.sweep()) == 0
+
+
+class TestSessionArchive:
+    """Test compressed cold storage of idle sessions."""
+    
+    def test_pack_round_trip(self):
+        """Test that packing is lossless and compresses tutoring text."""
+        messages = [
+            MessageModel(id=f"m{i}", role="assistant", content="Let's think step by step. " * 20,
+                         timestamp=datetime(2024, 1, 1, 10, i))
+            for i in range(10)
+        ]
+        
+        data = pack_messages(messages)
+        restored = unpack_messages("s1", data)
+        
+        assert len(data) < sum(len(m.content) for m in messages) / 10
+        assert [(m.id, m.content, m.timestamp, m.session_id) for m in restored] == [
+            (m.id, m.content, m.timestamp, "s1") for m in messages
+        ]
+    
+    def test_idle_session_archived_and_rehydrated_on_read(self, client, setup_test_database):
+        """Test that idle sessions leave the hot table and come back transparently."""
+        idle = db_call(create_session, "Idle Session")
+        active = db_call(create_session, "Active Session")
+        for content in ["First question", "First answer", "Second question"]:
+            db_call(save_message, idle.id, "user", content)
+        db_call(save_message, active.id, "user", "Still here")
+        
+        async def age_session(db):
+            await db.execute(update(ChatSession).where(ChatSession.id == idle.id).values(updated_at=datetime(2000, 1, 1)))
+            await db.commit()
+        
+        async def hot_rows(db, session_id):
+            return await db.scalar(
+                select(func.count()).select_from(MessageModel).where(MessageModel.session_id == session_id)
+            )
+        
+        db_call(age_session)
+        archiver = SessionArchiver(engine, archive_after_days=3650, batch_pause_seconds=0)
+        
+        assert asyncio.run(archiver.archive_idle()) == 1
+        assert asyncio.run(archiver.archive_idle()) == 0
+        assert db_call(hot_rows, idle.id) == 0
+        assert db_call(hot_rows, active.id) == 1
+        assert db_call(get_session, idle.id).message_count == 3
+        
+        response = client.get(f"/api/chat/sessions/{idle.id}/messages")
+        
+        assert [m["content"] for m in response.json()["messages"]] == [
+            "First question", "First answer", "Second question"
+        ]
+        assert db_call(hot_rows, idle.id) == 3
+        
+        async def archive_row(db):
+            return await db.get(SessionArchive, idle.id)
+        
+        assert db_call(archive_row) is None
+    
+    def test_message_saved_during_archiving_stays_live(self, setup_test_database):
+        """Test that archiving deletes only the messages it packed."""
+        session = db_call(create_session, "Archived Mid-Turn")
+        for content in ["Old question", "Old answer"]:
+            db_call(save_message, session.id, "user", content)
+        late = make_message(session.id, "user", "Arrived while archiving")
+        
+        async def archive_racing_a_write(db):
+            execute = db.execute
+            
+            async def write_before_delete(statement, *args, **kwargs):
+                if getattr(statement, "is_delete", False) and late not in db:
+                    db.add(late)
+                    await db.flush()
+                return await execute(statement, *args, **kwargs)
+            
+            db.execute = write_before_delete
+            return await archive_session(db, session.id)
+        
+        archive = db_call(archive_racing_a_write)
+        
+        assert archive.message_count == 2
+        assert [m.content for m in unpack_messages(session.id, archive.data)] == ["Old question", "Old answer"]
+        assert [m.content for m in db_call(get_session_messages, session.id)] == [
+            "Old question", "Old answer", "Arrived while archiving"
+        ]
+
+
+class TestBulkTransfer:
+    """Test NDJSON export and import of sessions."""
+    
+    def test_export_import_round_trip(self, client, setup_test_database):
+        """Test that exported sessions, archived ones included, import back intact."""
+        hot = db_call(create_session, "Export Hot")
+        cold = db_call(create_session, "Export Cold")
+        for content in ["What is a cell?", "The basic unit of life."]:
+            db_call(save_message, hot.id, "user", content)
+            db_call(save_message, cold.id, "user", content)
+        db_call(archive_session, cold.id)
+        
+        response = client.get("/api/chat/export")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        records = [json.loads(line) for line in response.text.splitlines()]
+        exported = [r for r in records if (r.get("id") if r["type"] == "session" else r["session_id"]) in (hot.id, cold.id)]
+        assert [r["type"] for r in exported] == ["session", "message", "message"] * 2
+        cold_messages = [r["content"] for r in exported if r["type"] == "message" and r["session_id"] == cold.id]
+        assert cold_messages == ["What is a cell?", "The basic unit of life."]
+        
+        db_call(sessions_service.delete_sessions, [hot.id, cold.id])
+        body = "".join(json.dumps(r) + "\n" for r in exported)
+        imported = client.post("/api/chat/import", content=body)
+        again = client.post("/api/chat/import", content=body)
+        
+        assert imported.json() == {"sessions": 2, "messages": 4, "skipped_sessions": 0}
+        assert again.json() == {"sessions": 0, "messages": 0, "skipped_sessions": 2}
+        assert db_call(get_session, hot.id).message_count == 2
+        assert [m.content for m in db_call(get_session_messages, cold.id)] == [
+            "What is a cell?", "The basic unit of life."
+        ]
+    
+    def test_partly_archived_session_reads_its_archive_once(self, setup_test_database):
+        """Test that a session with archived and live messages exports both, fetching the archive once."""
+        session = db_call(create_session, "Partly Archived")
+        for content in ["Archived question", "Archived answer"]:
+            db_call(save_message, session.id, "user", content)
+        db_call(archive_session, session.id)
+        for content in ["Live question", "Live answer", "Live follow-up"]:
+            db_call(save_message, session.id, "user", content)
+        statements = []
+        
+        def record_statements(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        async def export():
+            return "".join([chunk async for chunk in export_sessions(engine, "default", batch_size=2)])
+        
+        event.listen(engine.sync_engine, "before_cursor_execute", record_statements)
+        try:
+            records = [json.loads(line) for line in asyncio.run(export()).splitlines()]
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", record_statements)
+        
+        exported = [r["content"] for r in records if r["type"] == "message" and r["session_id"] == session.id]
+        assert exported == [
+            "Archived question", "Archived answer", "Live question", "Live answer", "Live follow-up"
+        ]
+        # The blob is never joined onto message rows, and is read once for the session
+        assert not any("JOIN messages" in s and "session_archives.data" in s for s in statements)
+        assert len([s for s in statements if "session_archives.data" in s]) == 1
+    
+    def test_export_reads_sessions_in_index_order(self, setup_test_database):
+        """Test that the export query only sorts within sessions, not the whole export."""
+        sql = str(_export_query("default").compile(engine.sync_engine, compile_kwargs={"literal_binds": True}))
+        
+        async def explain(db):
+            return " ".join(str(row[-1]) for row in await db.execute(text("EXPLAIN QUERY PLAN " + sql)))
+        
+        plan = db_call(explain)
+        assert "USING INDEX ix_chat_sessions_tenant_id_updated_at_version" in plan
+        assert "USE TEMP B-TREE FOR RIGHT PART OF ORDER BY" in plan
+    
+    def test_import_small_batches(self, client, setup_test_database):
+        """Test that sessions spanning several insert batches import completely."""
+        lines = []
+        for i in range(3):
+            session_id = f"import-batch-{i}"
+            lines.append({"type": "session", "id": session_id, "title": f"Batch {i}",
+                          "created_at": "2024-01-01T10:00:00", "updated_at": "2024-01-01T10:05:00",
+                          "message_count": 5})
+            lines.extend(
+                {"type": "message", "session_id": session_id, "id": f"{session_id}-m{j}", "role": "user",
+                 "content": f"Message {j}", "timestamp": f"2024-01-01T10:0{j}:00"}
+                for j in range(5)
+            )
+        
+        async def run(db):
+            async def chunks():
+                for line in lines:
+                    yield (json.dumps(line) + "\n").encode()
+            return await import_sessions(db, chunks(), "default", batch_size=2)
+        
+        assert db_call(run) == {"sessions": 3, "messages": 15, "skipped_sessions": 0}
+        assert len(db_call(get_session_messages, "import-batch-2")) == 5
+    
+    def test_import_failing_inside_a_session_can_be_rerun(self, setup_test_database):
+        """Test that a long session cut short by a bad line is not half imported."""
+        session = {"type": "session", "id": "import-long", "title": "Long",
+                   "created_at": "2024-01-01T10:00:00", "updated_at": "2024-01-01T10:10:00",
+                   "message_count": 10}
+        messages = [
+            {"type": "message", "session_id": "import-long", "id": f"import-long-m{j}", "role": "user",
+             "content": f"Message {j}", "timestamp": f"2024-01-01T10:{j:02d}:00"}
+            for j in range(10)
+        ]
+        
+        def run(lines):
+            async def go(db):
+                async def chunks():
+                    for line in lines:
+                        yield line.encode()
+                return await import_sessions(db, chunks(), "default", batch_size=2)
+            return db_call(go)
+        
+        valid = [json.dumps(line) + "\n" for line in [session, *messages]]
+        with pytest.raises(ValueError):
+            run(valid + ["{not json\n"])
+        
+        assert db_call(get_session, "import-long") is None
+        assert run(valid) == {"sessions": 1, "messages": 10, "skipped_sessions": 0}
+        assert len(db_call(get_session_messages, "import-long")) == 10
+    
+    def test_import_rejects_malformed_lines(self, client, setup_test_database):
+        """Test that bad lines and orphaned messages are reported with their line number."""
+        orphan = json.dumps({"type": "message", "session_id": "nope", "id": "x", "role": "user",
+                             "content": "Hi", "timestamp": "2024-01-01T10:00:00"})
+        
+        not_json = client.post("/api/chat/import", content="{not json\n")
+        orphaned = client.post("/api/chat/import", content=orphan + "\n")
+        
+        assert not_json.status_code == 400
+        assert "Line 1" in not_json.json()["detail"]
+        assert orphaned.status_code == 400
+        assert "does not follow" in orphaned.json()["detail"]
+
+
+class TestChatWebSocket:
+    """Test the WebSocket chat channel."""
+    
+    @pytest.fixture(autouse=True)
+    def no_summary_updates(self, monkeypatch):
+        """Summary updates cancelled mid-query at disconnect would outlive the test client's event loop."""
+        async def no_summary(bind, session_id):
+            pass
+        
+        monkeypatch.setattr(chat_api, "update_conversation_summary", no_summary)
+    
+    def receive_turn(self, websocket):
+        """Collect frames until the turn's done (or error) frame."""
+        frames = []
+        while not frames or frames[-1]["type"] not in ("done", "error"):
+            frames.append(websocket.receive_json())
+        return frames
+    
+    def test_turns_send_only_new_message(self, client, setup_test_database):
+        """Test that each turn is acknowledged, streamed and saved against server-side history."""
+        with client.websocket_connect("/api/chat/ws/new") as websocket:
+            websocket.send_json({"type": "message", "content": "What is osmosis?", "client_id": "c1"})
+            first = self.receive_turn(websocket)
+            websocket.send_json({"type": "message", "content": "And diffusion?", "client_id": "c2"})
+            second = self.receive_turn(websocket)
+        
+        ack, done = first[0], first[-1]
+        assert ack["type"] == "ack" and ack["client_id"] == "c1"
+        assert ack["message"]["content"] == "What is osmosis?"
+        assert {frame["type"] for frame in first[1:-1]} == {"token"}
+        assert done["reply_message"]["content"] == "".join(frame["content"] for frame in first[1:-1])
+        assert done["session"]["title"] == "What is osmosis?"
+        assert done["session"]["message_count"] == 2
+        assert second[0]["session_id"] == ack["session_id"]
+        assert second[-1]["session"]["message_count"] == 4
+        assert [m.content for m in db_call(get_session_messages, ack["session_id"])][::2] == [
+            "What is osmosis?", "And diffusion?"
+        ]
+    
+    def test_summary_update_does_not_hold_up_the_next_turn(self, client, setup_test_database, monkeypatch):
+        """Test that summary updates run beside the channel and are cancelled when it closes."""
+        started, cancelled = [], []
+        
+        async def slow_summary(bind, session_id):
+            started.append(session_id)
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.append(session_id)
+                raise
+        
+        monkeypatch.setattr(chat_api, "update_conversation_summary", slow_summary)
+        with client.websocket_connect("/api/chat/ws/new") as websocket:
+            websocket.send_json({"type": "message", "content": "What is torque?"})
+            first = self.receive_turn(websocket)
+            websocket.send_json({"type": "message", "content": "And a moment?"})
+            second = self.receive_turn(websocket)
+        
+        assert second[-1]["type"] == "done"
+        assert started == [first[0]["session_id"]] * 2
+        assert cancelled == started
+    
+    def test_failed_first_turn_keeps_its_session(self, client, setup_test_database, monkeypatch):
+        """Test that a turn retried after the first reply failed goes to the session that turn created."""
+        original = chat_api.stream_response
+        calls = []
+        
+        def fail_once(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                raise RuntimeError("provider down")
+            return original(*args, **kwargs)
+        
+        monkeypatch.setattr(chat_api, "stream_response", fail_once)
+        with client.websocket_connect("/api/chat/ws/new") as websocket:
+            websocket.send_json({"type": "message", "content": "What is a lever?", "client_id": "c1"})
+            failed = self.receive_turn(websocket)
+            websocket.send_json({"type": "message", "content": "What is a lever?", "client_id": "c2"})
+            retried = self.receive_turn(websocket)
+        
+        session_id = failed[0]["session_id"]
+        assert failed[-1]["type"] == "error"
+        assert retried[0]["session_id"] == session_id
+        assert retried[-1]["session"]["message_count"] == 3
+        assert [s.id for s in db_call(list_sessions) if s.title == "What is a lever?"] == [session_id]
+    
+    def test_existing_session_metadata_ping_and_bad_frames(self, client, setup_test_database):
+        """Test the greeting, keepalive and error frames."""
+        session = db_call(create_session, "Socket Session")
+        
+        with client.websocket_connect(f"/api/chat/ws/{session.id}") as websocket:
+            greeting = websocket.receive_json()
+            websocket.send_json({"type": "ping"})
+            pong = websocket.receive_json()
+            websocket.send_text("not json")
+            invalid = websocket.receive_json()
+        
+        assert greeting["type"] == "session" and greeting["session"]["id"] == session.id
+        assert pong == {"type": "pong"}
+        assert invalid["type"] == "error"
+    
+    def test_unknown_session_closes(self, client, setup_test_database):
+        """Test that connecting to a missing session reports it and closes."""
+        with client.websocket_connect("/api/chat/ws/missing-session") as websocket:
+            error = websocket.receive_json()
+            with pytest.raises(WebSocketDisconnect) as closed:
+                websocket.receive_json()
+        
+        assert "not found" in error["detail"]
+        assert closed.value.code == 4404
+
+
+class TestGroupCommit:
+    """Test batching of concurrent writes into shared commits."""
+    
+    def test_concurrent_writes_share_one_commit(self, setup_test_database):
+        """Test that writes submitted together are committed in one batch."""
+        session = db_call(create_session, "Group Commit")
+        writer = GroupCommitWriter(engine, max_batch=64, max_delay_seconds=0.01)
+        
+        async def write(i):
+            message = make_message(session.id, "user", f"Message {i}")
+            
+            async def stage(db):
+                db.add(message)
+                return message.id
+            
+            return await writer.submit(stage)
+        
+        async def scenario():
+            return await asyncio.gather(*(write(i) for i in range(10)))
+        
+        ids = asyncio.run(scenario())
+        
+        assert writer.batches == 1
+        assert writer.writes == 10
+        assert {m.id for m in db_call(get_session_messages, session.id)} == set(ids)
+    
+    def test_failed_write_does_not_fail_batch(self, setup_test_database):
+        """Test that one failing write is isolated from the rest of its batch."""
+        session = db_call(create_session, "Group Commit Failure")
+        writer = GroupCommitWriter(engine, max_batch=64, max_delay_seconds=0.01)
+        
+        async def good(db):
+            db.add(make_message(session.id, "user", "Saved"))
+        
+        async def bad(db):
+            raise RuntimeError("bad write")
+        
+        async def scenario():
+            return await asyncio.gather(
+                writer.submit(good), writer.submit(bad), writer.submit(good),
+                return_exceptions=True
+            )
+        
+        results = asyncio.run(scenario())
+        
+        assert isinstance(results[1], RuntimeError)
+        assert results[0] is None and results[2] is None
+        assert writer.fallbacks == 1
+        assert len(db_call(get_session_messages, session.id)) == 2
+    
+    def test_chat_endpoint_with_group_commit(self, client, setup_test_database, monkeypatch):
+        """Test that a chat turn is persisted through the group-commit writer."""
+        monkeypatch.setattr(settings, "group_commit_enabled", True)
+        
+        response = client.post("/api/chat/", json={
+            "messages": [{"id": "msg-gc", "role": "user", "content": "Explain fractions"}]
+        })
+        
+        assert response.status_code == 200
+        session_id = response.json()["session_id"]
+        assert db_call(get_session, session_id).message_count == 2
+        assert [m.role for m in db_call(get_session_messages, session_id)] == ["user", "assistant"]
+
+
+class TestMigrations:
+    """Test schema upgrades of existing databases."""
+    
+    def test_session_stats_backfill(self, tmp_path):
+        """Test that stats columns are added and backfilled on an old schema."""
+        old_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with old_engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE chat_sessions (id VARCHAR PRIMARY KEY, title VARCHAR NOT NULL, "
+                "created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL)"
+            ))
+            conn.execute(text(
+                "CREATE TABLE messages (id VARCHAR PRIMARY KEY, session_id VARCHAR NOT NULL, "
+                "role VARCHAR NOT NULL, content TEXT NOT NULL, timestamp DATETIME NOT NULL)"
+            ))
+            conn.execute(text("INSERT INTO chat_sessions VALUES ('s1', 'Old', '2024-01-01', '2024-01-01')"))
+            conn.execute(text("INSERT INTO messages VALUES ('m1', 's1', 'user', 'First', '2024-01-01 10:00:00')"))
+            conn.execute(text("INSERT INTO messages VALUES ('m2', 's1', 'assistant', 'Latest reply', '2024-01-01 10:01:00')"))
+        
+        with old_engine.begin() as conn:
+            assert upgrade_session_stats(conn) is True
+        with old_engine.begin() as conn:
+            assert upgrade_session_stats(conn) is False
+        
+        with old_engine.connect() as conn:
+            row = conn.execute(text(
+                "SELECT message_count, last_message_preview, last_message_at FROM chat_sessions"
+            )).one()
+        assert row[0] == 2
+        assert row[1] == "Latest reply"
+        assert row[2].startswith("2024-01-01 10:01:00")
+    
+    def test_versioned_migrations_add_indexes_once(self, tmp_path):
+        """Test that pending migrations run once, in order, and index per-session reads."""
+        old_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with old_engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE chat_sessions (id VARCHAR PRIMARY KEY, title VARCHAR NOT NULL, "
+                "created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL)"
+            ))
+            conn.execute(text(
+                "CREATE TABLE messages (id VARCHAR PRIMARY KEY, session_id VARCHAR NOT NULL, "
+                "role VARCHAR NOT NULL, content TEXT NOT NULL, timestamp DATETIME NOT NULL)"
+            ))
+            conn.execute(text("INSERT INTO chat_sessions VALUES ('s1', 'Old', '2024-01-01', '2024-01-01')"))
+            conn.execute(text("INSERT INTO messages VALUES ('m1', 's1', 'user', 'Kept', '2024-01-01 10:00:00')"))
+            conn.execute(text("INSERT INTO messages VALUES ('m2', 'gone', 'user', 'Orphan', '2024-01-01 10:00:00')"))
+        
+        with old_engine.begin() as conn:
+            assert apply_migrations(conn) == [version for version, name, upgrade in MIGRATIONS]
+            assert conn.execute(text("SELECT id FROM messages")).scalars().all() == ["m1"]
+            foreign_key = inspect(conn).get_foreign_keys("messages")[0]
+            assert foreign_key["options"]["ondelete"] == "CASCADE"
+        with old_engine.begin() as conn:
+            assert apply_migrations(conn) == []
+            assert applied_versions(conn) == [version for version, name, upgrade in MIGRATIONS]
+            plan = " ".join(str(row[-1]) for row in conn.execute(text(
+                "EXPLAIN QUERY PLAN SELECT * FROM messages WHERE session_id = 's1' ORDER BY timestamp"
+            )))
+        
+            list_plan = " ".join(str(row[-1]) for row in conn.execute(text(
+                "EXPLAIN QUERY PLAN SELECT count(*), max(updated_at), sum(version) "
+                "FROM chat_sessions WHERE tenant_id = 'default'"
+            )))
+        
+        assert "USING INDEX ix_messages_session_id_timestamp" in plan
+        assert "USING COVERING INDEX ix_chat_sessions_tenant_id_updated_at_version" in list_plan
+
+
+class TestDatabaseConfig:
+    """Test engine construction from DATABASE_URL."""
+    
+    def test_urls_map_to_async_drivers(self):
+        """Test that sync-style URLs from .env files use the async drivers."""
+        assert async_database_url("sqlite:///./data/neuro_tutor.db").drivername == "sqlite+aiosqlite"
+        assert async_database_url("postgresql://u:p@db/neuro").drivername == "postgresql+asyncpg"
+        assert async_database_url("postgres://u:p@db/neuro").drivername == "postgresql+asyncpg"
+        with pytest.raises(ValueError):
+            async_database_url("mysql://u:p@db/neuro")
+    
+    def test_server_database_pool_options(self, monkeypatch):
+        """Test that pool and statement-timeout settings reach PostgreSQL engines."""
+        monkeypatch.setattr(settings, "db_pool_size", 7)
+        monkeypatch.setattr(settings, "db_statement_timeout_ms", 2500)
+        
+        options = engine_options(async_database_url("postgresql://u:p@db/neuro"))
+        
+        assert options["pool_size"] == 7
+        assert options["pool_pre_ping"] is True
+        assert options["connect_args"]["server_settings"]["statement_timeout"] == "2500"
+    
+    def test_sqlite_directory_created(self, tmp_path):
+        """Test that a SQLite URL in a missing directory works (as in docker-compose)."""
+        sqlite_engine = build_engine(f"sqlite:///{tmp_path / 'data' / 'neuro_tutor.db'}")
+        
+        async def scenario():
+            await create_tables(sqlite_engine)
+            await sqlite_engine.dispose()
+        
+        asyncio.run(scenario())
+        assert (tmp_path / "data" / "neuro_tutor.db").exists()
+    
+    @pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+    def test_postgres_round_trip(self):
+        """Test sessions and turns against a local PostgreSQL instance."""
+        pg_engine = build_engine(os.environ["TEST_POSTGRES_URL"])
+        
+        async def scenario():
+            await create_tables(pg_engine)
+            try:
+                async with async_sessionmaker(bind=pg_engine, expire_on_commit=False)() as db:
+                    session = await create_session(db, "Postgres Session")
+                    await save_message(db, session.id, "user", "Hello from Postgres")
+                    saved = await get_session(db, session.id)
+                    messages = await get_session_messages(db, session.id)
+                return saved.message_count, [m.content for m in messages]
+            finally:
+                async with pg_engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.drop_all)
+                await pg_engine.dispose()
+        
+        assert asyncio.run(scenario()) == (1, ["Hello from Postgres"])
+
+
+def make_shards(tmp_path, names):
+    """Migrated SQLite shard engines in a temporary directory."""
+    shards = {}
+    for name in names:
+        shard_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db", poolclass=NullPool)
+        apply_sqlite_profile(shard_engine)
+        asyncio.run(create_tables(shard_engine))
+        asyncio.run(run_migrations(shard_engine))
+        shards[name] = shard_engine
+    return shards
+
+
+def seed_tenant_session(bind, tenant_id, title):
+    """Create a session with one message for a tenant on a shard."""
+    async def run():
+        async with session_for(bind) as db:
+            db.info["tenant_id"] = tenant_id
+            session = await create_session(db, title)
+            await save_message(db, session.id, "user", f"Hello from {tenant_id}")
+            return session.id
+    return asyncio.run(run())
+
+
+def shard_session_ids(bind):
+    """Session ids on a shard, by tenant."""
+    async def run():
+        async with session_for(bind) as db:
+            return {(s.tenant_id, s.id) for s in await list_sessions(db)}
+    return asyncio.run(run())
+
+
+class TestSharding:
+    """Test per-tenant shard routing, cross-shard listing and rebalancing."""
+    
+    def test_parse_shard_urls(self):
+        """Test named and unnamed shard entries."""
+        shards = parse_shard_urls("a=sqlite:///./a.db, sqlite:///./b.db")
+        
+        assert shards == {"a": "sqlite:///./a.db", "shard1": "sqlite:///./b.db"}
+        assert parse_shard_urls("") == {}
+        with pytest.raises(ValueError):
+            parse_shard_urls("a=sqlite:///./a.db,a=sqlite:///./b.db")
+    
+    def test_adding_shard_only_moves_tenants_to_it(self):
+        """Test that rendezvous hashing keeps tenants in place unless the new shard wins."""
+        tenants = [f"school-{i}" for i in range(200)]
+        before = ShardRouter({"s0": None, "s1": None})
+        after = ShardRouter({"s0": None, "s1": None, "s2": None})
+        
+        moved = [t for t in tenants if before.shard_for(t) != after.shard_for(t)]
+        
+        assert all(after.shard_for(t) == "s2" for t in moved)
+        assert 30 < len(moved) < 110
+        assert {before.shard_for(t) for t in tenants} == {"s0", "s1"}
+    
+    def test_requests_routed_by_tenant_header(self, client, tmp_path):
+        """Test that get_db opens only the tenant's own shard."""
+        shards = make_shards(tmp_path, ["s0", "s1"])
+        router = ShardRouter(shards)
+        tenant_a = next(t for t in (f"school-{i}" for i in range(100)) if router.shard_for(t) == "s0")
+        tenant_b = next(t for t in (f"school-{i}" for i in range(100)) if router.shard_for(t) == "s1")
+        session_a = seed_tenant_session(shards["s0"], tenant_a, "A")
+        session_b = seed_tenant_session(shards["s1"], tenant_b, "B")
+        # A session left on the wrong shard, as mid-rebalance, is not listed
+        seed_tenant_session(shards["s1"], tenant_a, "A stray")
+        
+        test_override = app.dependency_overrides.pop(get_db)
+        app.dependency_overrides[get_shard_router] = lambda: router
+        try:
+            own = client.get("/api/chat/sessions", headers={settings.tenant_header: tenant_a})
+            other = client.get(
+                f"/api/chat/sessions/{session_b}/messages", headers={settings.tenant_header: tenant_b}
+            )
+            invalid = client.get("/api/chat/sessions", headers={settings.tenant_header: "bad tenant!"})
+        finally:
+            app.dependency_overrides[get_db] = test_override
+            del app.dependency_overrides[get_shard_router]
+        
+        assert [s["id"] for s in own.json()["sessions"]] == [session_a]
+        assert other.status_code == 200
+        assert other.json()["messages"][0]["content"] == f"Hello from {tenant_b}"
+        assert invalid.status_code == 400
+    
+    def test_other_tenant_cannot_reach_session(self, client, setup_test_database):
+        """Test that sessions on a shared shard are invisible to other tenants."""
+        session_id = seed_tenant_session(engine, "schoolA", "School A Session")
+        school_a = {settings.tenant_header: "schoolA"}
+        school_b = {settings.tenant_header: "schoolB"}
+        
+        search = client.get("/api/chat/search", params={"q": "schoolA"}, headers=school_b)
+        messages = client.get(f"/api/chat/sessions/{session_id}/messages", headers=school_b)
+        deleted = client.delete(f"/api/chat/sessions/{session_id}", headers=school_b)
+        bulk = client.post("/api/chat/sessions/delete", json={"session_ids": [session_id]}, headers=school_b)
+        with client.websocket_connect(f"/api/chat/ws/{session_id}", headers=school_b) as websocket:
+            socket_error = websocket.receive_json()
+        
+        assert search.json()["results"] == []
+        assert messages.status_code == 404
+        assert deleted.status_code == 404
+        assert bulk.json() == {"deleted": 0}
+        assert "not found" in socket_error["detail"]
+        
+        own_search = client.get("/api/chat/search", params={"q": "schoolA"}, headers=school_a)
+        own_messages = client.get(f"/api/chat/sessions/{session_id}/messages", headers=school_a)
+        
+        assert [r["session_id"] for r in own_search.json()["results"]] == [session_id]
+        assert [m["content"] for m in own_messages.json()["messages"]] == ["Hello from schoolA"]
+    
+    def test_rebalance_moves_tenants_to_new_shard(self, tmp_path):
+        """Test that rebalancing after adding a shard moves sessions and their messages."""
+        shards = make_shards(tmp_path, ["s0", "s1"])
+        tenants = [f"school-{i}" for i in range(6)]
+        for tenant_id in tenants:
+            seed_tenant_session(shards["s0"], tenant_id, tenant_id)
+            seed_tenant_session(shards["s0"], tenant_id, tenant_id)
+        router = ShardRouter(shards)
+        expected_moves = 2 * sum(router.shard_for(t) == "s1" for t in tenants)
+        
+        dry_run = asyncio.run(rebalance(router, batch_size=1, dry_run=True))
+        moves = asyncio.run(rebalance(router, batch_size=1))
+        
+        assert dry_run == moves == {"s0->s1": expected_moves}
+        for name, shard_engine in shards.items():
+            assert {tenant_id for tenant_id, session_id in shard_session_ids(shard_engine)} == {
+                t for t in tenants if router.shard_for(t) == name
+            }
+        moved_tenant = next(t for t in tenants if router.shard_for(t) == "s1")
+        
+        async def moved_messages():
+            async with session_for(shards["s1"]) as db:
+                sessions = [s for s in await list_sessions(db, tenant_id=moved_tenant)]
+                return [m.content for m in await get_session_messages(db, sessions[0].id)]
+        
+        assert asyncio.run(moved_messages()) == [f"Hello from {moved_tenant}"]
+        assert asyncio.run(rebalance(router)) == {}
+
+
+class TestSQLiteProfile:
+    """Test the SQLite connection profile and WAL checkpoints."""
+    
+    def test_pragmas_applied_and_checkpoint_reports_wal(self, tmp_path):
+        """Test that connections use WAL and a checkpoint reports the WAL size."""
+        wal_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'wal.db'}", poolclass=AsyncAdaptedQueuePool
+        )
+        apply_sqlite_profile(wal_engine)
+        checkpointer = WalCheckpointer(wal_engine)
+        
+        async def scenario():
+            async with wal_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                journal_mode = (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar()
+                busy_timeout = (await conn.exec_driver_sql("PRAGMA busy_timeout")).scalar()
+            result = await checkpointer.checkpoint()
+            await wal_engine.dispose()
+            return journal_mode, busy_timeout, result
+        
+        journal_mode, busy_timeout, result = asyncio.run(scenario())
+        
+        assert journal_mode == "wal"
+        assert busy_timeout == settings.sqlite_busy_timeout_ms
+        assert result["busy"] == 0
+        assert result["checkpointed_frames"] == result["log_frames"]
+        assert result["wal_bytes"] > 0
+        assert checkpointer.stats()["checkpoints"] == 1
+
+
+class TestConversationSummary:
+    """Test rolling conversation summaries."""
+    
+    def test_summary_replaces_old_turns(self, setup_test_database, monkeypatch):
+        """Test that old turns are folded into the summary once past the threshold."""
+        async def fake_summarize(previous_summary, messages):
+            return f"Covered {len(messages)} messages"
+        
+        monkeypatch.setattr(llm_client, "summarize_conversation", fake_summarize)
+        
+        async def scenario():
+            async with TestingSessionLocal() as db:
+                session = await create_session(db, "Marathon Homework")
+                for i in range(32):
+                    await save_message(db, session.id, "user" if i % 2 == 0 else "assistant", f"Turn {i}")
+                
+                assert await refresh_conversation_summary(db, session.id) is True
+                # Threshold not reached again until more messages arrive
+                assert await refresh_conversation_summary(db, session.id) is False
+                
+                history = [
+                    Message(id=m.id, role=m.role, content=m.content, timestamp=m.timestamp)
+                    for m in await get_session_messages(db, session.id)
+                ]
+                return await apply_summary(db, session.id, history)
+        
+        remaining, summary = asyncio.run(scenario())
+        
+        assert summary == "Covered 22 messages"
+        assert [m.content for m in remaining] == [f"Turn {i}" for i in range(22, 32)]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,551 @@
+"""
+Tests for the OpenRouter LLM client service.
+"""
+
+import pytest
+import asyncio
+import json
+import httpx
+from fastapi.testclient import TestClient
+
+from app import main as main_module
+from app.main import app
+from app.core.config import settings
+from app.core.db import build_shard_router
+from app.models.chat import Message, Preferences
+from app.services.concurrency import AdaptiveConcurrencyLimiter, LimiterRejected, parse_retry_after
+from app.services.context_window import ContextWindowBuilder, estimate_tokens
+from app.services.latency import LatencyTracker
+from app.services.llm_client import OpenRouterClient, llm_client
+from app.services.resilience import CircuitBreaker, CircuitOpenError
+from app.services.response_cache import ResponseCache
+from app.tools.mock_openrouter import DEFAULT_REPLIES, MockOpenRouter, MockProfile, create_mock_app
+
+
+class TestConnectionPool:
+    """Test the shared OpenRouter HTTP connection pool."""
+    
+    def test_http_client_is_reused(self):
+        """Test that repeated access returns the same pooled client."""
+        client = OpenRouterClient()
+        
+        first = client.http_client
+        second = client.http_client
+        
+        assert first is second
+        asyncio.run(client.aclose())
+    
+    def test_lifespan_opens_and_closes_pool(self, tmp_path, monkeypatch):
+        """Test that application lifespan manages the shared client."""
+        # Start up against a throwaway database instead of DATABASE_URL
+        monkeypatch.setattr(settings, "database_url", f"sqlite:///{tmp_path / 'lifespan.db'}")
+        monkeypatch.setattr(settings, "shard_urls", "")
+        router = build_shard_router()
+        monkeypatch.setattr(main_module, "shard_router", router)
+        monkeypatch.setattr(main_module, "maintenance", {name: {} for name in router.names})
+        
+        with TestClient(app):
+            assert llm_client._http_client is not None
+            assert not llm_client._http_client.is_closed
+        
+        assert llm_client._http_client is None
+
+
+class TestStreaming:
+    """Test streaming completions from OpenRouter."""
+    
+    def test_stream_parses_sse_chunks(self):
+        """Test that content deltas are yielded and control lines skipped."""
+        body = (
+            ": OPENROUTER PROCESSING\n\n"
+            'data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n'
+            'data: {"choices": [{"delta": {"content": "What do "}}]}\n\n'
+            'data: {"choices": [{"delta": {"content": "you think?"}}]}\n\n'
+            "data: [DONE]\n\n"
+        )
+        
+        def handler(request):
+            assert json.loads(request.content)["stream"] is True
+            return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+        
+        client = OpenRouterClient()
+        client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        
+        async def collect():
+            tokens = [token async for token in client._stream_openrouter_api([], "test/model", 0.7, 100)]
+            await client.aclose()
+            return tokens
+        
+        assert asyncio.run(collect()) == ["What do ", "you think?"]
+
+
+def completion_response(content):
+    """Build an OpenRouter-style non-streaming completion response."""
+    return httpx.Response(200, json={"choices": [{"message": {"role": "assistant", "content": content}}]})
+
+
+def make_client(handler):
+    """Create an OpenRouterClient with a configured key and a mocked transport."""
+    client = OpenRouterClient()
+    client.api_key = "test-key"
+    client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+class TestResponseCache:
+    """Test the exact-match LLM response cache."""
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = ResponseCache(max_entries=2)
+        
+        async def scenario():
+            await cache.set("a", "A")
+            await cache.set("b", "B")
+            await cache.get("a")
+            await cache.set("c", "C")
+            return await cache.get("a"), await cache.get("b"), await cache.get("c")
+        
+        assert asyncio.run(scenario()) == ("A", None, "C")
+        assert cache.stats()["evictions"] == 1
+    
+    def test_ttl_expiry(self):
+        """Test that expired entries are treated as misses."""
+        cache = ResponseCache(ttl_seconds=0)
+        
+        async def scenario():
+            await cache.set("a", "A")
+            return await cache.get("a")
+        
+        assert asyncio.run(scenario()) is None
+        assert cache.stats()["misses"] == 1
+    
+    def test_persistent_tier_survives_restart(self, tmp_path):
+        """Test that the SQLite tier serves entries to a fresh cache."""
+        path = str(tmp_path / "cache.db")
+        first = ResponseCache(sqlite_path=path)
+        asyncio.run(first.set("key", "value"))
+        first.close()
+        
+        second = ResponseCache(sqlite_path=path)
+        assert asyncio.run(second.get("key")) == "value"
+        assert second.stats()["persistent_hits"] == 1
+        second.close()
+    
+    def test_generate_response_uses_cache(self):
+        """Test that identical requests hit OpenRouter once unless bypassed."""
+        calls = []
+        
+        def handler(request):
+            calls.append(request)
+            return completion_response("What do you already know?")
+        
+        client = make_client(handler)
+        client.response_cache = ResponseCache()
+        messages = [Message(id="m1", role="user", content="Explain fractions")]
+        
+        async def scenario():
+            first = await client.generate_response(messages, Preferences())
+            second = await client.generate_response(messages, Preferences())
+            await client.generate_response(messages, Preferences(), use_cache=False)
+            await client.aclose()
+            return first, second
+        
+        first, second = asyncio.run(scenario())
+        
+        assert len(calls) == 2
+        assert first["reply_message"].content == second["reply_message"].content
+        assert first["reply_message"].id != second["reply_message"].id
+        assert client.response_cache.stats()["hits"] == 1
+
+
+class TestSingleFlight:
+    """Test coalescing of identical in-flight requests."""
+    
+    def test_concurrent_identical_requests_share_one_call(self):
+        """Test that a burst of identical prompts makes one upstream call."""
+        calls = []
+        
+        async def handler(request):
+            calls.append(request)
+            await asyncio.sleep(0.05)
+            return completion_response("Which part feels tricky?")
+        
+        client = make_client(handler)
+        client.response_cache = None
+        messages = [Message(id="m1", role="user", content="Help with algebra")]
+        
+        async def scenario():
+            results = await asyncio.gather(*[
+                client.generate_response(messages, Preferences(), session_id=f"s{i}")
+                for i in range(10)
+            ])
+            await client.aclose()
+            return results
+        
+        results = asyncio.run(scenario())
+        
+        assert len(calls) == 1
+        assert client.single_flight.coalesced == 9
+        assert len({r["reply_message"].id for r in results}) == 10
+        assert {r["reply_message"].content for r in results} == {"Which part feels tricky?"}
+
+
+class TestContextWindow:
+    """Test token-budget-aware context windowing."""
+    
+    def make_history(self, count, size=400):
+        return [
+            Message(id=f"m{i}", role="user" if i % 2 == 0 else "assistant", content=str(i) * size)
+            for i in range(count)
+        ]
+    
+    def test_keeps_newest_messages_within_budget(self):
+        """Test that the oldest turns are dropped once the budget is spent."""
+        builder = ContextWindowBuilder(default_budget=1000)
+        history = self.make_history(20)
+        
+        window = builder.select(history, "system", "any/model", max_tokens=500)
+        
+        assert 0 < len(window) < len(history)
+        assert window == history[-len(window):]
+        used = sum(builder.message_tokens(m) for m in window) + estimate_tokens("system")
+        assert used <= 1000 - 500
+    
+    def test_per_model_budget(self):
+        """Test that a model-specific budget overrides the default."""
+        builder = ContextWindowBuilder(default_budget=1000, model_budgets={"big/model": 100000})
+        history = self.make_history(20)
+        
+        assert builder.select(history, "system", "big/model", max_tokens=500) == history
+    
+    def test_latest_message_always_kept(self):
+        """Test that an oversized latest message is still sent."""
+        builder = ContextWindowBuilder(default_budget=100)
+        history = self.make_history(3, size=5000)
+        
+        assert builder.select(history, "system", "any/model", max_tokens=50) == history[-1:]
+
+
+class TestHedging:
+    """Test hedged requests and latency-based failover."""
+    
+    def enable_hedging(self, monkeypatch):
+        monkeypatch.setattr(settings, "hedge_enabled", True)
+        monkeypatch.setattr(settings, "hedge_secondary_model", "backup/model")
+        monkeypatch.setattr(settings, "hedge_initial_delay_seconds", 0.05)
+    
+    def test_slow_primary_is_hedged(self, monkeypatch):
+        """Test that the secondary model answers when the primary is slow."""
+        self.enable_hedging(monkeypatch)
+        
+        async def handler(request):
+            model = json.loads(request.content)["model"]
+            if model == "primary/model":
+                await asyncio.sleep(1)
+            return completion_response(f"from {model}")
+        
+        client = make_client(handler)
+        
+        async def scenario():
+            result = await client._call_with_hedging([], "primary/model", 0.7, 100)
+            await client.aclose()
+            return result
+        
+        assert asyncio.run(scenario()) == "from backup/model"
+        assert client.hedges_sent == 1
+        assert client.hedge_wins == 1
+    
+    def test_fast_primary_is_not_hedged(self, monkeypatch):
+        """Test that no hedge is sent when the primary answers in time."""
+        self.enable_hedging(monkeypatch)
+        client = make_client(lambda request: completion_response("from primary"))
+        
+        async def scenario():
+            result = await client._call_with_hedging([], "primary/model", 0.7, 100)
+            await client.aclose()
+            return result
+        
+        assert asyncio.run(scenario()) == "from primary"
+        assert client.hedges_sent == 0
+        assert client.latency.stats()["primary/model"]["samples"] == 1
+    
+    def test_cancelled_primaries_keep_threshold_stable(self, monkeypatch):
+        """Test that primaries cancelled by a hedge still count, so fast calls are not hedged."""
+        self.enable_hedging(monkeypatch)
+        monkeypatch.setattr(settings, "hedge_percentile", 0.9)
+        monkeypatch.setattr(settings, "hedge_initial_delay_seconds", 0.1)
+        monkeypatch.setattr(settings, "hedge_min_delay_seconds", 0.0)
+        monkeypatch.setattr(settings, "hedge_max_delay_seconds", 0.1)
+        calls = 0
+        
+        async def handler(request):
+            nonlocal calls
+            if json.loads(request.content)["model"] == "primary/model":
+                calls += 1
+                # Every fifth primary call is far slower than the hedge threshold
+                await asyncio.sleep(0.5 if calls % 5 == 0 else 0.005)
+            return completion_response("answer")
+        
+        client = make_client(handler)
+        client.latency = LatencyTracker(window_size=20, min_samples=10)
+        
+        async def scenario():
+            for _ in range(30):
+                await client._call_with_hedging([], "primary/model", 0.7, 100)
+            await client.aclose()
+        
+        asyncio.run(scenario())
+        assert client.hedges_sent == 6
+        assert client._hedge_delay("primary/model") == 0.1
+    
+    def test_hedge_delay_follows_rolling_percentile(self, monkeypatch):
+        """Test that the hedge threshold adapts to observed latency."""
+        client = OpenRouterClient()
+        for _ in range(settings.latency_min_samples):
+            client.latency.record("primary/model", 2.5)
+        
+        assert client._hedge_delay("primary/model") == 2.5
+        assert client._hedge_delay("unseen/model") == settings.hedge_initial_delay_seconds
+
+
+class TestConcurrencyLimiter:
+    """Test the adaptive outbound concurrency limiter."""
+    
+    def test_excess_callers_queue_until_slot_frees(self):
+        """Test that no more than the limit run at once."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+        peak = 0
+        
+        async def call():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+        
+        async def scenario():
+            await asyncio.gather(*[call() for _ in range(6)])
+        
+        asyncio.run(scenario())
+        assert peak == 2
+        assert limiter.stats()["in_flight"] == 0
+        assert limiter.stats()["queue_depth"] == 0
+    
+    def test_bounded_wait_rejects(self):
+        """Test that waiting callers are rejected after the maximum wait."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1, max_wait_seconds=0.02)
+        
+        async def scenario():
+            await limiter.acquire()
+            with pytest.raises(LimiterRejected):
+                await limiter.acquire()
+        
+        asyncio.run(scenario())
+        assert limiter.rejected == 1
+    
+    def test_429_cuts_limit_and_honours_retry_after(self):
+        """Test multiplicative decrease and the Retry-After pause."""
+        client = make_client(lambda request: httpx.Response(429, headers={"Retry-After": "30"}))
+        client.limiter = AdaptiveConcurrencyLimiter(initial_limit=16)
+        
+        async def scenario():
+            with pytest.raises(httpx.HTTPStatusError):
+                await client._call_openrouter_api([], "test/model", 0.7, 100)
+            await client.aclose()
+        
+        asyncio.run(scenario())
+        stats = client.limiter.stats()
+        assert stats["limit"] == 8
+        assert stats["paused_for_seconds"] > 25
+    
+    def test_parse_retry_after(self):
+        """Test both Retry-After formats."""
+        assert parse_retry_after("12") == 12.0
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+
+class TestResilience:
+    """Test retries and the provider circuit breaker."""
+    
+    def test_transient_5xx_is_retried(self):
+        """Test that a transient 503 is retried and then succeeds."""
+        statuses = [503, 200]
+        
+        def handler(request):
+            status_code = statuses.pop(0)
+            if status_code != 200:
+                return httpx.Response(status_code)
+            return completion_response("Let's try again together.")
+        
+        client = make_client(handler)
+        client.retry_policy.base_delay_seconds = 0.001
+        client.retry_policy.max_delay_seconds = 0.001
+        
+        async def scenario():
+            result = await client._call_with_retries([], "test/model", 0.7, 100)
+            await client.aclose()
+            return result
+        
+        assert asyncio.run(scenario()) == "Let's try again together."
+        assert client.retry_policy.retries == 1
+        assert client.breaker.state == CircuitBreaker.CLOSED
+    
+    def test_client_errors_are_not_retried(self):
+        """Test that a 400 fails immediately without retries."""
+        calls = []
+        
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(400)
+        
+        client = make_client(handler)
+        
+        async def scenario():
+            with pytest.raises(httpx.HTTPStatusError):
+                await client._call_with_retries([], "test/model", 0.7, 100)
+            await client.aclose()
+        
+        asyncio.run(scenario())
+        assert len(calls) == 1
+    
+    def test_breaker_opens_and_fails_fast(self):
+        """Test that repeated failures open the breaker and later calls skip the provider."""
+        calls = []
+        
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(500)
+        
+        client = make_client(handler)
+        client.response_cache = None
+        client.retry_policy.max_attempts = 1
+        client.breaker.failure_threshold = 2
+        messages = [Message(id="m1", role="user", content="Explain gravity")]
+        
+        async def scenario():
+            for _ in range(4):
+                result = await client.generate_response(messages, Preferences())
+            await client.aclose()
+            return result
+        
+        result = asyncio.run(scenario())
+        
+        assert len(calls) == 2
+        assert client.breaker.state == CircuitBreaker.OPEN
+        assert client.breaker.stats()["rejected"] == 2
+        assert "hiccup" in result["reply_message"].content
+    
+    def test_half_open_probe_closes_breaker(self):
+        """Test that a successful probe after the reset timeout closes the breaker."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=0)
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+    def test_disconnect_during_half_open_probe_releases_it(self):
+        """Test that a stream closed mid-probe lets the next call probe again."""
+        body = (
+            'data: {"choices": [{"delta": {"content": "Let\'s "}}]}\n\n'
+            'data: {"choices": [{"delta": {"content": "think."}}]}\n\n'
+            "data: [DONE]\n\n"
+        )
+        client = make_client(lambda request: httpx.Response(
+            200, text=body, headers={"content-type": "text/event-stream"}
+        ))
+        client.response_cache = None
+        client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=0)
+        client.breaker.record_failure()
+        messages = [Message(id="m1", role="user", content="Explain gravity")]
+        
+        async def scenario():
+            stream = client.stream_response(messages, Preferences())
+            first = await stream.__anext__()
+            assert client.breaker.state == CircuitBreaker.HALF_OPEN
+            await stream.aclose()  # client disconnected
+            
+            tokens = [token async for token in client.stream_response(messages, Preferences())]
+            await client.aclose()
+            return first, tokens
+        
+        first, tokens = asyncio.run(scenario())
+        
+        assert first == "Let's "
+        assert tokens == ["Let's ", "think."]
+        assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+class TestMockOpenRouter:
+    """Test the local mock OpenRouter server against the real client."""
+    
+    def make_mock_client(self, **profile):
+        defaults = {"latency": "fixed", "latency_ms": 0, "tokens_per_second": 0, "seed": 7}
+        defaults.update(profile)
+        mock_app = create_mock_app(MockProfile(**defaults))
+        client = OpenRouterClient()
+        client.api_key = "test-key"
+        client.base_url = "http://mock-openrouter/api/v1"
+        client.response_cache = None
+        client._http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=mock_app))
+        return client
+    
+    def test_deterministic_completion(self):
+        """Test that the same prompt always gets the same canned reply."""
+        client = self.make_mock_client()
+        messages = [{"role": "user", "content": "What is a prime number?"}]
+        
+        async def scenario():
+            first = await client._call_openrouter_api(messages, "mock/model", 0.7, 100)
+            second = await client._call_openrouter_api(messages, "mock/model", 0.7, 100)
+            await client.aclose()
+            return first, second
+        
+        first, second = asyncio.run(scenario())
+        assert first == second
+        assert first in DEFAULT_REPLIES
+    
+    def test_streaming_completion(self):
+        """Test that the streamed tokens add up to the canned reply."""
+        client = self.make_mock_client()
+        messages = [{"role": "user", "content": "What is a prime number?"}]
+        
+        async def scenario():
+            tokens = [t async for t in client._stream_openrouter_api(messages, "mock/model", 0.7, 100)]
+            await client.aclose()
+            return tokens
+        
+        tokens = asyncio.run(scenario())
+        assert len(tokens) > 1
+        assert "".join(tokens) in DEFAULT_REPLIES
+    
+    def test_injected_rate_limit(self):
+        """Test that injected 429s carry Retry-After and feed the limiter."""
+        client = self.make_mock_client(error_rate_429=1.0, retry_after_seconds=5)
+        
+        async def scenario():
+            with pytest.raises(httpx.HTTPStatusError) as error:
+                await client._call_openrouter_api([], "mock/model", 0.7, 100)
+            await client.aclose()
+            return error.value.response
+        
+        response = asyncio.run(scenario())
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "5"
+        assert client.limiter.stats()["paused_for_seconds"] > 0
+    
+    def test_latency_profiles(self):
+        """Test that sampled latencies follow the configured distribution."""
+        fixed = MockOpenRouter(MockProfile(latency="fixed", latency_ms=250))
+        uniform = MockOpenRouter(MockProfile(latency="uniform", latency_ms=1000, latency_spread=0.2, seed=1))
+        
+        assert fixed.first_token_delay() == 0.25
+        assert all(0.8 <= uniform.first_token_delay() <= 1.2 for _ in range(50))
@@ -8,7 +8,7 @@ import { ChatSidebar } from '../components/chat/ChatSidebar';
 import { Button } from '../components/ui/button';
 import { Menu } from 'lucide-react';
 import { 
-  sendMessage, 
+  sendChatMessage, 
   getSessions, 
   getSessionMessages,
   Message,
@@ -125,16 +125,12 @@ export const ChatPage: React.FC = () => {
     setIsLoading(true);
 
     try {
-      // Get current session messages
-      const currentSession = sessions.find(s => s.id === activeSessionId);
-      const messages = currentSession ? [...currentSession.messages, userMsg] : [userMsg];
-      
-      // Send to backend
-      const response = await sendMessage({
-        messages,
-        preferences,
-        session_id: activeSessionId.startsWith('temp-') ? undefined : activeSessionId
-      });
+      // Send only the new message; the backend keeps the history
+      const response = await sendChatMessage(
+        activeSessionId.startsWith('temp-') ? null : activeSessionId,
+        userMessage,
+        preferences
+      );
       
       const aiMsg: Message = {
         id: response.reply_message.id,
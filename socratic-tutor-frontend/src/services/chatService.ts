@@ -3,6 +3,7 @@
  */
 
 const API_BASE_URL = (import.meta as any).env?.VITE_API_URL || 'http://localhost:8000/api';
+const WS_BASE_URL = API_BASE_URL.replace(/^http/, 'ws');
 
 export interface Message {
   id: string;
@@ -35,15 +36,19 @@ export interface SessionSummary {
   created_at: string;
   last_updated_at: string;
   message_count: number;
+  last_message_preview?: string | null;
+  last_message_at?: string | null;
 }
 
 export interface SessionListResponse {
   sessions: SessionSummary[];
+  next_cursor?: string | null;
 }
 
 export interface SessionMessagesResponse {
   session_id: string;
   messages: Message[];
+  next_cursor?: string | null;
 }
 
 /**
@@ -74,18 +79,141 @@ export async function sendMessage(request: ChatRequest): Promise<ChatResponse> {
   }
 }
 
+type PendingTurn = {
+  resolve: (response: ChatResponse) => void;
+  reject: (error: Error) => void;
+  onToken?: (content: string) => void;
+};
+
+/**
+ * Persistent chat WebSocket for one session.
+ *
+ * Only each new message is sent; the server keeps the history and answers
+ * with an ack, streamed reply chunks and a done frame with session metadata.
+ */
+class ChatSocket {
+  sessionId: string | null;
+  closed = false;
+  readonly ready: Promise<void>;
+  private socket: WebSocket;
+  private pending: PendingTurn[] = [];
+
+  constructor(sessionId: string | null) {
+    this.sessionId = sessionId;
+    this.socket = new WebSocket(`${WS_BASE_URL}/chat/ws/${sessionId ?? 'new'}`);
+    this.ready = new Promise((resolve, reject) => {
+      this.socket.onopen = () => resolve();
+      this.socket.onerror = () => reject(new Error('WebSocket connection failed'));
+    });
+    this.socket.onmessage = (event) => this.handleFrame(JSON.parse(event.data));
+    this.socket.onclose = () => {
+      this.closed = true;
+      this.pending.forEach(turn => turn.reject(new Error('Network connection lost')));
+      this.pending = [];
+    };
+  }
+
+  send(content: string, preferences?: Preferences, onToken?: (content: string) => void): Promise<ChatResponse> {
+    return new Promise((resolve, reject) => {
+      this.pending.push({ resolve, reject, onToken });
+      this.socket.send(JSON.stringify({ type: 'message', content, preferences, client_id: Date.now().toString() }));
+    });
+  }
+
+  close(): void {
+    this.socket.close();
+  }
+
+  private handleFrame(frame: any): void {
+    const turn = this.pending[0];
+    switch (frame.type) {
+      case 'ack':
+        this.sessionId = frame.session_id;
+        break;
+      case 'token':
+        turn?.onToken?.(frame.content);
+        break;
+      case 'done':
+        this.pending.shift();
+        turn?.resolve({ session_id: frame.session.id, reply_message: frame.reply_message });
+        break;
+      case 'error':
+        this.pending.shift();
+        turn?.reject(new Error(frame.detail));
+        break;
+    }
+  }
+}
+
+let activeSocket: ChatSocket | null = null;
+
+/**
+ * Send only the new user message, over the session's WebSocket when possible.
+ *
+ * Falls back to the HTTP endpoint if the socket cannot connect.
+ */
+export async function sendChatMessage(
+  sessionId: string | null,
+  content: string,
+  preferences?: Preferences,
+  onToken?: (content: string) => void
+): Promise<ChatResponse> {
+  if (typeof WebSocket !== 'undefined') {
+    if (!activeSocket || activeSocket.closed || activeSocket.sessionId !== sessionId) {
+      activeSocket?.close();
+      activeSocket = new ChatSocket(sessionId);
+    }
+    const socket = activeSocket;
+    const connected = await socket.ready.then(() => true, () => false);
+    if (connected) {
+      try {
+        return await socket.send(content, preferences, onToken);
+      } catch (error) {
+        console.error('Error sending message:', error);
+        if (error instanceof Error) {
+          throw new Error(getUserFriendlyErrorMessage(error));
+        }
+        throw error;
+      }
+    }
+    activeSocket = null;
+  }
+
+  return sendMessage({
+    messages: [{ id: Date.now().toString(), role: 'user', content }],
+    preferences,
+    session_id: sessionId ?? undefined,
+  });
+}
+
+/**
+ * Append a pagination cursor to a URL when there is one
+ */
+function withCursor(url: string, cursor?: string | null): string {
+  return cursor ? `${url}?cursor=${encodeURIComponent(cursor)}` : url;
+}
+
 /**
- * Get all chat sessions
+ * Get all chat sessions, following pagination cursors
  */
 export async function getSessions(): Promise<SessionListResponse> {
   try {
-    const response = await fetch(`${API_BASE_URL}/chat/sessions`);
-    
-    if (!response.ok) {
-      throw new Error(`HTTP error! status: ${response.status}`);
-    }
+    const sessions: SessionSummary[] = [];
+    let cursor: string | null | undefined = null;
 
-    return await response.json();
+    do {
+      const response = await fetch(withCursor(`${API_BASE_URL}/chat/sessions`, cursor));
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+
+      const page: SessionListResponse = await response.json();
+      sessions.push(...page.sessions);
+      cursor = page.next_cursor;
+    } while (cursor);
+
+    return { sessions };
   } catch (error) {
     console.error('Error fetching sessions:', error);
     throw error;
@@ -93,17 +221,26 @@ export async function getSessions(): Promise<SessionListResponse> {
 }
 
 /**
- * Get messages for a specific session
+ * Get messages for a specific session, following pagination cursors
  */
 export async function getSessionMessages(sessionId: string): Promise<SessionMessagesResponse> {
   try {
-    const response = await fetch(`${API_BASE_URL}/chat/sessions/${sessionId}/messages`);
-    
-    if (!response.ok) {
-      throw new Error(`HTTP error! status: ${response.status}`);
-    }
+    const messages: Message[] = [];
+    let cursor: string | null | undefined = null;
 
-    return await response.json();
+    do {
+      const response = await fetch(withCursor(`${API_BASE_URL}/chat/sessions/${sessionId}/messages`, cursor));
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+
+      const page: SessionMessagesResponse = await response.json();
+      messages.push(...page.messages);
+      cursor = page.next_cursor;
+    } while (cursor);
+
+    return { session_id: sessionId, messages };
   } catch (error) {
     console.error('Error fetching session messages:', error);
     throw error;